@@ -5,11 +5,16 @@ with lib;
 let
   inherit (flake.packages.${pkgs.stdenv.hostPlatform.system}) darkseed;
   cfg = config.services.darkseed;
+  listenAddress =
+    if hasInfix ":" cfg.address
+    then "[${cfg.address}]:${toString cfg.port}"
+    else "${cfg.address}:${toString cfg.port}";
 in
 {
   options.services.darkseed = {
     enable = mkEnableOption "darkseed";
     client.enable = mkEnableOption "client functionality (darkdig)";
+    socketActivation.enable = mkEnableOption "socket activation, keeping DNS sockets open (and queueing queries) while darkseed restarts";
     tor.enable = mkEnableOption "darkseed via TOR";
     i2p.enable = mkEnableOption "darkseed via I2P";
     cjdns = {
@@ -47,6 +52,12 @@ in
       example = "dnsseed.acme.com.";
       description = mdDoc "Zone managed by DNS server.";
     };
+    extraZones = mkOption {
+      type = types.listOf types.str;
+      default = [ ];
+      example = [ "onion.acme.com.:n4,n5,n6" ];
+      description = mdDoc "Additional zones served from the same node pool, optionally restricted to networks via subdomains.";
+    };
   };
 
   config = mkIf cfg.enable {
@@ -127,6 +138,13 @@ in
       };
     };
 
+    systemd.sockets.darkseed = mkIf cfg.socketActivation.enable {
+      description = "darkseed DNS sockets";
+      wantedBy = [ "sockets.target" ];
+      listenStreams = [ listenAddress ];
+      listenDatagrams = [ listenAddress ];
+    };
+
     systemd.services.darkseed = {
       description = "darkseed";
       wants = [ "network-online.target" ];
@@ -138,6 +156,7 @@ in
             --address ${cfg.address} \
             --port ${toString cfg.port} \
             --zone ${cfg.zone} \
+            ${concatMapStringsSep " " (z: "--zone ${z}") cfg.extraZones} \
           '';
         AmbientCapabilities = "CAP_NET_BIND_SERVICE";
         DynamicUser = true;
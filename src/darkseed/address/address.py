@@ -1,7 +1,10 @@
 """Module for network addresses, including encoding/decoding of darknet addresses."""
 
+import ipaddress
+import sys
 from dataclasses import dataclass
 from functools import cached_property
+from typing import ClassVar
 
 from .network import NetworkType
 
@@ -11,6 +14,7 @@ class Address:
     """Class representing network addresses."""
 
     address: str
+    BASE32_ALPHABET: ClassVar[str] = "abcdefghijklmnopqrstuvwxyz234567"
 
     def __str__(self) -> str:
         """Include network type in string representation."""
@@ -45,3 +49,31 @@ class Address:
     def onion(self) -> bool:
         """Check if address is an onion address."""
         return NetworkType.is_onion(self.address)
+
+    def netgroup(self) -> str:
+        """Get netgroup, i.e., the group of addresses likely run by one operator.
+
+        Uses /16 for IPv4 and /32 for IPv6. As in Bitcoin Core, onion and I2P
+        addresses are grouped by the first 4 bits of their public key or hash
+        and CJDNS addresses by their first 12 bits.
+        """
+        return self._netgroup
+
+    @cached_property
+    def _netgroup(self) -> str:
+        """Compute netgroup once, as every pool update groups all nodes again."""
+        return sys.intern(self._compute_netgroup())
+
+    def _compute_netgroup(self) -> str:
+        """Compute netgroup."""
+        net_type = self.net_type
+        if net_type in (NetworkType.ONION_V3, NetworkType.I2P):
+            # first base32 character holds the first 5 bits
+            bits = self.BASE32_ALPHABET.index(self.address[0].lower()) >> 1
+            return f"{net_type}:{bits:x}"
+        packed = ipaddress.ip_address(self.address).packed
+        if net_type == NetworkType.IPV4:
+            return f"{net_type}:{packed[0]}.{packed[1]}"
+        if net_type == NetworkType.CJDNS:
+            return f"{net_type}:{packed[0]:02x}{packed[1] >> 4:x}"
+        return f"{net_type}:{packed[:4].hex()}"
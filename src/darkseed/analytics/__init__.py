@@ -0,0 +1,10 @@
+"""Module for fixed-memory traffic analytics."""
+
+from .sketches import HeavyHitters, HyperLogLog
+from .traffic import TrafficAnalytics
+
+__all__ = [
+    "HeavyHitters",
+    "HyperLogLog",
+    "TrafficAnalytics",
+]
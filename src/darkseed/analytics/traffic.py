@@ -0,0 +1,193 @@
+"""Module for fixed-memory analytics of DNS clients and query classes."""
+
+import base64
+import json
+import logging as log
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ClassVar
+
+from .sketches import HeavyHitters, HyperLogLog, hash128
+
+
+@dataclass
+class QueryClassStats:
+    """Statistics of one query class, i.e., (subdomain, qtype) pair."""
+
+    queries: int = 0
+    clients: HyperLogLog = field(default_factory=HyperLogLog)  # 1 KiB, 3.3% error
+    resolvers: HeavyHitters = field(default_factory=HeavyHitters)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summarize statistics."""
+        return {
+            "queries": self.queries,
+            "unique_clients": round(self.clients.estimate()),
+            "top_clients": self.resolvers.most_common(),
+        }
+
+
+@dataclass
+class TrafficWindow:
+    """Statistics of all queries received during one time window."""
+
+    start: float
+    queries: int = 0
+    # precision 12: 4 KiB per estimate with a standard error of 1.6%
+    clients: HyperLogLog = field(default_factory=lambda: HyperLogLog(12))
+    netgroups: HyperLogLog = field(default_factory=lambda: HyperLogLog(12))
+    resolvers: HeavyHitters = field(default_factory=lambda: HeavyHitters(2048))
+    top_netgroups: HeavyHitters = field(default_factory=lambda: HeavyHitters(2048))
+    classes: dict[str, QueryClassStats] = field(default_factory=dict)
+
+    def to_dict(self, duration: float) -> dict[str, Any]:
+        """Summarize window, including raw HyperLogLog registers for merging."""
+        return {
+            "start": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.start)),
+            "duration": round(duration, 1),
+            "queries": self.queries,
+            "unique_clients": round(self.clients.estimate()),
+            "unique_netgroups": round(self.netgroups.estimate()),
+            "top_clients": self.resolvers.most_common(),
+            "top_netgroups": self.top_netgroups.most_common(),
+            "classes": {
+                name: stats.to_dict()
+                for name, stats in sorted(
+                    self.classes.items(), key=lambda kv: kv[1].queries, reverse=True
+                )
+            },
+            "registers": {
+                "clients": base64.b64encode(self.clients.registers).decode(),
+                "netgroups": base64.b64encode(self.netgroups.registers).decode(),
+            },
+        }
+
+
+@dataclass
+class TrafficAnalytics:
+    """Class keeping fixed-memory statistics of DNS traffic per time window.
+
+    For each window, unique clients and /16 netgroups are estimated using
+    HyperLogLog, and the most active clients and netgroups are tracked using
+    count-min sketches. The same is done per query class, i.e., per
+    (subdomain, qtype) pair such as n4/AAAA, where queries for unsupported
+    subdomains are grouped as '*' and the number of classes is capped. Memory
+    is fixed at below 400 KiB per window regardless of the number of clients.
+
+    The current window is written to a JSON file in the output directory every
+    flush interval by a background thread; completed windows are written once
+    more when they end.
+    """
+
+    output_dir: Path
+    window: int = 3600  # seconds
+    flush_interval: int = 60  # seconds
+    known_subdomains: frozenset[str] = frozenset()
+    _current: TrafficWindow = field(init=False)
+    _completed: list[TrafficWindow] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    MAX_CLASSES: ClassVar[int] = 16
+    OTHER_CLASS: ClassVar[str] = "other"
+
+    def __post_init__(self):
+        self._current = TrafficWindow(self.window_start(time.time()))
+
+    def window_start(self, now: float) -> float:
+        """Get start of the window containing now, aligned to the window size."""
+        return now - now % self.window
+
+    @staticmethod
+    def netgroup(address: str) -> str:
+        """Get /16 netgroup of an IPv4 or IPv6 address, as used for bans.
+
+        Other clients, e.g., unix socket listeners, form their own netgroup.
+        """
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        try:
+            packed = socket.inet_pton(family, address)
+        except OSError:
+            return address
+        if family == socket.AF_INET:
+            return f"{packed[0]}.{packed[1]}.0.0/16"
+        return f"{packed[:2].hex()}::/16"
+
+    def query_class(self, subdomain: str, qtype: str) -> str:
+        """Get name of query class, e.g., n4/AAAA or @/ANY for the zone apex."""
+        if not subdomain:
+            subdomain = "@"
+        elif subdomain not in self.known_subdomains:
+            subdomain = "*"
+        return f"{subdomain}/{qtype}"
+
+    def record(self, address: str, subdomain: str, qtype: str):
+        """Record query by client address for subdomain (relative to zone) and type."""
+        now = time.time()
+        client = hash128(address)
+        netgroup = self.netgroup(address)
+        netgroup_hash = hash128(netgroup)
+        name = self.query_class(subdomain, qtype)
+        with self._lock:
+            window = self._current
+            if now >= window.start + self.window:
+                self._completed.append(window)
+                window = self._current = TrafficWindow(self.window_start(now))
+            window.queries += 1
+            window.clients.add_hash(client)
+            window.netgroups.add_hash(netgroup_hash)
+            window.resolvers.add_hash(address, client)
+            window.top_netgroups.add_hash(netgroup, netgroup_hash)
+            stats = window.classes.get(name)
+            if stats is None:
+                if len(window.classes) >= self.MAX_CLASSES:
+                    name = self.OTHER_CLASS
+                stats = window.classes.setdefault(name, QueryClassStats())
+            stats.queries += 1
+            stats.clients.add_hash(client)
+            stats.resolvers.add_hash(address, client)
+
+    def start(self):
+        """Flush statistics periodically in a background thread."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        threading.Thread(target=self.run, name="Analytics", daemon=True).start()
+        log.info(
+            "Recording traffic analytics (window=%ds, flush_interval=%ds, output=%s)",
+            self.window,
+            self.flush_interval,
+            self.output_dir,
+        )
+
+    def run(self):
+        """Flush statistics every flush interval."""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to flush traffic analytics")
+
+    def flush(self):
+        """Write completed windows and the current window to disk."""
+        now = time.time()
+        with self._lock:
+            completed, self._completed = self._completed, []
+            summaries = [(w, w.to_dict(self.window)) for w in completed]
+            current = self._current
+            summaries.append((current, current.to_dict(now - current.start)))
+        for window, summary in summaries:
+            path = (
+                self.output_dir
+                / f"{summary['start'].replace(':', '-')}_darkseed_analytics.json"
+            )
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+            tmp.replace(path)
+            log.debug("Flushed traffic analytics to %s", path)
+        log.info(
+            "Traffic analytics: queries=%d, unique_clients=%d, unique_netgroups=%d",
+            current.queries,
+            current.clients.estimate(),
+            current.netgroups.estimate(),
+        )
@@ -5,6 +5,7 @@ import os
 import sys
 from dataclasses import asdict, dataclass
 from os import EX_USAGE
+from pathlib import Path
 
 
 @dataclass
@@ -19,6 +20,10 @@ class Config:
     log_level: str
     type: str
     tcp: bool
+    harvest: bool
+    harvest_target: int
+    harvest_patience: int
+    harvest_output: Path | None
 
     @classmethod
     def parse(cls, args):
@@ -28,6 +33,10 @@ class Config:
             print("Using --socks5-proxy requires --tcp to be set. Exiting.")
             sys.exit(EX_USAGE)
 
+        if args.harvest and not args.tcp:
+            print("Using --harvest requires --tcp to be set. Exiting.")
+            sys.exit(EX_USAGE)
+
         return cls(
             verbose=args.verbose,
             domain=args.domain,
@@ -37,6 +46,10 @@ class Config:
             type=args.type,
             log_level=args.log_level.upper(),
             tcp=args.tcp,
+            harvest=args.harvest,
+            harvest_target=args.harvest_target,
+            harvest_patience=args.harvest_patience,
+            harvest_output=args.harvest_output,
         )
 
     def to_dict(self):
@@ -102,6 +115,34 @@ def parse_args():
         help="Use TCP to query DNS [default: use UDP, not TCP]",
     )
 
+    parser.add_argument(
+        "--harvest",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Repeatedly query n4/n5/n6 subdomains to collect darknet addresses [default: False]",
+    )
+
+    parser.add_argument(
+        "--harvest-target",
+        type=int,
+        default=0,
+        help="Stop harvesting after collecting this many unique addresses [default: 0 (no target)]",
+    )
+
+    parser.add_argument(
+        "--harvest-patience",
+        type=int,
+        default=30,
+        help="Stop harvesting after this many queries without new addresses [default: 30]",
+    )
+
+    parser.add_argument(
+        "--harvest-output",
+        type=Path,
+        default=None,
+        help="File to write harvested addresses to, one per line [default: stdout]",
+    )
+
     parser.add_argument("domain", type=str, help="DNS query domain")
     args = parser.parse_args()
 
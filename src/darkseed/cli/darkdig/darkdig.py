@@ -2,17 +2,15 @@
 
 import importlib.metadata
 import logging as log
+import socket
 import time
 
 import dns.flags
 import dns.message
 import dns.opcode
-import dns.query
 import dns.rcode
 import dns.rdataclass
 import dns.rdatatype
-import dns.resolver
-import socks
 
 from darkseed.dns import AAAACodec, DNSConstants
 
@@ -20,6 +18,11 @@ from .config import Config, get_config
 
 __version__ = importlib.metadata.version("darkseed")
 
+# dnspython's resolver and query modules, pysocks, and the harvester are only
+# imported when needed, keeping startup time of one-shot lookups low
+
+LOOKUP_TIMEOUT = 5.0  # seconds
+
 
 def lookup_socks(conf: Config) -> dns.message.Message:
     """Lookup DNS records using SOCKS5 proxy.
@@ -41,6 +44,8 @@ def lookup_socks(conf: Config) -> dns.message.Message:
             )
         return dns.message.from_wire(data[2:])
 
+    import socks  # pylint: disable=import-outside-toplevel
+
     query = dns.message.make_query(conf.domain, conf.type)
     query = _to_wire(query)
 
@@ -60,10 +65,7 @@ def lookup_socks(conf: Config) -> dns.message.Message:
 
 
 def lookup(conf: Config) -> dns.message.Message:
-    """Look up DNS records for a domain.
-
-    Uses low-level dns.query instead of dns.resolver to allow "ANY" queries.
-    """
+    """Look up DNS records for a domain, using SOCKS5 proxy if configured."""
 
     if conf.proxy:
         if not conf.tcp:
@@ -78,13 +80,34 @@ def lookup(conf: Config) -> dns.message.Message:
 def lookup_regular(conf: Config) -> dns.message.Message:
     """Look up DNS records for a domain.
 
-    Uses low-level dns.query instead of dns.resolver to allow "ANY" queries.
+    Exchanges the query over a plain socket instead of using dns.resolver
+    (to allow "ANY" queries) or dns.query (to avoid importing it along with
+    its dependencies, which takes longer than the lookup itself).
     """
     query = dns.message.make_query(conf.domain, conf.type)
+    wire = query.to_wire()
+    address = (conf.nameserver, conf.port)
 
     try:
-        query_func = dns.query.tcp if conf.tcp else dns.query.udp
-        response = query_func(query, conf.nameserver, port=conf.port)
+        if conf.tcp:
+            with socket.create_connection(address, timeout=LOOKUP_TIMEOUT) as sock:
+                sock.sendall(len(wire).to_bytes(2, byteorder="big") + wire)
+                with sock.makefile("rb") as file:
+                    size = int.from_bytes(file.read(2), byteorder="big")
+                    response = dns.message.from_wire(file.read(size))
+        else:
+            family = socket.AF_INET6 if ":" in conf.nameserver else socket.AF_INET
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(LOOKUP_TIMEOUT)
+                sock.connect(address)
+                sock.send(wire)
+                # ignore stray datagrams not answering the query
+                while True:
+                    response = dns.message.from_wire(
+                        sock.recv(DNSConstants.UDP_RECV_SIZE)
+                    )
+                    if query.is_response(response):
+                        break
     except Exception as e:  # pylint: disable=broad-except
         raise ConnectionError(f"Failed to retrieve DNS records: {e}") from e
 
@@ -186,6 +209,24 @@ class PrettyPrinter:
         PrettyPrinter.print_sections(response)
 
 
+def harvest(conf: Config):
+    """Harvest darknet addresses and print summary."""
+    from .harvest import Harvester  # pylint: disable=import-outside-toplevel
+
+    harvester = Harvester(conf, timeout=LOOKUP_TIMEOUT)
+    result = harvester.run(conf.harvest_target, conf.harvest_patience)
+    if conf.harvest_output:
+        Harvester.write(result.addresses, conf.harvest_output)
+    else:
+        for address in sorted(result.addresses):
+            print(address)
+    print(f";; Unique addresses: {len(result.addresses)}")
+    print(f";; Queries: {result.queries} (reconnects: {result.reconnects})")
+    print(f";; Harvest time: {int(result.duration * 1000)} msec")
+    print(f";; Throughput: {result.rate:.1f} unique addresses/sec")
+    print(f";; SERVER: {conf.nameserver}#{conf.port}")
+
+
 def main():
     """Entry point."""
     conf = get_config()
@@ -198,6 +239,8 @@ def main():
 
     print(f"; <<>> darkdig {__version__} <<>>", end=" ")
     if not conf.nameserver:
+        import dns.resolver  # pylint: disable=import-outside-toplevel
+
         resolver = dns.resolver.Resolver()
         conf.nameserver = str(resolver.nameservers[0])
     print(f"@{conf.nameserver}", end=" ")
@@ -210,8 +253,14 @@ def main():
         print("-v", end=" ")
     if conf.log_level:
         print(f"-l {conf.log_level}", end=" ")
+    if conf.harvest:
+        print("--harvest", end=" ")
     print(f"{conf.domain}")
 
+    if conf.harvest:
+        harvest(conf)
+        return
+
     lookup_start = time.time()
     response = lookup(conf)
     lookup_end = time.time()
@@ -0,0 +1,151 @@
+"""Harvest mode for darkdig: bulk collection of darknet addresses."""
+
+import logging as log
+import socket
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import dns.message
+import dns.rdatatype
+
+from darkseed.address import Address, NetworkType
+from darkseed.dns import AAAACodec
+
+from .config import Config
+
+
+@dataclass
+class HarvestResult:
+    """Result of a harvest run."""
+
+    addresses: set[str] = field(default_factory=set)
+    queries: int = 0
+    reconnects: int = 0
+    duration: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Unique addresses collected per second."""
+        return len(self.addresses) / self.duration if self.duration else 0.0
+
+
+@dataclass
+class Harvester:
+    """Repeatedly query darknet subdomains over a single TCP connection.
+
+    Queries for the n4/n5/n6 subdomains are sent round-robin over one
+    (optionally SOCKS5-proxied) TCP connection, which is only re-established
+    if the server closes it or does not reply within `timeout` seconds.
+    Addresses are decoded in bulk from each reply and deduplicated. Harvesting
+    stops when the target number of unique addresses is reached, when
+    `patience` consecutive queries yield nothing new, or when a query fails
+    even after reconnecting.
+    """
+
+    conf: Config
+    networks: tuple[NetworkType, ...] = (
+        NetworkType.ONION_V3,
+        NetworkType.I2P,
+        NetworkType.CJDNS,
+    )
+    timeout: float | None = None
+    connects: int = 0
+    _sock: socket.socket | None = None
+
+    def connect(self) -> socket.socket:
+        """Open TCP connection to nameserver, using SOCKS5 proxy if configured."""
+        self.connects += 1
+        if self.conf.proxy:
+            import socks  # pylint: disable=import-outside-toplevel
+
+            proxy_host, proxy_port = self.conf.proxy.split(":")
+            sock = socks.socksocket()
+            sock.settimeout(self.timeout)
+            sock.set_proxy(socks.SOCKS5, proxy_host, int(proxy_port))
+            sock.connect((self.conf.nameserver, self.conf.port))
+            return sock
+        return socket.create_connection(
+            (self.conf.nameserver, self.conf.port), timeout=self.timeout
+        )
+
+    def close(self):
+        """Close TCP connection, if any."""
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    @staticmethod
+    def recv_exact(sock: socket.socket, size: int) -> bytes:
+        """Read exactly size bytes from socket; raise if connection is closed."""
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = sock.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("Connection closed by nameserver")
+            buf += chunk
+        return bytes(buf)
+
+    def query(self, domain: str) -> dns.message.Message:
+        """Send query over persistent TCP connection and return response."""
+        wire = dns.message.make_query(domain, dns.rdatatype.AAAA).to_wire()
+        wire = len(wire).to_bytes(2, byteorder="big") + wire
+        for attempt in range(2):
+            try:
+                if not self._sock:
+                    self._sock = self.connect()
+                self._sock.sendall(wire)
+                size = int.from_bytes(self.recv_exact(self._sock, 2), "big")
+                return dns.message.from_wire(self.recv_exact(self._sock, size))
+            except (ConnectionError, OSError) as e:
+                # server may close connections after each query, or a (Tor)
+                # circuit may stall: reconnect once
+                self.close()
+                if attempt:
+                    raise ConnectionError(f"Failed to query {domain}: {e}") from e
+                log.debug("Reconnecting after connection error: %s", e)
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def decode(response: dns.message.Message) -> list[Address]:
+        """Decode all custom-encoded addresses contained in a response."""
+        rdatas = [rdata for rrset in response.answer for rdata in rrset]
+        return AAAACodec.decode(rdatas)
+
+    def run(self, target: int, patience: int) -> HarvestResult:
+        """Harvest addresses until target is reached or yield flattens out."""
+        result = HarvestResult()
+        domains = [f"{net.domain}.{self.conf.domain}" for net in self.networks]
+        stale = 0
+        start = time.perf_counter()
+        try:
+            while stale < patience and not (target and len(result.addresses) >= target):
+                domain = domains[result.queries % len(domains)]
+                try:
+                    response = self.query(domain)
+                except ConnectionError as e:
+                    log.warning("Stopping harvest: %s", e)
+                    break
+                result.queries += 1
+                before = len(result.addresses)
+                result.addresses.update(a.address for a in self.decode(response))
+                new = len(result.addresses) - before
+                stale = 0 if new else stale + 1
+                log.debug(
+                    "Harvested %d new address(es) from %s (unique=%d, queries=%d)",
+                    new,
+                    domain,
+                    len(result.addresses),
+                    result.queries,
+                )
+        finally:
+            self.close()
+            result.duration = time.perf_counter() - start
+            result.reconnects = max(self.connects - 1, 0)
+        return result
+
+    @staticmethod
+    def write(addresses: set[str], path: Path):
+        """Write addresses to file, one per line."""
+        with open(path, "w", encoding="ascii") as file:
+            file.writelines(f"{a}\n" for a in sorted(addresses))
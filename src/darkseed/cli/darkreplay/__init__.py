@@ -0,0 +1,5 @@
+"""Import main function for darkreplay script."""
+
+from .darkreplay import main
+
+__all__ = ["main"]
@@ -0,0 +1,114 @@
+"""Configuration options for darkreplay CLI tool."""
+
+import argparse
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+@dataclass
+class Config:
+    """Configuration settings."""
+
+    capture: Path
+    targets: list[tuple[str, int]]
+    speed: float
+    timeout: float
+    resolvers: int
+    output: Path | None
+    log_level: str
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        targets = []
+        for target in args.target:
+            host, _, port = target.rpartition(":")
+            targets.append((host.strip("[]"), int(port)))
+
+        return cls(
+            capture=args.capture,
+            targets=targets,
+            speed=args.speed,
+            timeout=args.timeout,
+            resolvers=args.resolvers,
+            output=args.output,
+            log_level=args.log_level.upper(),
+        )
+
+    def to_dict(self):
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = argparse.ArgumentParser(
+        description="Tool to replay queries captured by darkseed and compare latencies."
+    )
+
+    parser.add_argument(
+        "-t",
+        "--target",
+        type=str,
+        action="append",
+        required=True,
+        help="Server to replay queries against as HOST:PORT; repeat to compare "
+        "servers, e.g., two builds (e.g., 127.0.0.1:8053)",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed as a multiple of the recorded speed; 0 replays as fast "
+        "as possible [default: 1.0]",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=2.0,
+        help="Seconds to wait for outstanding responses after replay [default: 2.0]",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--resolvers",
+        type=int,
+        default=0,
+        help="Simulate this many caching resolvers: queries are assigned to them at "
+        "random and not sent while their resolver caches an answer for the same name "
+        "and type, honoring the TTLs returned by the target [default: 0 (send all)]",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="File to write per-query latencies to as CSV [default: None]",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--log-level",
+        type=str,
+        default=os.environ.get("LOG_LEVEL", "INFO"),
+        help="Logging verbosity",
+    )
+
+    parser.add_argument("capture", type=Path, help="Capture file recorded by darkseed")
+    args = parser.parse_args()
+
+    return args
+
+
+def get_config():
+    """Parse command-line arguments and get configuration settings."""
+
+    args = parse_args()
+    conf = Config.parse(args)
+    return conf
@@ -0,0 +1,97 @@
+"""CLI for darkreplay."""
+
+import csv
+import logging as log
+import time
+
+from darkseed.dns import QueryCapture
+
+from .config import Config, get_config
+from .replay import Replayer, ReplayResult
+
+
+def write_latencies(results: list[ReplayResult], conf: Config):
+    """Write per-query latencies (in msec) of all replays to CSV file."""
+    assert conf.output
+    with open(conf.output, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["target", "query", "protocol", "latency_ms", "cached"])
+        for result in results:
+            for index, (latency, protocol) in enumerate(
+                zip(result.latencies, result.protocols)
+            ):
+                writer.writerow(
+                    [
+                        result.target,
+                        index,
+                        protocol,
+                        "" if latency is None else f"{latency * 1000:.3f}",
+                        int(index in result.cached),
+                    ]
+                )
+    log.info("Wrote per-query latencies to %s", conf.output)
+
+
+def print_comparison(results: list[ReplayResult]):
+    """Print summary of each replay, and change relative to the first one."""
+    summaries = [result.summary() for result in results]
+    width = max(len(result.target) for result in results)
+    columns = list(summaries[0])
+    print(f"{'target':<{width}} " + " ".join(f"{c:>9}" for c in columns))
+    for result, summary in zip(results, summaries):
+        print(
+            f"{result.target:<{width}} "
+            + " ".join(
+                f"{v:>9.3f}" if isinstance(v, float) else f"{v:>9}"
+                for v in summary.values()
+            )
+        )
+    baseline = summaries[0]
+    for result, summary in zip(results[1:], summaries[1:]):
+        changes = ", ".join(
+            f"{c}={100 * (summary[c] / baseline[c] - 1):+.1f}%"
+            for c in ("sent", "qps", "p50", "p90", "p99")
+            if baseline[c]
+        )
+        print(f";; {result.target} vs. {results[0].target}: {changes}")
+    print(";; latencies in msec")
+
+
+def main():
+    """Entry point."""
+    conf = get_config()
+    log.basicConfig(
+        level=conf.log_level,
+        format="%(asctime)s | %(levelname)-8s | %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%SZ",
+    )
+    log.Formatter.converter = time.gmtime
+
+    queries = list(QueryCapture.read(conf.capture))
+    if not queries:
+        raise ValueError(f"No queries in capture file {conf.capture}")
+    log.info(
+        "Read %d queries spanning %.1f seconds from %s",
+        len(queries),
+        queries[-1].offset - queries[0].offset,
+        conf.capture,
+    )
+
+    results = []
+    for host, port in conf.targets:
+        replayer = Replayer(
+            host,
+            port,
+            speed=conf.speed,
+            timeout=conf.timeout,
+            resolvers=conf.resolvers,
+        )
+        results.append(replayer.run(queries))
+
+    if conf.output:
+        write_latencies(results, conf)
+    print_comparison(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Replay captured DNS queries against a server and measure latencies."""
+
+import logging as log
+import random
+import socket
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+import dns.exception
+import dns.message
+
+from darkseed.dns import CapturedQuery, DNSConstants
+
+
+@dataclass
+class ReplayResult:
+    """Latencies (in seconds) of one replay; None for unanswered queries.
+
+    Queries answered by a simulated resolver cache were not sent; their
+    indices are listed in cached.
+    """
+
+    target: str
+    latencies: list[float | None]
+    protocols: list[str]
+    duration: float
+    cached: set[int] = field(default_factory=set)
+
+    @property
+    def answered(self) -> list[float]:
+        """Latencies of answered queries."""
+        return [latency for latency in self.latencies if latency is not None]
+
+    @property
+    def lost(self) -> int:
+        """Number of unanswered queries."""
+        return len(self.latencies) - len(self.answered) - len(self.cached)
+
+    def percentile(self, p: float) -> float:
+        """Get latency percentile (0-100) of answered queries."""
+        answered = sorted(self.answered)
+        if not answered:
+            return float("nan")
+        return answered[min(len(answered) - 1, int(len(answered) * p / 100))]
+
+    def summary(self) -> dict[str, float]:
+        """Summarize replay: counts, throughput, latency percentiles (in msec)."""
+        answered = self.answered
+        return {
+            "queries": len(self.latencies),
+            "sent": len(self.latencies) - len(self.cached),
+            "answered": len(answered),
+            "lost": self.lost,
+            "qps": len(answered) / self.duration if self.duration else 0.0,
+            "mean": statistics.fmean(answered) * 1000 if answered else float("nan"),
+            "p50": self.percentile(50) * 1000,
+            "p90": self.percentile(90) * 1000,
+            "p99": self.percentile(99) * 1000,
+            "max": max(answered) * 1000 if answered else float("nan"),
+        }
+
+
+@dataclass
+class Replayer:
+    """Class replaying captured queries against a DNS server.
+
+    Queries are sent open-loop following the recorded inter-arrival times,
+    divided by speed (speed=0 sends as fast as possible), using the recorded
+    transport: UDP queries share one socket and TCP queries share one
+    persistent connection, which is re-established if the server closes it.
+    Query IDs are rewritten to the query's index (modulo 2^16) to match
+    responses to queries; responses are read by one thread per transport.
+
+    With resolvers set, queries are assigned to that many simulated caching
+    resolvers at random. A query is not sent if its resolver holds an answer
+    for the same name and type whose TTL has not expired, measured in
+    recorded time, which shows how TTLs affect the query volume.
+    """
+
+    host: str
+    port: int
+    speed: float = 1.0
+    timeout: float = 2.0  # seconds to wait for outstanding responses
+    resolvers: int = 0  # simulated caching resolvers; 0 sends all queries
+    _sent: dict[tuple[str, int], tuple[int, float]] = field(default_factory=dict)
+    _latencies: list[float | None] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _done: threading.Event = field(default_factory=threading.Event)
+    _last_response: float = 0.0
+    _udp: socket.socket | None = None
+    _tcp: socket.socket | None = None
+    # cache key (resolver, name, type) per query, and expiry (recorded time) per key
+    _keys: list[tuple[int, str, int] | None] = field(default_factory=list)
+    _offsets: list[float] = field(default_factory=list)
+    _expires: dict[tuple[int, str, int], float] = field(default_factory=dict)
+    POLL_INTERVAL: ClassVar[float] = 0.1  # seconds
+
+    @property
+    def target(self) -> str:
+        """Target server as host:port."""
+        return f"{self.host}:{self.port}"
+
+    def connect_tcp(self) -> socket.socket:
+        """Open TCP connection and start thread reading responses from it."""
+        sock = socket.create_connection((self.host, self.port))
+        sock.settimeout(self.POLL_INTERVAL)
+        threading.Thread(
+            target=self.read_tcp, args=(sock,), name="Replay-TCP", daemon=True
+        ).start()
+        return sock
+
+    def send(self, index: int, query: CapturedQuery):
+        """Send query with ID rewritten to index."""
+        qid = index & 0xFFFF
+        data = qid.to_bytes(2, "big") + query.data[2:]
+        with self._lock:
+            self._sent[(query.protocol, qid)] = (index, time.perf_counter())
+        if query.protocol == "UDP":
+            assert self._udp
+            self._udp.sendto(data, (self.host, self.port))
+            return
+        message = len(data).to_bytes(2, "big") + data
+        for _ in range(2):
+            if not self._tcp:
+                self._tcp = self.connect_tcp()
+            try:
+                self._tcp.sendall(message)
+                return
+            except OSError:
+                log.debug("TCP connection to %s lost; reconnecting", self.target)
+                self._tcp.close()
+                self._tcp = None
+
+    def receive(self, protocol: str, data: bytes):
+        """Record latency of response."""
+        now = time.perf_counter()
+        if len(data) < 2:
+            return
+        qid = int.from_bytes(data[:2], "big")
+        with self._lock:
+            sent = self._sent.pop((protocol, qid), None)
+            if sent:
+                index, start = sent
+                self._latencies[index] = now - start
+                self._last_response = now
+        if sent and self.resolvers:
+            self.cache(index, data)
+
+    def cache_keys(
+        self, queries: list[CapturedQuery]
+    ) -> list[tuple[int, str, int] | None]:
+        """Assign queries to simulated resolvers; None for unparsable queries."""
+        rng = random.Random(0)
+        keys: list[tuple[int, str, int] | None] = []
+        for query in queries:
+            try:
+                question = dns.message.from_wire(query.data).question[0]
+            except (dns.exception.DNSException, IndexError):
+                keys.append(None)
+                continue
+            keys.append(
+                (
+                    rng.randrange(self.resolvers),
+                    question.name.to_text().lower(),
+                    question.rdtype,
+                )
+            )
+        return keys
+
+    def cache(self, index: int, data: bytes):
+        """Cache answer to query for the TTL of its records."""
+        key = self._keys[index]
+        if key is None:
+            return
+        try:
+            response = dns.message.from_wire(data)
+        except dns.exception.DNSException:
+            return
+        ttl = min((rrset.ttl for rrset in response.answer), default=0)
+        with self._lock:
+            self._expires[key] = self._offsets[index] + ttl
+
+    def is_cached(self, index: int) -> bool:
+        """Check whether the query's resolver holds an unexpired answer."""
+        key = self._keys[index]
+        with self._lock:
+            return (
+                key is not None and self._expires.get(key, -1.0) > self._offsets[index]
+            )
+
+    def read_udp(self):
+        """Read UDP responses until replay is done."""
+        assert self._udp
+        while not self._done.is_set():
+            try:
+                data = self._udp.recv(DNSConstants.UDP_RECV_SIZE)
+            except TimeoutError:
+                continue
+            self.receive("UDP", data)
+
+    def read_tcp(self, sock: socket.socket):
+        """Read length-prefixed TCP responses until replay is done or EOF."""
+        buffer = bytes()
+        while not self._done.is_set():
+            try:
+                chunk = sock.recv(DNSConstants.TCP_SIZE_LIMIT)
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            if not chunk:
+                return
+            buffer += chunk
+            while len(buffer) >= 2:
+                size = int.from_bytes(buffer[:2], "big")
+                if len(buffer) < 2 + size:
+                    break
+                self.receive("TCP", buffer[2 : 2 + size])
+                buffer = buffer[2 + size :]
+
+    def run(self, queries: list[CapturedQuery]) -> ReplayResult:
+        """Replay queries and wait for outstanding responses."""
+        self._sent.clear()
+        self._latencies = [None] * len(queries)
+        self._offsets = [query.offset for query in queries]
+        self._keys = self.cache_keys(queries) if self.resolvers else []
+        self._expires.clear()
+        cached = set()
+        self._done.clear()
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self._udp = socket.socket(family, socket.SOCK_DGRAM)
+        self._udp.settimeout(self.POLL_INTERVAL)
+        reader = threading.Thread(target=self.read_udp, name="Replay-UDP", daemon=True)
+        reader.start()
+
+        log.info(
+            "Replaying %d queries against %s (speed=%s, resolvers=%s)",
+            len(queries),
+            self.target,
+            self.speed or "max",
+            self.resolvers or "none",
+        )
+        start = time.perf_counter()
+        base = queries[0].offset if queries else 0.0
+        for index, query in enumerate(queries):
+            if self.speed:
+                delay = start + (query.offset - base) / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if self.resolvers and self.is_cached(index):
+                cached.add(index)
+                continue
+            self.send(index, query)
+        sent = time.perf_counter()
+
+        while self._sent and time.perf_counter() < sent + self.timeout:
+            time.sleep(self.POLL_INTERVAL / 10)
+        # exclude time spent waiting for lost responses
+        duration = max(sent, self._last_response) - start
+        self._done.set()
+        reader.join()
+        self._udp.close()
+        if self._tcp:
+            self._tcp.close()
+            self._tcp = None
+        return ReplayResult(
+            self.target,
+            list(self._latencies),
+            [query.protocol for query in queries],
+            duration,
+            cached,
+        )
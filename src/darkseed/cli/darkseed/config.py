@@ -4,28 +4,228 @@ import argparse
 import datetime
 import importlib.metadata
 import os
+import tempfile
 from dataclasses import asdict, dataclass
 from pathlib import Path
 
+from darkseed.address import NetworkType
+from darkseed.dns import RoutingTable, Zone
+
 __version__ = importlib.metadata.version("darkseed")
 
 
+def unix_listener(spec: str) -> tuple[str, Path]:
+    """Parse unix socket listener specification: LABEL=PATH."""
+    label, sep, path = spec.partition("=")
+    if not sep or not label or not path:
+        raise argparse.ArgumentTypeError(f"expected LABEL=PATH, got {spec}")
+    return label, Path(path)
+
+
+def ttl_class(spec: str) -> tuple[str, int]:
+    """Parse TTL specification: CLASS=SECONDS, e.g., n4/AAAA=600, n4=600 or @=300."""
+    name, sep, ttl = spec.partition("=")
+    subdomain, _, qtype = name.partition("/")
+    if not sep or not ttl.isdigit():
+        raise argparse.ArgumentTypeError(f"expected CLASS=SECONDS, got {spec}")
+    if subdomain != "@" and subdomain not in RoutingTable.subdomains():
+        raise argparse.ArgumentTypeError(f"unsupported subdomain: {subdomain}")
+    if qtype and qtype not in ("A", "AAAA", "ANY"):
+        raise argparse.ArgumentTypeError(f"unsupported query type: {qtype}")
+    return name, int(ttl)
+
+
+def probe_network(subdomain: str) -> NetworkType:
+    """Parse network given by its subdomain, e.g., n4 for onion."""
+    for net in Zone.SUPPORTED_NETWORKS:
+        if net.domain == subdomain:
+            return net
+    raise argparse.ArgumentTypeError(f"unsupported network: {subdomain}")
+
+
+def probe_networks(spec: str) -> frozenset[NetworkType]:
+    """Parse comma-separated networks, e.g., n1,n2,n6."""
+    return frozenset(probe_network(s) for s in spec.split(",") if s)
+
+
+def probe_proxy(spec: str) -> tuple[NetworkType, str]:
+    """Parse proxy specification: [NETWORK=]HOST:PORT, for onion if no network."""
+    subdomain, sep, proxy = spec.rpartition("=")
+    net = probe_network(subdomain) if sep else NetworkType.ONION_V3
+    host, _, port = proxy.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected [NETWORK=]HOST:PORT, got {spec}")
+    return net, proxy
+
+
 @dataclass(frozen=True)
 class DNSConfig:
     """DNS Server configuration."""
 
     address: str
     port: int
-    zone: str
+    zones: tuple[Zone, ...]
+    udp_batch: int
+    udp_threads: int
+    unix_listeners: tuple[tuple[str, Path], ...]
+    admission_workers: int
+    admission_queue_size: int
+    admission_deadline: float
+    shed_policy: str
+    capture: Path | None
+    capture_max_queries: int
+    dnssec_key_dir: Path | None
+    dnssec_pool_size: int
+    handoff_socket: Path | None
+    drain_timeout: float
+    takeover_timeout: float
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        zones = tuple(Zone.parse(spec) for spec in args.zone)
+        return cls(
+            address=args.address,
+            port=args.port,
+            zones=zones,
+            udp_batch=args.udp_batch,
+            udp_threads=args.udp_threads,
+            unix_listeners=tuple(args.unix_listener or ()),
+            admission_workers=args.admission_workers,
+            admission_queue_size=args.admission_queue_size,
+            admission_deadline=args.admission_deadline,
+            shed_policy=args.shed_policy,
+            capture=args.capture,
+            capture_max_queries=args.capture_max_queries,
+            dnssec_key_dir=args.dnssec_key_dir,
+            dnssec_pool_size=args.dnssec_pool_size,
+            handoff_socket=args.handoff_socket,
+            drain_timeout=args.drain_timeout,
+            takeover_timeout=args.takeover_timeout,
+        )
+
+
+@dataclass(frozen=True)
+class SelectionConfig:
+    """Node selection configuration."""
+
+    mode: str
+    netgroup_diversity: bool
+    latency_column: str
+    latency_scale: float
+    min_version: int
+    appearance_exponent: float
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        return cls(
+            mode=args.selection,
+            netgroup_diversity=args.netgroup_diversity,
+            latency_column=args.quality_latency_column,
+            latency_scale=args.quality_latency_scale,
+            min_version=args.quality_min_version,
+            appearance_exponent=args.quality_appearance_exponent,
+        )
+
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    """On-demand profiling configuration."""
+
+    output_dir: Path
+    duration: float
+    trace_malloc: bool
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        return cls(
+            output_dir=args.profile_dir,
+            duration=args.profile_duration,
+            trace_malloc=args.tracemalloc,
+        )
+
+
+@dataclass(frozen=True)
+class ProbeConfig:
+    """Liveness probing configuration."""
+
+    interval: int
+    mode: str
+    networks: frozenset[NetworkType]
+    proxies: tuple[tuple[NetworkType, str], ...]
+    timeout: float
+    concurrency: int
+    rate: float
+    max_failures: int
+    max_failure_ratio: float
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        return cls(
+            interval=args.probe_interval,
+            mode=args.probe_mode,
+            networks=args.probe_networks,
+            proxies=tuple(args.probe_proxy or ()),
+            timeout=args.probe_timeout,
+            concurrency=args.probe_concurrency,
+            rate=args.probe_rate,
+            max_failures=args.probe_max_failures,
+            max_failure_ratio=args.probe_max_failure_ratio,
+        )
+
+
+@dataclass(frozen=True)
+class AnalyticsConfig:
+    """Traffic analytics configuration."""
+
+    output_dir: Path | None
+    window: int
+    flush_interval: int
 
     @classmethod
     def parse(cls, args):
         """Create class instance from arguments."""
-        zone = args.zone.lower()
-        if not zone.endswith("."):
-            zone += "."
-            print(f"Warning: Appended missing final dot to DNS zone: {zone}")
-        return cls(address=args.address, port=args.port, zone=zone)
+        return cls(
+            output_dir=args.analytics_dir,
+            window=args.analytics_window,
+            flush_interval=args.analytics_flush_interval,
+        )
+
+
+@dataclass(frozen=True)
+class GCConfig:
+    """Garbage collection configuration."""
+
+    freeze: bool
+    ingest_threshold: int
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        return cls(freeze=args.gc_freeze, ingest_threshold=args.gc_ingest_threshold)
+
+
+@dataclass(frozen=True)
+class TTLConfig:
+    """TTL configuration."""
+
+    default: int
+    classes: tuple[tuple[str, int], ...]
+    adaptive: bool
+    max_ttl: int
+
+    @classmethod
+    def parse(cls, args):
+        """Create class instance from arguments."""
+        return cls(
+            default=args.ttl,
+            classes=tuple(args.ttl_class or ()),
+            adaptive=args.adaptive_ttl,
+            max_ttl=args.max_ttl,
+        )
 
 
 @dataclass
@@ -36,8 +236,19 @@ class Config:
     timestamp: datetime.datetime
     log_level: str
     dns: DNSConfig
+    selection: SelectionConfig
+    profiling: ProfilingConfig
+    probe: ProbeConfig
+    analytics: AnalyticsConfig
+    gc: GCConfig
     crawler_path: Path
-    ttl: int
+    replication_listen: str | None
+    replicate_from: str | None
+    push_socket: Path | None
+    push_interval: float
+    snapshot_window: int
+    snapshot_max_age: int
+    ttl: TTLConfig
 
     @classmethod
     def parse(cls, args):
@@ -48,8 +259,19 @@ class Config:
             timestamp=args.timestamp,
             log_level=args.log_level.upper(),
             dns=DNSConfig.parse(args),
+            selection=SelectionConfig.parse(args),
+            profiling=ProfilingConfig.parse(args),
+            probe=ProbeConfig.parse(args),
+            analytics=AnalyticsConfig.parse(args),
+            gc=GCConfig.parse(args),
             crawler_path=args.crawler_path,
-            ttl=args.ttl,
+            replication_listen=args.replication_listen,
+            replicate_from=args.replicate_from,
+            push_socket=args.push_socket,
+            push_interval=args.push_interval,
+            snapshot_window=args.snapshot_window,
+            snapshot_max_age=args.snapshot_max_age,
+            ttl=TTLConfig.parse(args),
         )
 
     def to_dict(self):
@@ -76,11 +298,82 @@ def parse_args():
         help="Directory containing data created by p2p-crawler",
     )
 
+    parser.add_argument(
+        "--replication-listen",
+        type=str,
+        default=None,
+        help="Serve node pools to secondary instances on HOST:PORT or a unix socket "
+        "path [default: None (don't replicate)]",
+    )
+
+    parser.add_argument(
+        "--replicate-from",
+        type=str,
+        default=None,
+        help="Run as secondary: receive node pools from a primary on HOST:PORT or a "
+        "unix socket path instead of reading crawler data [default: None]",
+    )
+
+    parser.add_argument(
+        "--push-socket",
+        type=Path,
+        default=None,
+        help="Accept nodes pushed by a local crawler on this unix socket, in addition "
+        "to reading crawler data [default: None]",
+    )
+
+    parser.add_argument(
+        "--push-interval",
+        type=float,
+        default=5.0,
+        help="Minimum seconds between node pool updates with pushed nodes "
+        "[default: 5.0]",
+    )
+
+    parser.add_argument(
+        "--snapshot-window",
+        type=int,
+        default=1,
+        help="Number of recent crawler snapshots to merge into the node pool",
+    )
+
+    parser.add_argument(
+        "--snapshot-max-age",
+        type=int,
+        default=0,
+        help="Expire nodes not seen for this many seconds before the newest "
+        "snapshot [default: 0 (expire by --snapshot-window only)]",
+    )
+
     parser.add_argument(
         "--ttl",
         type=int,
         default=60,
-        help="TTL for DNS records (in seconds)",
+        help="TTL for DNS records (in seconds); lower bound for adaptive TTLs",
+    )
+
+    parser.add_argument(
+        "--ttl-class",
+        type=ttl_class,
+        action="append",
+        help="TTL for a query class (e.g., n4/AAAA=600), a subdomain (e.g., @=300 for "
+        "the zone apex) or a network's subdomain (e.g., n4=600 for onion addresses, "
+        "including composite answers) as CLASS=SECONDS; can be repeated",
+    )
+
+    parser.add_argument(
+        "--adaptive-ttl",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Derive TTLs of networks without --ttl-class from pool churn and the "
+        "time until the next expected ingest [default: False]",
+    )
+
+    parser.add_argument(
+        "--max-ttl",
+        type=int,
+        default=3600,
+        help="Upper bound for adaptive TTLs (in seconds) [default: 3600]",
     )
 
     parser.add_argument(
@@ -97,11 +390,306 @@ def parse_args():
         help="TCP and UDP ports used by the DNS server",
     )
 
+    parser.add_argument(
+        "--udp-batch",
+        type=int,
+        default=64,
+        help="Number of UDP datagrams to receive/send per recvmmsg/sendmmsg syscall "
+        "on Linux; 0 disables batching [default: 64]",
+    )
+
+    parser.add_argument(
+        "--udp-threads",
+        type=int,
+        default=1,
+        help="Number of threads serving UDP, each with its own socket bound using "
+        "SO_REUSEPORT; scales across cores on free-threaded Python builds "
+        "[default: 1]",
+    )
+
+    parser.add_argument(
+        "--unix-listener",
+        type=unix_listener,
+        action="append",
+        help="Also serve DNS over a unix stream socket, e.g., as target of Tor's "
+        "HiddenServicePort or an I2P server tunnel, given as LABEL=PATH; the label "
+        "identifies clients in logs and analytics; can be repeated",
+    )
+
+    parser.add_argument(
+        "--admission-workers",
+        type=int,
+        default=0,
+        help="Number of worker threads processing requests from a bounded queue "
+        "with load shedding [default: 0 (process requests inline)]",
+    )
+
+    parser.add_argument(
+        "--admission-queue-size",
+        type=int,
+        default=256,
+        help="Maximum number of queued requests before shedding [default: 256]",
+    )
+
+    parser.add_argument(
+        "--admission-deadline",
+        type=float,
+        default=0.5,
+        help="Shed requests queued for longer than this (in seconds) [default: 0.5]",
+    )
+
+    parser.add_argument(
+        "--shed-policy",
+        type=str,
+        choices=("drop", "truncate", "servfail"),
+        default="truncate",
+        help="How to answer shed requests: drop, empty truncated (TC) response, or "
+        "SERVFAIL [default: truncate]",
+    )
+
+    parser.add_argument(
+        "--capture",
+        type=Path,
+        default=None,
+        help="Record incoming queries to this file for replay using darkreplay "
+        "[default: None (don't record)]",
+    )
+
+    parser.add_argument(
+        "--capture-max-queries",
+        type=int,
+        default=0,
+        help="Stop recording after this many queries [default: 0 (no limit)]",
+    )
+
+    parser.add_argument(
+        "--dnssec-key-dir",
+        type=Path,
+        default=None,
+        help="Directory holding DNSSEC keys (ZONE.key.pem; generated if missing); "
+        "enables DNSSEC-signed responses [default: None (DNSSEC disabled)]",
+    )
+
+    parser.add_argument(
+        "--dnssec-pool-size",
+        type=int,
+        default=32,
+        help="Number of pre-signed responses per query name and type [default: 32]",
+    )
+
+    parser.add_argument(
+        "--handoff-socket",
+        type=Path,
+        default=None,
+        help="Unix socket for restarts without downtime: a new process started with "
+        "the same path loads its node pool, takes over the DNS sockets of the running "
+        "process and makes it exit [default: None (disabled)]",
+    )
+
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds to wait for open TCP connections to finish after handing off "
+        "sockets [default: 10.0]",
+    )
+
+    parser.add_argument(
+        "--takeover-timeout",
+        type=float,
+        default=300.0,
+        help="Maximum seconds to wait for the first node pool before serving on "
+        "sockets taken over or inherited from systemd [default: 300.0]",
+    )
+
     parser.add_argument(
         "--zone",
         type=str,
+        action="append",
         required=True,
-        help="Domain name for the DNS zone (e.g., dnsseed.acme.com.)",
+        help="Domain name for a DNS zone (e.g., dnsseed.acme.com.), optionally "
+        "restricted to networks via subdomains (e.g., onion.acme.com.:n4,n5,n6); "
+        "can be repeated to serve multiple zones",
+    )
+
+    parser.add_argument(
+        "--selection",
+        type=str,
+        choices=("uniform", "weighted", "cursor"),
+        default="uniform",
+        help="Node selection: uniformly at random, weighted by quality score, or "
+        "rotating through a shuffled pool to spread exposure evenly",
+    )
+
+    parser.add_argument(
+        "--netgroup-diversity",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Answer with at most one node per netgroup (/16 for IPv4, /32 for IPv6, "
+        "key prefix for darknets); netgroups are selected like nodes, weighted by "
+        "their nodes' total quality in weighted mode and rotated through in cursor "
+        "mode, so exposure is even per netgroup rather than per node "
+        "[default: disabled]",
+    )
+
+    parser.add_argument(
+        "--quality-latency-column",
+        type=str,
+        default="latency",
+        help="Crawler data column holding node latency (in seconds) for quality scores",
+    )
+
+    parser.add_argument(
+        "--quality-latency-scale",
+        type=float,
+        default=1.0,
+        help="Latency (in seconds) at which a node's latency factor drops to one half",
+    )
+
+    parser.add_argument(
+        "--quality-min-version",
+        type=int,
+        default=70016,
+        help="Protocol version below which a node's quality score is penalized",
+    )
+
+    parser.add_argument(
+        "--quality-appearance-exponent",
+        type=float,
+        default=0.0,
+        help="Scale quality scores by the fraction of the --snapshot-window snapshots "
+        "a node appeared in, raised to this power, to prefer stable nodes "
+        "[default: 0 (disabled)]",
+    )
+
+    parser.add_argument(
+        "--probe-interval",
+        type=int,
+        default=0,
+        help="Probe served nodes every this many seconds and prune unreachable "
+        "ones from the pool [default: 0 (don't probe)]",
+    )
+
+    parser.add_argument(
+        "--probe-mode",
+        type=str,
+        choices=("connect", "handshake"),
+        default="connect",
+        help="Probe nodes by opening a TCP connection or by additionally "
+        "exchanging version messages [default: connect]",
+    )
+
+    parser.add_argument(
+        "--probe-networks",
+        type=probe_networks,
+        default=frozenset({NetworkType.IPV4}),
+        help="Networks reachable from this host whose nodes are probed directly, as "
+        "subdomains (e.g., n1,n2,n6 for IPv4, IPv6 and CJDNS); nodes of networks "
+        "neither listed nor proxied are never pruned [default: n1]",
+    )
+
+    parser.add_argument(
+        "--probe-proxy",
+        type=probe_proxy,
+        action="append",
+        help="SOCKS5 proxy used to probe a network's nodes as [NETWORK=]HOST:PORT, "
+        "e.g., n4=localhost:9050 (Tor) or n5=localhost:4447 (i2pd); defaults to "
+        "onion without network; can be repeated [default: None]",
+    )
+
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=10.0,
+        help="Timeout (in seconds) for probing a single node [default: 10.0]",
+    )
+
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=256,
+        help="Maximum number of concurrent probes [default: 256]",
+    )
+
+    parser.add_argument(
+        "--probe-rate",
+        type=float,
+        default=100.0,
+        help="Maximum number of probes started per second [default: 100.0]",
+    )
+
+    parser.add_argument(
+        "--probe-max-failures",
+        type=int,
+        default=2,
+        help="Consecutive failed probes after which a node is pruned [default: 2]",
+    )
+
+    parser.add_argument(
+        "--probe-max-failure-ratio",
+        type=float,
+        default=0.5,
+        help="Don't prune a network's nodes in a probe round if more than this share "
+        "of its probes failed, e.g., due to a local outage [default: 0.5]",
+    )
+
+    parser.add_argument(
+        "--analytics-dir",
+        type=Path,
+        default=None,
+        help="Directory for per-window traffic analytics (unique clients, top "
+        "resolvers, query classes) as JSON [default: None (disabled)]",
+    )
+
+    parser.add_argument(
+        "--analytics-window",
+        type=int,
+        default=3600,
+        help="Duration (in seconds) of a traffic analytics window [default: 3600]",
+    )
+
+    parser.add_argument(
+        "--analytics-flush-interval",
+        type=int,
+        default=60,
+        help="Write current traffic analytics every this many seconds [default: 60]",
+    )
+
+    parser.add_argument(
+        "--gc-freeze",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Collect garbage once after each node pool update and freeze surviving "
+        "objects (gc.freeze), so later collections skip the pool [default: enabled]",
+    )
+
+    parser.add_argument(
+        "--gc-ingest-threshold",
+        type=int,
+        default=100_000,
+        help="Generation 0 GC threshold while ingesting crawler data [default: 100000]",
+    )
+
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()),
+        help="Directory for profiles (SIGUSR1) and tracemalloc snapshots (SIGUSR2)",
+    )
+
+    parser.add_argument(
+        "--profile-duration",
+        type=float,
+        default=30.0,
+        help="Duration (in seconds) of stack sampling triggered by SIGUSR1",
+    )
+
+    parser.add_argument(
+        "--tracemalloc",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Trace memory allocations from startup for SIGUSR2 snapshots "
+        "[default: start tracing on first SIGUSR2]",
     )
 
     parser.add_argument(
@@ -110,6 +698,15 @@ def parse_args():
         help="Set custom timestamp when daemon was started",
     )
     args = parser.parse_args()
+    if args.replicate_from and args.replication_listen:
+        parser.error("--replicate-from and --replication-listen are mutually exclusive")
+    proxied = {net for net, _ in args.probe_proxy or ()}
+    if args.probe_networks & {NetworkType.ONION_V3, NetworkType.I2P} - proxied:
+        parser.error("probing onion (n4) or I2P (n5) nodes requires --probe-proxy")
+    if args.replicate_from and args.push_socket:
+        parser.error("--replicate-from and --push-socket are mutually exclusive")
+    if args.quality_appearance_exponent < 0:
+        parser.error("--quality-appearance-exponent must not be negative")
 
     return args
 
@@ -1,10 +1,26 @@
 """Darkseed daemon that listens for DNS requests and commands."""
 
+import datetime
 import logging as log
 import time
 
-from darkseed.dns import DNSServer
+from darkseed.analytics import TrafficAnalytics
+from darkseed.dns import (
+    AdmissionController,
+    DNSHandler,
+    DNSServer,
+    ListenerSockets,
+    QueryCapture,
+    RoutingTable,
+    SocketHandoff,
+    TTLPolicy,
+)
+from darkseed.gc_control import GCController
+from darkseed.node import LivenessProber, QualityScorer, SnapshotWindow
 from darkseed.node_manager import NodeManager
+from darkseed.profiling import Profiler
+from darkseed.push import PushIngest
+from darkseed.replication import ReplicationPrimary, ReplicationSecondary
 
 from .config import get_config
 
@@ -21,11 +37,133 @@ def main():
     log.Formatter.converter = time.gmtime
     log.info("Using configuration: %s", conf)
 
-    node_manager = NodeManager(conf.crawler_path)
-    node_manager.start()
+    profiler = Profiler(
+        conf.profiling.output_dir,
+        duration=conf.profiling.duration,
+        trace_malloc=conf.profiling.trace_malloc,
+    )
+    profiler.install_signal_handlers()
+
+    gc_control = GCController(
+        freeze=conf.gc.freeze, ingest_threshold=conf.gc.ingest_threshold
+    )
+    gc_control.install()
 
-    dns_server = DNSServer(conf.dns.address, conf.dns.port, conf.dns.zone, node_manager)
+    scorer = QualityScorer(
+        latency_column=conf.selection.latency_column,
+        latency_scale=conf.selection.latency_scale,
+        min_version=conf.selection.min_version,
+        appearance_exponent=conf.selection.appearance_exponent,
+    )
+    window = SnapshotWindow(
+        max_snapshots=conf.snapshot_window,
+        max_age=(
+            datetime.timedelta(seconds=conf.snapshot_max_age)
+            if conf.snapshot_max_age
+            else None
+        ),
+        count_appearances=conf.selection.mode == "weighted"
+        and conf.selection.appearance_exponent > 0
+        and conf.snapshot_window > 1,
+    )
+    prober = None
+    if conf.probe.interval:
+        prober = LivenessProber(
+            mode=conf.probe.mode,
+            interval=conf.probe.interval,
+            networks=conf.probe.networks,
+            proxies=dict(conf.probe.proxies),
+            timeout=conf.probe.timeout,
+            concurrency=conf.probe.concurrency,
+            rate=conf.probe.rate,
+            max_failures=conf.probe.max_failures,
+            max_failure_ratio=conf.probe.max_failure_ratio,
+        )
+    node_manager = NodeManager(
+        conf.crawler_path,
+        selection=conf.selection.mode,
+        netgroup_diversity=conf.selection.netgroup_diversity,
+        scorer=scorer,
+        window=window,
+        prober=prober,
+        gc_control=gc_control,
+    )
+    if conf.replicate_from:
+        # secondaries neither read crawler data nor probe nodes
+        ReplicationSecondary(node_manager, conf.replicate_from).start()
+    else:
+        if conf.replication_listen:
+            ReplicationPrimary(node_manager, conf.replication_listen).start()
+        if conf.push_socket:
+            PushIngest(node_manager, conf.push_socket, conf.push_interval).start()
+        node_manager.start()
+
+    admission = None
+    if conf.dns.admission_workers:
+        admission = AdmissionController(
+            DNSHandler.process,
+            workers=conf.dns.admission_workers,
+            queue_size=conf.dns.admission_queue_size,
+            deadline=conf.dns.admission_deadline,
+            policy=conf.dns.shed_policy,
+        )
+    capture = None
+    if conf.dns.capture:
+        capture = QueryCapture(
+            conf.dns.capture, max_queries=conf.dns.capture_max_queries
+        )
+    analytics = None
+    if conf.analytics.output_dir:
+        analytics = TrafficAnalytics(
+            conf.analytics.output_dir,
+            window=conf.analytics.window,
+            flush_interval=conf.analytics.flush_interval,
+            known_subdomains=RoutingTable.subdomains(),
+        )
+    ttl_policy = TTLPolicy(
+        default=conf.ttl.default,
+        overrides=dict(conf.ttl.classes),
+        adaptive=conf.ttl.adaptive,
+        max_ttl=conf.ttl.max_ttl,
+        interval=node_manager.refresh,
+    )
+    sockets = ListenerSockets.from_systemd()
+    handoff = None
+    if conf.dns.handoff_socket:
+        handoff = SocketHandoff(
+            conf.dns.handoff_socket, drain_timeout=conf.dns.drain_timeout
+        )
+    predecessor = handoff is not None and handoff.connect()
+    if sockets or predecessor:
+        # queries are queued (or answered by the predecessor) while loading
+        log.info("Loading node pool before serving")
+        if not node_manager.wait_for_pool(conf.dns.takeover_timeout):
+            log.warning(
+                "No node pool after %.0fs; serving anyway", conf.dns.takeover_timeout
+            )
+    received = handoff.receive() if handoff and predecessor else None
+    dns_server = DNSServer(
+        conf.dns.address,
+        conf.dns.port,
+        conf.dns.zones,
+        node_manager,
+        udp_batch=conf.dns.udp_batch,
+        udp_threads=conf.dns.udp_threads,
+        unix_listeners=conf.dns.unix_listeners,
+        admission=admission,
+        capture=capture,
+        dnssec_key_dir=conf.dns.dnssec_key_dir,
+        dnssec_pool_size=conf.dns.dnssec_pool_size,
+        analytics=analytics,
+        ttl_policy=ttl_policy,
+        sockets=received or sockets,
+    )
     dns_server.start()
+    if handoff:
+        dns_server.join()  # servers have started
+        if received:
+            handoff.confirm()
+        handoff.listen(dns_server.get_listener_sockets, dns_server.stop)
 
 
 if __name__ == "__main__":
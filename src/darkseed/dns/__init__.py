@@ -1,12 +1,73 @@
-"""Module for DNS-related functionality."""
+"""Module for DNS-related functionality.
 
-from .aaaa_codec import AAAACodec
-from .regular_records import RegularRecords
-from .server import DNSConstants, DNSServer
+Submodules are imported lazily on first access, so that clients only using,
+e.g., AAAACodec do not load the server stack.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .aaaa_codec import AAAACodec
+    from .admission import AdmissionController
+    from .capture import CapturedQuery, QueryCapture
+    from .constants import DNSConstants
+    from .dnssec import PresignedResponder, ZoneKey
+    from .handoff import ListenerSockets, SocketHandoff
+    from .regular_records import RegularRecords
+    from .routing import Route, RoutingTable, Zone
+    from .server import DNSHandler, DNSServer
+    from .ttl import TTLPolicy
+
+_SUBMODULES = {
+    "AAAACodec": "aaaa_codec",
+    "AdmissionController": "admission",
+    "CapturedQuery": "capture",
+    "DNSConstants": "constants",
+    "DNSHandler": "server",
+    "DNSServer": "server",
+    "ListenerSockets": "handoff",
+    "PresignedResponder": "dnssec",
+    "QueryCapture": "capture",
+    "RegularRecords": "regular_records",
+    "Route": "routing",
+    "RoutingTable": "routing",
+    "SocketHandoff": "handoff",
+    "TTLPolicy": "ttl",
+    "Zone": "routing",
+    "ZoneKey": "dnssec",
+}
 
 __all__ = [
     "AAAACodec",
+    "AdmissionController",
+    "CapturedQuery",
     "DNSConstants",
+    "DNSHandler",
     "DNSServer",
+    "ListenerSockets",
+    "PresignedResponder",
+    "QueryCapture",
     "RegularRecords",
+    "Route",
+    "RoutingTable",
+    "SocketHandoff",
+    "TTLPolicy",
+    "Zone",
+    "ZoneKey",
 ]
+
+
+def __getattr__(name: str):
+    """Import submodule defining name on first access."""
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_SUBMODULES[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List module attributes, including those not imported yet."""
+    return sorted(set(globals()) | set(__all__))
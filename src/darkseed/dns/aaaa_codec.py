@@ -3,7 +3,6 @@
 import io
 import ipaddress
 import logging as log
-import random
 from dataclasses import dataclass
 from typing import ClassVar, List, Literal
 
@@ -14,6 +13,7 @@ from dns.rdatatype import AAAA as AAAA_TYPE
 from dns.rdtypes.IN.AAAA import AAAA
 
 from darkseed.address import Address, BIP155Like
+from darkseed.rng import thread_rng
 
 
 @dataclass
@@ -111,7 +111,6 @@ class AAAACodec:
             # pfx_bit = BitArray(bytes=AAAACodec.PREFIX.network_address.packed)[:AAAACodec.PREFIX.prefixlen]
             # ip = pfx + pos_bit + payload_bits
             ip = str(ipaddress.IPv6Address(pfx + pos.to_bytes(1, "big") + payload))
-            print(AAAACodec.PREFIX)
             log.debug("Encoding payload %s into address %s", payload, ip)
             rdata = AAAA(IN, AAAA_TYPE, ip)
             record = dns.rrset.from_rdata(domain, ttl, rdata)
@@ -124,5 +123,5 @@ class AAAACodec:
             len(addresses),
             len(records),
         )
-        random.shuffle(records)
+        thread_rng().shuffle(records)
         return records
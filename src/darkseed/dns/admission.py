@@ -0,0 +1,177 @@
+"""Module for admission control and load shedding of DNS requests."""
+
+import logging as log
+import queue
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar
+
+from darkseed.rng import thread_rng
+
+from .wire import WireHeader
+
+# called with the response, or with empty bytes if the request is ignored
+Reply = Callable[[bytes], None]
+
+
+@dataclass
+class WorkItem:
+    """DNS request waiting to be processed."""
+
+    data: bytes
+    peer_info: str
+    protocol: str
+    reply: Reply
+    received: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class AdmissionController:
+    """Class placing a bounded work queue between socket readers and DNSHandler.
+
+    Socket readers submit requests, which are processed by a fixed pool of
+    worker threads. A request is shed if the queue is full when it arrives or
+    if it waited longer than the deadline before a worker picked it up.
+    Shed requests are handled according to the policy:
+
+    - drop: ignore the request silently
+    - truncate: answer with an empty, truncated (TC) response, prompting the
+      client to retry over TCP; falls back to servfail for TCP requests
+    - servfail: answer with an empty SERVFAIL response
+
+    Shed responses are built by patching the request's header and question,
+    without parsing the request or touching the node pool, so shedding stays
+    cheap under overload. Counters and latency percentiles of admitted
+    requests are logged periodically.
+    """
+
+    process: Callable[[bytes, str, str], bytes]  # data, peer info, protocol
+    workers: int = 4
+    queue_size: int = 256
+    deadline: float = 0.5  # seconds
+    policy: str = "truncate"
+    _queue: queue.Queue = field(init=False)
+    _counters: Counter = field(default_factory=Counter)
+    _latencies: list[float] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _stats_start: float = field(default_factory=time.monotonic)
+    POLICIES: ClassVar[tuple[str, ...]] = ("drop", "truncate", "servfail")
+    STATS_INTERVAL: ClassVar[int] = 60  # seconds
+    LATENCY_SAMPLES: ClassVar[int] = 10000  # per stats interval
+
+    def __post_init__(self):
+        if self.policy not in self.POLICIES:
+            raise ValueError(f"Unsupported shedding policy: {self.policy}")
+        self._queue = queue.Queue(maxsize=self.queue_size)
+
+    def start(self):
+        """Start worker threads."""
+        for i in range(self.workers):
+            threading.Thread(
+                target=self.work, name=f"DNSWorker-{i}", daemon=True
+            ).start()
+        log.info(
+            "Started admission control (workers=%d, queue_size=%d, deadline=%.3fs, policy=%s)",
+            self.workers,
+            self.queue_size,
+            self.deadline,
+            self.policy,
+        )
+
+    def submit(self, data: bytes, peer_info: str, protocol: str, reply: Reply):
+        """Queue request for processing or shed it if the queue is full."""
+        item = WorkItem(data, peer_info, protocol, reply)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.shed(item, "queue_full")
+            return
+        with self._lock:
+            self._counters["admitted"] += 1
+
+    def shed(self, item: WorkItem, reason: str):
+        """Shed request according to policy."""
+        policy = self.policy
+        if policy == "truncate" and item.protocol != "UDP":
+            policy = "servfail"
+        with self._lock:
+            self._counters[f"shed_{reason}"] += 1
+            self._counters[f"shed_{policy}"] += 1
+        log.debug("Shedding request (from=%s, reason=%s)", item.peer_info, reason)
+        response = bytes()
+        if policy != "drop":
+            try:
+                header = WireHeader.from_wire(item.data)
+                response = header.empty_response(
+                    item.data,
+                    truncated=policy == "truncate",
+                    servfail=policy == "servfail",
+                )
+            except ValueError:
+                pass
+        self.reply(item, response)
+
+    @staticmethod
+    def reply(item: WorkItem, response: bytes):
+        """Pass response to reply callback, which may fail if the client is gone."""
+        try:
+            item.reply(response)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to reply to %s", item.peer_info)
+
+    def work(self):
+        """Process queued requests until the process exits."""
+        while True:
+            item = self._queue.get()
+            waited = time.monotonic() - item.received
+            if waited > self.deadline:
+                self.shed(item, "deadline")
+                continue
+            try:
+                response = self.process(item.data, item.peer_info, item.protocol)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to process request from %s", item.peer_info)
+                response = bytes()
+            self.reply(item, response)
+            self.record(time.monotonic() - item.received)
+
+    def record(self, latency: float):
+        """Record latency of completed request; log stats periodically."""
+        with self._lock:
+            self._counters["completed"] += 1
+            if len(self._latencies) < self.LATENCY_SAMPLES:
+                self._latencies.append(latency)
+            else:
+                # reservoir sampling keeps percentiles unbiased
+                i = thread_rng().randrange(self._counters["completed"])
+                if i < self.LATENCY_SAMPLES:
+                    self._latencies[i] = latency
+            if time.monotonic() - self._stats_start < self.STATS_INTERVAL:
+                return
+            stats = self.stats()
+            self._counters.clear()
+            self._latencies = []
+            self._stats_start = time.monotonic()
+        log.info("Admission stats: %s", self.format_stats(stats))
+
+    @staticmethod
+    def format_stats(stats: dict[str, int | float]) -> str:
+        """Format stats for logging."""
+        return ", ".join(
+            f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in stats.items()
+        )
+
+    def stats(self) -> dict[str, int | float]:
+        """Get counters and latency percentiles (in seconds) of the current interval."""
+        stats: dict[str, int | float] = dict(self._counters)
+        stats["queued"] = self._queue.qsize()
+        latencies = sorted(self._latencies)
+        if latencies:
+            stats["p50"] = latencies[len(latencies) // 2]
+            stats["p99"] = latencies[
+                min(len(latencies) - 1, len(latencies) * 99 // 100)
+            ]
+        return stats
@@ -0,0 +1,15 @@
+"""Module for DNS protocol constants."""
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+
+@dataclass
+class DNSConstants:
+    """DNS protocol constants."""
+
+    UDP_SIZE_LIMIT: ClassVar[int] = 512
+    EDNS_SIZE_LIMIT: ClassVar[int] = 1232  # avoids IP fragmentation (DNS flag day 2020)
+    TCP_SIZE_LIMIT: ClassVar[int] = 65535
+    TCP_IDLE_TIMEOUT: ClassVar[float] = 10.0
+    UDP_RECV_SIZE: ClassVar[int] = 8192  # same as socketserver.UDPServer
@@ -0,0 +1,382 @@
+"""Module for serving DNSSEC-signed responses from pre-signed RRset pools."""
+
+import logging as log
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, ClassVar
+
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+
+from darkseed.rng import thread_rng
+
+from .constants import DNSConstants
+from .routing import Route, RoutingTable, Zone
+from .wire import WireHeader
+
+# adds answer records for the route's network counts to a response
+Fill = Callable[[dns.message.Message, Route], None]
+
+
+@dataclass
+class ZoneKey:
+    """DNSSEC key of a zone, used as combined key and zone signing key.
+
+    Keys are ECDSA P-256 keys (algorithm 13) stored as unencrypted PKCS#8 PEM
+    files named after the zone. Missing keys are generated; the DS record to
+    publish in the parent zone is logged on load.
+    """
+
+    zone: dns.name.Name
+    private_key: Any
+    dnskey: dns.rdata.Rdata
+
+    # dns.dnssec imports cryptography, so it is only imported if DNSSEC is used
+    ALGORITHM: ClassVar[int] = 13  # ECDSAP256SHA256
+    FLAGS: ClassVar[int] = 0x0101  # ZONE | SEP
+
+    @classmethod
+    def load_or_create(cls, zone: Zone, key_dir: Path) -> "ZoneKey":
+        """Load zone key from key directory, generating it if missing."""
+        # pylint: disable=import-outside-toplevel
+        try:
+            import dns.dnssec
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import ec
+        except ImportError as e:
+            raise ImportError(
+                "DNSSEC requires the cryptography package (e.g., dnspython[dnssec])"
+            ) from e
+
+        path = key_dir / f"{zone.name}key.pem"
+        if path.exists():
+            private_key = serialization.load_pem_private_key(
+                path.read_bytes(), password=None
+            )
+        else:
+            private_key = ec.generate_private_key(ec.SECP256R1())
+            path.touch(mode=0o600)
+            path.write_bytes(
+                private_key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+            log.info("Generated DNSSEC key for zone %s: %s", zone.name, path)
+        name = dns.name.from_text(zone.name)
+        dnskey = dns.dnssec.make_dnskey(
+            private_key.public_key(), cls.ALGORITHM, flags=cls.FLAGS
+        )
+        log.info(
+            "Using DNSSEC key for zone %s (DS: %s)",
+            zone.name,
+            dns.dnssec.make_ds(name, dnskey, "SHA256"),
+        )
+        return cls(name, private_key, dnskey)
+
+
+@dataclass
+class Template:
+    """Pre-rendered response to a query with a lowercase question."""
+
+    wire: bytes
+    question_end: int  # offset of the first byte after the question
+
+
+@dataclass
+class PresignedResponder:
+    """Class answering DNSSEC-enabled queries from pools of pre-signed responses.
+
+    Signing randomly composed answers online is too slow, so for each query
+    class (qname, qtype) in the routing table, a pool of randomized answers
+    is composed from the node pool, signed, and rendered to wire format in
+    the background. Pools are rebuilt after every node pool update and
+    before signatures expire. Queries with the DO bit set are answered by
+    splicing the request's ID, flags and question into a pooled response
+    picked at random, so answering costs about as much as the
+    unsigned path.
+
+    Zone data besides the node records is static and signed along with the
+    pools: the DNSKEY and a synthesized SOA record at the zone apex, and an
+    NSEC chain over the names served by the zone, which proves nonexistence
+    of names (NXDOMAIN) and types (NODATA) to validating resolvers.
+    """
+
+    routing_table: RoutingTable
+    keys: dict[str, ZoneKey]
+    fill: Fill
+    pool_size: int = 32
+    ttl: int = 60
+    validity: timedelta = timedelta(days=7)
+    _templates: dict[tuple[str, int], list[Template]] = field(default_factory=dict)
+    _static: dict[tuple[str, int], list[dns.rrset.RRset]] = field(default_factory=dict)
+    _nsecs: dict[str, list[dns.rrset.RRset]] = field(default_factory=dict)
+    _rebuild: threading.Event = field(default_factory=threading.Event)
+
+    SIGNED_TYPES: ClassVar[tuple[int, ...]] = (dns.rdatatype.A, dns.rdatatype.AAAA)
+    CLOCK_SKEW: ClassVar[timedelta] = timedelta(hours=1)
+
+    def start(self):
+        """Sign pools in a background thread once invalidated."""
+        threading.Thread(target=self.run, name="DNSSECSigner", daemon=True).start()
+
+    def invalidate(self):
+        """Trigger rebuilding pools, e.g., after the node pool was updated."""
+        self._rebuild.set()
+
+    def run(self):
+        """Rebuild pools when invalidated or before signatures expire."""
+        while True:
+            self._rebuild.wait(timeout=self.validity.total_seconds() / 4)
+            self._rebuild.clear()
+            try:
+                self.build()
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to build pre-signed response pools")
+
+    def sign(self, rrset: dns.rrset.RRset, zone: str) -> dns.rrset.RRset:
+        """Create RRSIG RRset for rrset."""
+        import dns.dnssec  # pylint: disable=import-outside-toplevel
+
+        key = self.keys[zone]
+        now = datetime.now(timezone.utc)
+        rrsig = dns.dnssec.sign(
+            rrset,
+            key.private_key,
+            key.zone,
+            key.dnskey,
+            inception=now - self.CLOCK_SKEW,
+            expiration=now + self.validity,
+        )
+        return dns.rrset.from_rdata(rrset.name, rrset.ttl, rrsig)
+
+    def build(self):
+        """Build static records and pools of pre-signed responses."""
+        start = time.perf_counter()
+        signatures = 0
+        static, nsecs = self.build_static()
+        signatures += sum(len(rrsets) // 2 for rrsets in static.values())
+        signatures += sum(len(rrsets) // 2 for rrsets in nsecs.values())
+
+        templates = {}
+        for (qname, qtype), route in self.routing_table.routes.items():
+            pool = []
+            for _ in range(self.pool_size):
+                template, signed = self.build_template(qname, qtype, route)
+                pool.append(template)
+                signatures += signed
+            templates[(qname, qtype)] = pool
+        duration = time.perf_counter() - start
+
+        # swap complete dicts, so that readers never see partial pools
+        self._static, self._nsecs = static, nsecs
+        self._templates = templates
+        log.info(
+            "Built pre-signed response pools: classes=%d, pool_size=%d, "
+            "signatures=%d, time=%.3fs (%.0f responses/s)",
+            len(templates),
+            self.pool_size,
+            signatures,
+            duration,
+            len(templates) * self.pool_size / duration,
+        )
+
+    def build_template(
+        self, qname: str, qtype: int, route: Route
+    ) -> tuple[Template, int]:
+        """Compose, sign and render one randomized response; return number of signatures."""
+        query = dns.message.make_query(
+            qname,
+            qtype,
+            use_edns=0,
+            want_dnssec=True,
+            payload=DNSConstants.EDNS_SIZE_LIMIT,
+        )
+        response = dns.message.make_response(
+            query, our_payload=DNSConstants.EDNS_SIZE_LIMIT
+        )
+        response.flags |= dns.flags.AA
+        self.fill(response, route)
+
+        # records are added one RRset per record; sign each type as one RRset
+        rrsets = {}
+        for record in response.answer:
+            rrset = rrsets.setdefault(
+                record.rdtype,
+                dns.rrset.RRset(record.name, record.rdclass, record.rdtype),
+            )
+            rrset.update(record)
+            rrset.update_ttl(record.ttl)
+        response.answer = []
+        for rrset in rrsets.values():
+            response.answer += [rrset, self.sign(rrset, route.zone.name)]
+
+        wire = response.to_wire(max_size=DNSConstants.EDNS_SIZE_LIMIT)
+        question_end = WireHeader.question_end(wire)
+        return Template(wire, question_end), len(rrsets)
+
+    def build_static(
+        self,
+    ) -> tuple[
+        dict[tuple[str, int], list[dns.rrset.RRset]], dict[str, list[dns.rrset.RRset]]
+    ]:
+        """Build signed DNSKEY, SOA and NSEC RRsets for all zones."""
+        static = {}
+        nsecs = {}
+        names: dict[str, dict[str, set[int]]] = {name: {} for name in self.keys}
+        for qname, qtype in self.routing_table.routes:
+            zone = self.routing_table.get_zone(qname)
+            assert zone
+            types = names[zone.name].setdefault(qname, set())
+            if qtype in self.SIGNED_TYPES:
+                types.add(qtype)
+
+        for zone, zone_names in names.items():
+            apex = zone_names.setdefault(zone, set())
+            apex.update((dns.rdatatype.SOA, dns.rdatatype.DNSKEY))
+
+            dnskey = dns.rrset.from_rdata(zone, self.ttl, self.keys[zone].dnskey)
+            soa = dns.rrset.from_text(
+                zone,
+                self.ttl,
+                dns.rdataclass.IN,
+                dns.rdatatype.SOA,
+                f"{zone} hostmaster.{zone} {int(time.time())} 3600 600 86400 {self.ttl}",
+            )
+            for rrset in (dnskey, soa):
+                static[(zone, rrset.rdtype)] = [rrset, self.sign(rrset, zone)]
+
+            # NSEC chain in canonical order, wrapping around to the apex
+            ordered = sorted(zone_names, key=dns.name.from_text)
+            chain = []
+            for name, next_name in zip(ordered, ordered[1:] + ordered[:1]):
+                types = sorted(
+                    zone_names[name] | {dns.rdatatype.RRSIG, dns.rdatatype.NSEC}
+                )
+                nsec = dns.rrset.from_text(
+                    name,
+                    self.ttl,
+                    dns.rdataclass.IN,
+                    dns.rdatatype.NSEC,
+                    f"{next_name} " + " ".join(dns.rdatatype.to_text(t) for t in types),
+                )
+                chain += [nsec, self.sign(nsec, zone)]
+            nsecs[zone] = chain
+        return static, nsecs
+
+    def respond(
+        self, data: bytes, request: dns.message.Message, route: Route, limit: int
+    ) -> bytes | None:
+        """Answer request from pre-signed data; return None if not applicable.
+
+        Applies to queries with the DO bit set, and to DNSKEY and SOA queries
+        for the zone apex, which are answered without signatures otherwise.
+        Limit is the maximum response size for the request's transport (see
+        DNSHandler.size_limit).
+        """
+        if not self._templates:
+            return None
+        question = request.question[0]
+        qname = question.name.to_text(omit_final_dot=False).lower()
+        dnssec_ok = bool(request.ednsflags & dns.flags.DO)
+
+        static = self._static.get((qname, question.rdtype))
+        if static:
+            return self.respond_static(request, static, dnssec_ok)
+        if not dnssec_ok:
+            return None
+        pool = self._templates.get((qname, question.rdtype))
+        if pool:
+            template = pool[thread_rng().randrange(len(pool))]
+            return self.splice(data, template, limit)
+        if question.rdtype in (dns.rdatatype.A, dns.rdatatype.AAAA, dns.rdatatype.ANY):
+            return self.respond_negative(request, route.zone.name, qname)
+        return None
+
+    @staticmethod
+    def splice(data: bytes, template: Template, limit: int) -> bytes:
+        """Combine request ID, RD flag and question with pooled response.
+
+        The template's question has the same length as the request's (names
+        only differ in case), so compression pointers remain valid. Responses
+        exceeding limit are truncated (TC), which only happens over UDP.
+        """
+        header = WireHeader.from_wire(data)
+        flags = int.from_bytes(template.wire[2:4], "big") | (
+            header.flags & WireHeader.RD
+        )
+        question_end = WireHeader.question_end(data)
+        if question_end != template.question_end:
+            raise ValueError("Question does not match template")
+        size = len(template.wire)
+        if size > limit:
+            # client cannot receive the signed response; let it retry via TCP
+            return header.empty_response(data, truncated=True)
+        return (
+            struct.pack("!HH", header.id, flags)
+            + template.wire[4 : WireHeader.SIZE]
+            + data[WireHeader.SIZE : question_end]
+            + template.wire[question_end:]
+        )
+
+    def make_response(
+        self, request: dns.message.Message, dnssec_ok: bool
+    ) -> dns.message.Message:
+        """Create authoritative response, with EDNS if DNSSEC is requested."""
+        response = dns.message.make_response(request)
+        response.flags |= dns.flags.AA
+        if dnssec_ok:
+            response.use_edns(0, dns.flags.DO, payload=DNSConstants.EDNS_SIZE_LIMIT)
+        else:
+            response.use_edns(False)
+        return response
+
+    def respond_static(
+        self,
+        request: dns.message.Message,
+        rrsets: list[dns.rrset.RRset],
+        dnssec_ok: bool,
+    ) -> bytes:
+        """Answer DNSKEY or SOA query; rrsets holds the RRset and its RRSIG."""
+        response = self.make_response(request, dnssec_ok)
+        response.answer = list(rrsets) if dnssec_ok else rrsets[:1]
+        return response.to_wire()
+
+    def respond_negative(
+        self, request: dns.message.Message, zone: str, qname: str
+    ) -> bytes:
+        """Answer query for a nonexistent name or type with NSEC proof.
+
+        The SOA record in the authority section allows negative caching.
+        """
+        response = self.make_response(request, True)
+        chain = self._nsecs[zone]
+        owners = [chain[i].name for i in range(0, len(chain), 2)]
+        name = dns.name.from_text(qname)
+        proof = []
+        if name in owners:
+            # NODATA: the name exists, its NSEC record lists the existing types
+            i = owners.index(name)
+            proof += chain[2 * i : 2 * i + 2]
+        else:
+            # NXDOMAIN: NSEC records covering the name and the wildcard; owners
+            # are in canonical order, so the covering one precedes the name
+            response.set_rcode(dns.rcode.NXDOMAIN)
+            wildcard = dns.name.from_text(f"*.{zone}")
+            for target in (name, wildcard):
+                i = max(j for j, owner in enumerate(owners) if owner < target)
+                if chain[2 * i] not in proof:
+                    proof += chain[2 * i : 2 * i + 2]
+        response.authority = self._static[(zone, dns.rdatatype.SOA)] + proof
+        return response.to_wire()
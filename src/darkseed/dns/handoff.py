@@ -0,0 +1,196 @@
+"""Module for inheriting listening sockets across restarts without downtime."""
+
+import logging as log
+import os
+import socket
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, ClassVar
+
+
+@dataclass
+class ListenerSockets:
+    """Bound TCP and UDP sockets of the DNS server, e.g., inherited on startup."""
+
+    tcp: socket.socket | None = None
+    udp: list[socket.socket] = field(default_factory=list)
+    SD_LISTEN_FDS_START: ClassVar[int] = 3  # first fd passed by systemd
+
+    def kinds(self) -> list[str]:
+        """Get kind (TCP or UDP) of each socket, in the order of fds()."""
+        return ["TCP"] * (self.tcp is not None) + ["UDP"] * len(self.udp)
+
+    def fds(self) -> list[int]:
+        """Get file descriptors of all sockets."""
+        return [s.fileno() for s in ([self.tcp] if self.tcp else []) + self.udp]
+
+    def add(self, sock: socket.socket, kind: str):
+        """Add socket of given kind; ignore unsupported kinds."""
+        if kind == "TCP" and self.tcp is None:
+            self.tcp = sock
+        elif kind == "UDP":
+            self.udp.append(sock)
+        else:
+            log.warning("Ignoring inherited socket %s", sock)
+            sock.close()
+
+    @classmethod
+    def from_fds(cls, fds: list[int], kinds: list[str] | None = None):
+        """Wrap file descriptors; kinds are derived from the socket types if None."""
+        sockets = cls()
+        for i, fd in enumerate(fds):
+            sock = socket.socket(fileno=fd)
+            if kinds is not None:
+                kind = kinds[i]
+            elif sock.family in (socket.AF_INET, socket.AF_INET6):
+                kind = "TCP" if sock.type == socket.SOCK_STREAM else "UDP"
+            else:
+                kind = ""
+            sockets.add(sock, kind)
+        return sockets
+
+    @classmethod
+    def from_systemd(cls) -> "ListenerSockets | None":
+        """Get sockets passed by systemd socket activation, or None if not activated.
+
+        The environment variables are removed, so child processes do not
+        consider the sockets theirs.
+        """
+        if os.environ.get("LISTEN_PID") != str(os.getpid()):
+            return None
+        count = int(os.environ.get("LISTEN_FDS", "0"))
+        for name in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+            os.environ.pop(name, None)
+        if not count:
+            return None
+        start = cls.SD_LISTEN_FDS_START
+        sockets = cls.from_fds(list(range(start, start + count)))
+        log.info("Inherited sockets from systemd: %s", ", ".join(sockets.kinds()))
+        return sockets
+
+
+@dataclass
+class SocketHandoff:
+    """Class passing the DNS server's sockets from a running process to its successor.
+
+    The running process listens on a unix socket. A successor connects,
+    loads its node pool, and then requests the sockets, which are passed as
+    file descriptors (SCM_RIGHTS). Once the successor serves on them and
+    confirms, the running process stops receiving queries, waits up to
+    drain_timeout seconds for open TCP connections to finish, and exits.
+    As both processes share the same sockets, no query is lost.
+    """
+
+    path: Path
+    drain_timeout: float = 10.0
+    _sock: socket.socket | None = field(default=None, repr=False)
+    REQUEST: ClassVar[bytes] = b"HANDOFF"
+    READY: ClassVar[bytes] = b"READY"
+    MAX_FDS: ClassVar[int] = 256
+    TIMEOUT: ClassVar[float] = 10.0  # seconds to wait for the other process
+
+    def connect(self) -> bool:
+        """Connect to running process; return False if there is none."""
+        # pylint: disable-next=consider-using-with
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(self.path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            return False
+        sock.settimeout(self.TIMEOUT)
+        self._sock = sock
+        log.info("Found running process on %s; taking over its sockets", self.path)
+        return True
+
+    def receive(self) -> ListenerSockets | None:
+        """Request sockets from running process; return None on failure."""
+        assert self._sock, "Not connected"
+        try:
+            self._sock.sendall(self.REQUEST)
+            msg, fds, _, _ = socket.recv_fds(self._sock, 1024, self.MAX_FDS)
+        except OSError as e:
+            log.warning("Socket handoff failed: %r", e)
+            return None
+        kinds = msg.decode().split()
+        if not fds or len(kinds) != len(fds):
+            log.warning("Socket handoff failed: received %d fd(s)", len(fds))
+            for fd in fds:
+                os.close(fd)
+            return None
+        sockets = ListenerSockets.from_fds(fds, kinds)
+        log.info("Received sockets from running process: %s", " ".join(kinds))
+        return sockets
+
+    def confirm(self):
+        """Tell running process that its sockets are served, so that it exits."""
+        assert self._sock, "Not connected"
+        with self._sock:
+            try:
+                self._sock.sendall(self.READY)
+            except OSError as e:
+                log.warning("Failed to confirm socket handoff: %r", e)
+        self._sock = None
+
+    def listen(
+        self,
+        get_sockets: Callable[[], ListenerSockets],
+        stop: Callable[[float], None],
+    ):
+        """Hand off sockets to successors in a background thread.
+
+        After a successor confirmed the handoff, calls stop with the drain
+        timeout, which should stop serving and drain connections, and exits.
+        """
+        # remove socket left by previous process
+        if self.path.is_socket():
+            self.path.unlink()
+        # pylint: disable-next=consider-using-with
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.path))
+        server.listen()
+        threading.Thread(
+            target=self.serve,
+            args=(server, get_sockets, stop),
+            name="SocketHandoff",
+            daemon=True,
+        ).start()
+        log.info("Handing off sockets to successors on %s", self.path)
+
+    def serve(
+        self,
+        server: socket.socket,
+        get_sockets: Callable[[], ListenerSockets],
+        stop: Callable[[float], None],
+    ):
+        """Pass sockets to successors until one confirms, then stop and exit."""
+        while True:
+            sock, _ = server.accept()
+            with sock:
+                sock.settimeout(None)  # successors may take long to load their pool
+                try:
+                    if sock.recv(len(self.REQUEST)) != self.REQUEST:
+                        continue
+                    sockets = get_sockets()
+                    log.info(
+                        "Passing sockets to successor: %s", " ".join(sockets.kinds())
+                    )
+                    socket.send_fds(
+                        sock, [" ".join(sockets.kinds()).encode()], sockets.fds()
+                    )
+                    sock.settimeout(self.TIMEOUT)
+                    if sock.recv(len(self.READY)) != self.READY:
+                        log.warning("Successor failed to take over; still serving")
+                        continue
+                except OSError as e:
+                    log.warning("Socket handoff failed: %r; still serving", e)
+                    continue
+            server.close()
+            log.info(
+                "Successor took over; draining (timeout=%.0fs)", self.drain_timeout
+            )
+            stop(self.drain_timeout)
+            log.info("Exiting after socket handoff")
+            log.shutdown()
+            os._exit(0)  # pylint: disable=protected-access
@@ -0,0 +1,189 @@
+"""Batched UDP receive/send using Linux's recvmmsg/sendmmsg syscalls via ctypes."""
+
+import ctypes
+import ctypes.util
+import errno
+import logging as log
+import socket
+import sys
+from typing import ClassVar
+
+MSG_WAITFORONE = 0x10000
+
+
+class IOVec(ctypes.Structure):
+    """struct iovec"""
+
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):
+    """struct msghdr"""
+
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class MMsgHdr(ctypes.Structure):
+    """struct mmsghdr"""
+
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_libc():
+    """Load libc if it provides recvmmsg/sendmmsg, else return None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.recvmmsg.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(MMsgHdr),
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_void_p,
+        ]
+        libc.sendmmsg.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(MMsgHdr),
+            ctypes.c_uint,
+            ctypes.c_int,
+        ]
+    except (OSError, AttributeError) as e:
+        log.debug("recvmmsg/sendmmsg unavailable: %s", e)
+        return None
+    return libc
+
+
+_LIBC = _load_libc()
+
+
+class MMsgSocket:
+    """Class for receiving and sending UDP datagrams in batches.
+
+    All buffers (payloads, peer addresses, iovecs and message headers) are
+    allocated once and reused for every batch. Replies are sent to the peer
+    address buffers filled in by the preceding receive, so addresses never
+    need to be converted back into sockaddr structures.
+    """
+
+    SOCKADDR_SIZE: ClassVar[int] = 128  # sizeof(struct sockaddr_storage)
+
+    def __init__(
+        self, sock: socket.socket, batch_size: int, recv_size: int, send_size: int
+    ):
+        if not _LIBC:
+            raise OSError("recvmmsg/sendmmsg are not supported on this platform")
+        self.sock = sock
+        self.batch_size = batch_size
+        self.send_size = send_size
+        self._recv_bufs = (ctypes.c_char * recv_size * batch_size)()
+        self._send_bufs = (ctypes.c_char * send_size * batch_size)()
+        self._names = (ctypes.c_char * self.SOCKADDR_SIZE * batch_size)()
+        self._recv_iovs = (IOVec * batch_size)()
+        self._send_iovs = (IOVec * batch_size)()
+        self._recv_msgs = (MMsgHdr * batch_size)()
+        self._send_msgs = (MMsgHdr * batch_size)()
+        for i in range(batch_size):
+            self._recv_iovs[i].iov_base = ctypes.addressof(self._recv_bufs[i])
+            self._recv_iovs[i].iov_len = recv_size
+            self._send_iovs[i].iov_base = ctypes.addressof(self._send_bufs[i])
+            hdr = self._recv_msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._recv_iovs[i])
+            hdr.msg_iovlen = 1
+            hdr.msg_name = ctypes.addressof(self._names[i])
+            hdr = self._send_msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._send_iovs[i])
+            hdr.msg_iovlen = 1
+
+    @staticmethod
+    def supported() -> bool:
+        """Check whether batched syscalls are available."""
+        return _LIBC is not None
+
+    def _peer_address(self, i: int) -> tuple[str, int]:
+        """Convert i-th peer address buffer to (address, port)."""
+        raw = bytes(self._names[i][:28])
+        family = int.from_bytes(raw[:2], sys.byteorder)
+        port = int.from_bytes(raw[2:4], "big")
+        if family == socket.AF_INET:
+            return socket.inet_ntop(socket.AF_INET, raw[4:8]), port
+        if family == socket.AF_INET6:
+            return socket.inet_ntop(socket.AF_INET6, raw[8:24]), port
+        raise ValueError(f"Unsupported address family: {family}")
+
+    def recv(self, block: bool = True) -> list[tuple[bytes, tuple[str, int]]]:
+        """Block until at least one datagram arrives; return up to batch_size datagrams.
+
+        Unless blocking, return no datagrams if none are queued.
+        """
+        for i in range(self.batch_size):
+            self._recv_msgs[i].msg_hdr.msg_namelen = self.SOCKADDR_SIZE
+        flags = MSG_WAITFORONE if block else MSG_WAITFORONE | socket.MSG_DONTWAIT
+        while True:
+            ret = _LIBC.recvmmsg(
+                self.sock.fileno(),
+                self._recv_msgs,
+                self.batch_size,
+                flags,
+                None,
+            )
+            if ret < 0 and ctypes.get_errno() == errno.EINTR:
+                continue
+            break
+        if ret < 0:
+            err = ctypes.get_errno()
+            if err == errno.EAGAIN and not block:
+                return []
+            raise OSError(err, f"recvmmsg: {errno.errorcode.get(err, err)}")
+        num = ret
+        return [
+            (
+                ctypes.string_at(self._recv_bufs[i], self._recv_msgs[i].msg_len),
+                self._peer_address(i),
+            )
+            for i in range(num)
+        ]
+
+    def send(self, replies: list[tuple[int, bytes]]) -> int:
+        """Send replies, given as (index of received datagram, payload) pairs.
+
+        Return number of replies processed, including replies that could not
+        be sent and were skipped.
+        """
+        for j, (i, payload) in enumerate(replies):
+            size = len(payload)
+            if size > self.send_size:
+                raise ValueError(
+                    f"Reply too large (size={size}, limit={self.send_size})"
+                )
+            ctypes.memmove(self._send_bufs[j], payload, size)
+            self._send_iovs[j].iov_len = size
+            hdr = self._send_msgs[j].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._names[i])
+            hdr.msg_namelen = self._recv_msgs[i].msg_hdr.msg_namelen
+        sent = 0
+        while sent < len(replies):
+            ret = _LIBC.sendmmsg(
+                self.sock.fileno(),
+                ctypes.byref(self._send_msgs[sent]),
+                len(replies) - sent,
+                0,
+            )
+            if ret >= 0:
+                sent += ret
+                continue
+            err = ctypes.get_errno()
+            if err == errno.EINTR:
+                continue
+            # skip the datagram that failed (e.g., unreachable peer)
+            log.debug("Failed to send UDP reply: %s", errno.errorcode.get(err, err))
+            sent += 1
+        return sent
@@ -0,0 +1,244 @@
+"""Module for routing DNS queries to zones and node selections."""
+
+import itertools
+import logging as log
+import math
+from dataclasses import dataclass
+from typing import ClassVar, Iterable, NamedTuple
+
+import dns.rdatatype
+
+from darkseed.address import NetworkType
+
+from .aaaa_codec import AAAACodec
+
+
+@dataclass(frozen=True)
+class Zone:
+    """DNS zone served by darkseed along with its response policy.
+
+    The response policy restricts which networks are served by the zone, e.g.
+    to serve darknet addresses only from a dedicated zone.
+    """
+
+    name: str
+    networks: frozenset[NetworkType]
+
+    SUPPORTED_NETWORKS: ClassVar[tuple[NetworkType, ...]] = (
+        NetworkType.IPV4,
+        NetworkType.IPV6,
+        NetworkType.ONION_V3,
+        NetworkType.I2P,
+        NetworkType.CJDNS,
+    )
+
+    @classmethod
+    def parse(cls, spec: str) -> "Zone":
+        """Create class instance from zone specification.
+
+        The specification format is NAME[:SUBDOMAIN,...], where the optional
+        subdomains (e.g., n4,n5,n6) restrict the networks served by the zone.
+        """
+        name, _, subdomains = spec.partition(":")
+        name = name.lower()
+        if not name.endswith("."):
+            name += "."
+            log.warning("Appended missing final dot to DNS zone: %s", name)
+        if not subdomains:
+            return cls(name, frozenset(cls.SUPPORTED_NETWORKS))
+        domain_to_net = {net.domain: net for net in cls.SUPPORTED_NETWORKS}
+        networks = set()
+        for subdomain in subdomains.split(","):
+            if subdomain not in domain_to_net:
+                raise ValueError(f"Unsupported subdomain in zone spec: {subdomain}")
+            networks.add(domain_to_net[subdomain])
+        return cls(name, frozenset(networks))
+
+    def __str__(self) -> str:
+        nets = ",".join(
+            net.domain for net in self.SUPPORTED_NETWORKS if net in self.networks
+        )
+        return f"{self.name}[{nets}]"
+
+
+class Route(NamedTuple):
+    """Routing result: the zone a query belongs to and the network counts to serve."""
+
+    zone: Zone
+    netcounts: dict[NetworkType, int]
+
+
+class RoutingTable:
+    """Class mapping query names and types to routes.
+
+    On construction, every supported (subdomain, qtype) pair is compiled into
+    a fully-qualified (qname, qtype) key for every zone, so routing a query is
+    a single dictionary lookup. Names not found in the table are matched
+    against the zones label by label to tell queries for unsupported
+    subdomains or types (answered empty) from queries for foreign zones
+    (ignored).
+
+    Besides one subdomain per network (e.g., n4), composite subdomains listing
+    several networks in ascending order (e.g., n456 or n1456) are supported,
+    so clients can get addresses of several networks in one round-trip. The
+    bytes left for answers in a 512-byte response, which depend on the length
+    of the query name, are split evenly across the requested networks.
+    """
+
+    # (subdomain, qtype) -> network counts; counts keep replies below 512 bytes
+    # for typical zone names and are trimmed for longer ones (see trim_to_budget)
+    ROUTES: ClassVar[dict[tuple[str, int], dict[NetworkType, int]]] = {
+        ("", dns.rdatatype.ANY): {NetworkType.IPV4: 12, NetworkType.IPV6: 10},
+        ("", dns.rdatatype.A): {NetworkType.IPV4: 29},
+        (NetworkType.IPV4.domain, dns.rdatatype.A): {NetworkType.IPV4: 29},
+        (NetworkType.IPV4.domain, dns.rdatatype.ANY): {NetworkType.IPV4: 29},
+        ("", dns.rdatatype.AAAA): {NetworkType.IPV6: 16},
+        (NetworkType.IPV6.domain, dns.rdatatype.AAAA): {NetworkType.IPV6: 16},
+        (NetworkType.IPV6.domain, dns.rdatatype.ANY): {NetworkType.IPV6: 16},
+        (NetworkType.ONION_V3.domain, dns.rdatatype.AAAA): {NetworkType.ONION_V3: 6},
+        (NetworkType.ONION_V3.domain, dns.rdatatype.ANY): {NetworkType.ONION_V3: 6},
+        (NetworkType.I2P.domain, dns.rdatatype.AAAA): {NetworkType.I2P: 6},
+        (NetworkType.I2P.domain, dns.rdatatype.ANY): {NetworkType.I2P: 6},
+        (NetworkType.CJDNS.domain, dns.rdatatype.AAAA): {NetworkType.CJDNS: 13},
+        (NetworkType.CJDNS.domain, dns.rdatatype.ANY): {NetworkType.CJDNS: 13},
+    }
+
+    # composite subdomains (e.g., n456) request several networks at once; they
+    # are answered for these query types, dropping networks that cannot be
+    # served for the type (IPv4 addresses in answers to AAAA queries)
+    COMPOSITE_QTYPES: ClassVar[dict[int, frozenset[NetworkType]]] = {
+        dns.rdatatype.ANY: frozenset(Zone.SUPPORTED_NETWORKS),
+        dns.rdatatype.AAAA: frozenset(Zone.SUPPORTED_NETWORKS) - {NetworkType.IPV4},
+    }
+    # size limit of responses to clients without EDNS
+    RESPONSE_LIMIT: ClassVar[int] = 512
+    # bytes of header and question, excluding the encoded query name
+    FIXED_BYTES: ClassVar[int] = 12 + 4
+    # bytes per A and AAAA record, using a pointer to the query name as owner
+    RECORD_BYTES: ClassVar[dict[NetworkType, int]] = {
+        NetworkType.IPV4: 16,
+        NetworkType.IPV6: 28,
+    }
+    # bytes per darknet address in the AAAACodec payload (BIP155-like)
+    PAYLOAD_BYTES: ClassVar[dict[NetworkType, int]] = {
+        NetworkType.ONION_V3: 33,
+        NetworkType.I2P: 33,
+        NetworkType.CJDNS: 17,
+    }
+
+    def __init__(self, zones: tuple[Zone, ...]):
+        if not zones:
+            raise ValueError("At least one zone is required")
+        self.zones = {zone.name: zone for zone in zones}
+        if len(self.zones) != len(zones):
+            raise ValueError("Duplicate zones")
+        self.routes: dict[tuple[str, int], Route] = {}
+        for zone in zones:
+            for (subdomain, qtype), netcounts in self.ROUTES.items():
+                counts = {n: c for n, c in netcounts.items() if n in zone.networks}
+                if not counts:
+                    continue
+                qname = f"{subdomain}.{zone.name}" if subdomain else zone.name
+                counts = self.trim_to_budget(counts, self.answer_budget(qname))
+                self.routes[(qname, qtype)] = Route(zone, counts)
+            for networks in self.composites():
+                for qtype, servable in self.COMPOSITE_QTYPES.items():
+                    served = networks & servable & zone.networks
+                    if not served:
+                        continue
+                    qname = f"{self.composite_subdomain(networks)}.{zone.name}"
+                    netcounts = self.split_budget(served, self.answer_budget(qname))
+                    self.routes[(qname, qtype)] = Route(zone, netcounts)
+        log.debug("Compiled %d routes for zones: %s", len(self.routes), zones)
+
+    @staticmethod
+    def composites() -> Iterable[frozenset[NetworkType]]:
+        """Get all combinations of at least two supported networks."""
+        for size in range(2, len(Zone.SUPPORTED_NETWORKS) + 1):
+            for networks in itertools.combinations(Zone.SUPPORTED_NETWORKS, size):
+                yield frozenset(networks)
+
+    @staticmethod
+    def composite_subdomain(networks: Iterable[NetworkType]) -> str:
+        """Get composite subdomain, e.g., n456 for onion, I2P and CJDNS."""
+        return "n" + "".join(
+            str(net.value) for net in sorted(networks, key=lambda n: n.value)
+        )
+
+    @classmethod
+    def subdomains(cls) -> frozenset[str]:
+        """Get all supported subdomains, including composite ones."""
+        return frozenset(s for s, _ in cls.ROUTES if s) | frozenset(
+            cls.composite_subdomain(networks) for networks in cls.composites()
+        )
+
+    @classmethod
+    def answer_budget(cls, qname: str) -> int:
+        """Get bytes available for answer records in a 512-byte response to qname."""
+        # labels are length-prefixed and the root label is empty
+        return cls.RESPONSE_LIMIT - cls.FIXED_BYTES - (len(qname.rstrip(".")) + 2)
+
+    @classmethod
+    def answer_fits(cls, netcounts: dict[NetworkType, int], budget: int) -> bool:
+        """Check whether addresses fit into budget bytes of answer records."""
+        size = sum(cls.RECORD_BYTES.get(n, 0) * c for n, c in netcounts.items())
+        payload = sum(cls.PAYLOAD_BYTES.get(n, 0) * c for n, c in netcounts.items())
+        records = math.ceil((1 + payload) / AAAACodec.PAYLOAD_BYTES) if payload else 0
+        size += records * cls.RECORD_BYTES[NetworkType.IPV6]
+        return size <= budget and records <= AAAACodec.RECORD_LIMIT
+
+    @classmethod
+    def split_budget(
+        cls, networks: Iterable[NetworkType], budget: int
+    ) -> dict[NetworkType, int]:
+        """Split budget bytes of answers evenly (by address count) across networks.
+
+        Addresses are added round-robin until no network's next address fits.
+        Clearnet addresses cost one A or AAAA record each, whereas darknet
+        addresses share one AAAACodec payload.
+        """
+        netcounts = {net: 0 for net in sorted(networks, key=lambda n: n.value)}
+        added = True
+        while added:
+            added = False
+            for net in netcounts:
+                netcounts[net] += 1
+                if cls.answer_fits(netcounts, budget):
+                    added = True
+                else:
+                    netcounts[net] -= 1
+        return netcounts
+
+    @classmethod
+    def trim_to_budget(
+        cls, netcounts: dict[NetworkType, int], budget: int
+    ) -> dict[NetworkType, int]:
+        """Reduce network counts until their addresses fit into budget bytes.
+
+        The counts in ROUTES fit short zone names only; addresses are removed
+        from the network with the most addresses first.
+        """
+        netcounts = dict(netcounts)
+        while any(netcounts.values()) and not cls.answer_fits(netcounts, budget):
+            netcounts[max(netcounts, key=lambda n: netcounts[n])] -= 1
+        return netcounts
+
+    def get_zone(self, qname: str) -> Zone | None:
+        """Get zone qname belongs to, trying longest suffixes first."""
+        pos = 0
+        while pos < len(qname):
+            zone = self.zones.get(qname[pos:])
+            if zone:
+                return zone
+            pos = qname.find(".", pos) + 1
+            if not pos:
+                break
+        return None
+
+    def route(self, qname: str, qtype: int) -> Route | None:
+        """Route query; return None if qname does not belong to any zone."""
+        route = self.routes.get((qname, qtype))
+        if route:
+            return route
+        zone = self.get_zone(qname)
+        return Route(zone, {}) if zone else None
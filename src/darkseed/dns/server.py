@@ -2,9 +2,15 @@
 
 import ipaddress
 import logging as log
+import selectors
+import socket
 import socketserver
+import sys
 import threading
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
 from typing import ClassVar, List, Tuple
 
 import dns.message
@@ -14,18 +20,21 @@ import dns.rdatatype
 import dns.rrset
 
 from darkseed.address import Address, NetworkType
+from darkseed.analytics import TrafficAnalytics
+from darkseed.node import NodePool
 from darkseed.node_manager import NodeManager
 
 from .aaaa_codec import AAAACodec
+from .admission import AdmissionController, Reply
+from .capture import QueryCapture
+from .constants import DNSConstants
+from .dnssec import PresignedResponder, ZoneKey
+from .handoff import ListenerSockets
+from .mmsg import MMsgSocket
 from .regular_records import RegularRecords
-
-
-@dataclass
-class DNSConstants:
-    """DNS protocol constants."""
-
-    UDP_SIZE_LIMIT: ClassVar[int] = 512
-    TCP_SIZE_LIMIT: ClassVar[int] = 65535
+from .routing import Route, RoutingTable, Zone
+from .ttl import TTLPolicy
+from .wire import WireHeader
 
 
 @dataclass
@@ -33,39 +42,30 @@ class DNSHandler:
     """Class for handling DNS requests.
 
     Uses a NodeManager to marshall nodes for response.
+
+    Requests are processed concurrently by all serving threads without
+    locks, which also holds on free-threaded builds: class-level state is set
+    before the server threads start and only read afterwards, each request
+    pins the immutable node pool by reading a single reference, and random
+    numbers come from per-thread generators (see thread_rng). Optional
+    features recording requests (capture, analytics) take a lock per request.
     """
 
     _NODE_MANAGER: ClassVar[NodeManager]
-    _ZONE: ClassVar[str]
+    _ROUTING_TABLE: ClassVar[RoutingTable]
+    _ADMISSION: ClassVar[AdmissionController | None] = None
+    _CAPTURE: ClassVar[QueryCapture | None] = None
+    _DNSSEC: ClassVar[PresignedResponder | None] = None
+    _ANALYTICS: ClassVar[TrafficAnalytics | None] = None
+    _TTL_POLICY: ClassVar[TTLPolicy] = TTLPolicy()
 
     @staticmethod
     def question_to_netcounts(question: dns.rrset.RRset) -> dict[NetworkType, int]:
         """Map question (in particular, domain and type) to network counts."""
-        qtype = question.rdtype
         qdomain = question.name.to_text(omit_final_dot=False).lower()
-        zone = DNSHandler._ZONE
-        assert qdomain.endswith(zone), f"Error: {qdomain} does not end with {zone}"
-        subdomain = qdomain[: -len(zone) - 1]  # remove trailing dot
-        # if len(SupportsRSub
-        #     len(subdomain) == 2 and subdomain[0] == "n":
-        #     prefix = int(subdomain[1])
-        match (subdomain, qtype):
-            # first match takes care of ANY and no subdomain in the two following matches
-            case ("", dns.rdatatype.ANY):
-                result = {NetworkType.IPV4: 12, NetworkType.IPV6: 10}
-            case ("" | NetworkType.IPV4.domain, dns.rdatatype.A | dns.rdatatype.ANY):
-                result = {NetworkType.IPV4: 29}
-            case ("" | NetworkType.IPV6.domain, dns.rdatatype.AAAA | dns.rdatatype.ANY):
-                result = {NetworkType.IPV6: 16}
-            case (NetworkType.ONION_V3.domain, dns.rdatatype.AAAA | dns.rdatatype.ANY):
-                result = {NetworkType.ONION_V3: 6}
-            case (NetworkType.I2P.domain, dns.rdatatype.AAAA | dns.rdatatype.ANY):
-                result = {NetworkType.I2P: 6}
-            case (NetworkType.CJDNS.domain, dns.rdatatype.AAAA | dns.rdatatype.ANY):
-                result = {NetworkType.CJDNS: 13}
-            case _:
-                result = {}
-        return result
+        route = DNSHandler._ROUTING_TABLE.route(qdomain, question.rdtype)
+        assert route, f"Error: {qdomain} does not belong to any zone"
+        return route.netcounts
 
     @classmethod
     def set_node_manager(cls, node_manager):
@@ -73,9 +73,58 @@ class DNSHandler:
         cls._NODE_MANAGER = node_manager
 
     @classmethod
-    def set_zone(cls, zone: str):
-        """Set the zone manager."""
-        cls._ZONE = zone
+    def set_routing_table(cls, routing_table: RoutingTable):
+        """Set the routing table."""
+        cls._ROUTING_TABLE = routing_table
+
+    @classmethod
+    def set_admission_controller(cls, admission: AdmissionController | None):
+        """Set the admission controller; None processes requests inline."""
+        cls._ADMISSION = admission
+
+    @classmethod
+    def set_dnssec(cls, responder: PresignedResponder | None):
+        """Set the responder for DNSSEC-signed answers; None disables DNSSEC."""
+        cls._DNSSEC = responder
+
+    @classmethod
+    def set_analytics(cls, analytics: TrafficAnalytics | None):
+        """Set traffic analytics fed with every query for a served zone."""
+        cls._ANALYTICS = analytics
+
+    @classmethod
+    def set_ttl_policy(cls, ttl_policy: TTLPolicy):
+        """Set the policy choosing TTLs of answers."""
+        cls._TTL_POLICY = ttl_policy
+
+    @classmethod
+    def set_capture(cls, capture: QueryCapture | None):
+        """Set the query capture; None disables recording."""
+        cls._CAPTURE = capture
+
+    @classmethod
+    def capture(cls, data: bytes, protocol: str):
+        """Record query if capturing is enabled."""
+        if cls._CAPTURE:
+            cls._CAPTURE.record(data, protocol)
+
+    @classmethod
+    def admission_enabled(cls) -> bool:
+        """Check whether requests are processed via admission control."""
+        return cls._ADMISSION is not None
+
+    @classmethod
+    def submit(cls, data: bytes, peer_info: str, protocol: str, reply: Reply):
+        """Process DNS request via admission control, if enabled, else inline.
+
+        The reply callback receives the response, or empty bytes if the
+        request should be ignored.
+        """
+        cls.capture(data, protocol)
+        if cls._ADMISSION:
+            cls._ADMISSION.submit(data, peer_info, protocol, reply)
+            return
+        reply(cls.process(data, peer_info, protocol))
 
     @classmethod
     def refuse(cls, request: dns.message.Message) -> bytes:
@@ -84,13 +133,45 @@ class DNSHandler:
         response.set_rcode(dns.rcode.REFUSED)
         return response.to_wire()
 
+    @staticmethod
+    def size_limit(request: dns.message.Message, protocol: str) -> int:
+        """Get maximum size of the response to request received via protocol.
+
+        UDP responses are limited to 512 bytes without EDNS and to the
+        advertised EDNS payload size otherwise (capped at EDNS_SIZE_LIMIT).
+        """
+        if protocol != "UDP":
+            return DNSConstants.TCP_SIZE_LIMIT
+        if request.edns < 0:
+            return DNSConstants.UDP_SIZE_LIMIT
+        return min(
+            max(request.payload, DNSConstants.UDP_SIZE_LIMIT),
+            DNSConstants.EDNS_SIZE_LIMIT,
+        )
+
+    @staticmethod
+    def fit_response(data: bytes, response: bytes, limit: int, peer_info: str) -> bytes:
+        """Replace response exceeding limit by an empty truncated one (TC).
+
+        Clients retry truncated responses via TCP.
+        """
+        if len(response) <= limit:
+            return response
+        log.warning(
+            "Truncating reply exceeding size limit: to=%s, size=%d, limit=%d",
+            peer_info,
+            len(response),
+            limit,
+        )
+        return WireHeader.from_wire(data).empty_response(data, truncated=True)
+
     @classmethod
-    def process(cls, data: bytes, peer_info: str) -> bytes:
-        """Process DNS request."""
+    def process(cls, data: bytes, peer_info: str, protocol: str = "UDP") -> bytes:
+        """Process DNS request received via protocol (UDP, TCP or UNIX)."""
         if not getattr(cls, "_NODE_MANAGER", None):
             raise RuntimeError(f"{cls.__name__}: Node manager not set")
-        if not getattr(cls, "_ZONE", None):
-            raise RuntimeError(f"{cls.__name__}: Zone not set")
+        if not getattr(cls, "_ROUTING_TABLE", None):
+            raise RuntimeError(f"{cls.__name__}: Routing table not set")
 
         request = dns.message.from_wire(data)
         if len(request.question) != 1:
@@ -104,7 +185,8 @@ class DNSHandler:
 
         question = request.question[0]
         qdomain = question.name.to_text(omit_final_dot=False).lower()
-        if not qdomain.endswith(cls._ZONE):
+        route = cls._ROUTING_TABLE.route(qdomain, question.rdtype)
+        if not route:
             log.warning(
                 "Silently dropping DNS query for unknown zone: from=%s, size=%d, name=%s",
                 peer_info,
@@ -113,6 +195,28 @@ class DNSHandler:
             )
             return bytes()
 
+        subdomain = cls.get_subdomain(qdomain, route)
+        limit = cls.size_limit(request, protocol)
+        if cls._ANALYTICS:
+            cls._ANALYTICS.record(
+                DNSServer.get_client_address(peer_info),
+                subdomain,
+                dns.rdatatype.to_text(question.rdtype),
+            )
+
+        if cls._DNSSEC:
+            response = cls._DNSSEC.respond(data, request, route, limit)
+            if response is not None:
+                log.info(
+                    "Sending pre-signed reply: to=%s, size=%d, zone=%s, domain=%s, type=%s",
+                    peer_info,
+                    len(response),
+                    route.zone.name,
+                    qdomain,
+                    dns.rdatatype.to_text(question.rdtype),
+                )
+                return cls.fit_response(data, response, limit, peer_info)
+
         if question.rdtype not in (
             dns.rdatatype.A,
             dns.rdatatype.AAAA,
@@ -128,56 +232,85 @@ class DNSHandler:
             return cls.refuse(request)
 
         log.info(
-            "Received DNS query: from=%s, size=%d, domain=%s, class=%s, type=%s",
+            "Received DNS query: from=%s, size=%d, zone=%s, domain=%s, class=%s, type=%s",
             peer_info,
             len(data),
+            route.zone.name,
             qdomain,
             dns.rdataclass.to_text(question.rdclass),
             dns.rdatatype.to_text(question.rdtype),
         )
-        response_bytes, response_records = cls.create_response(request)
+        ttl = cls._TTL_POLICY.ttl(subdomain, question.rdtype, route.netcounts)
+        response_bytes, response_records = cls.create_response(
+            request, route.netcounts, ttl
+        )
         log.info(
             "Sending reply: to=%s, size=%d, records=%d",
             peer_info,
             len(response_bytes),
             response_records,
         )
-        return response_bytes
+        return cls.fit_response(data, response_bytes, limit, peer_info)
+
+    @staticmethod
+    def get_subdomain(qdomain: str, route: Route) -> str:
+        """Get subdomain of qdomain relative to the route's zone, e.g., n4."""
+        return qdomain[: -len(route.zone.name)].rstrip(".")
 
     @staticmethod
-    def select_addresses(question: dns.rrset.RRset) -> List[Address]:
-        """Get addresses based on RDTYPE in request.
+    def select_addresses(
+        net_to_addr_num: dict[NetworkType, int], pool: NodePool | None = None
+    ) -> List[Address]:
+        """Get addresses for network counts determined by the query's route.
 
-        First, look up address types and corresponding numbers to select using
-        RDTYPE. Then, request the data from the NodeManager.
+        Request the number of addresses for each network from the NodeManager,
+        all from the same node pool, which is pinned here unless given.
         """
 
-        net_to_addr_num = DNSHandler.question_to_netcounts(question)
+        node_manager = DNSHandler._NODE_MANAGER
+        if pool is None:
+            pool = node_manager.get_pool()
         addresses = []
         for net, count in net_to_addr_num.items():
             if count:
-                addresses += DNSHandler._NODE_MANAGER.get_random_addresses(net, count)
+                addresses += node_manager.get_random_addresses(net, count, pool)
         return addresses
 
     @staticmethod
-    def create_response(request: dns.message.Message) -> Tuple[bytes, int]:
-        """Create DNS response."""
+    def create_response(
+        request: dns.message.Message, netcounts: dict[NetworkType, int], ttl: int
+    ) -> Tuple[bytes, int]:
+        """Create DNS response with records using ttl."""
         response = dns.message.make_response(request)
         response.use_edns(False)
-        question = request.question[0]
-        addresses = DNSHandler.select_addresses(question)
-        DNSHandler.add_records_to_response(response, addresses)
+        pool = DNSHandler._NODE_MANAGER.get_pool()
+        addresses = DNSHandler.select_addresses(netcounts, pool)
+        DNSHandler.add_records_to_response(response, addresses, ttl)
         log.debug(
-            "Created response (size=%dB, records=%d)",
+            "Created response (size=%dB, records=%d, pool=v%d, ttl=%d)",
             len(response.to_wire()),
             len(addresses),
+            pool.version,
+            ttl,
         )
         log.debug("Response=%s", response.to_wire().hex())
         return response.to_wire(), len(addresses)
 
+    @staticmethod
+    def fill_response(response: dns.message.Message, route: Route):
+        """Add records for route to response, e.g., to build pre-signed responses."""
+        question = response.question[0]
+        qdomain = question.name.to_text(omit_final_dot=False).lower()
+        ttl = DNSHandler._TTL_POLICY.ttl(
+            DNSHandler.get_subdomain(qdomain, route), question.rdtype, route.netcounts
+        )
+        DNSHandler.add_records_to_response(
+            response, DNSHandler.select_addresses(route.netcounts), ttl
+        )
+
     @staticmethod
     def add_records_to_response(
-        response: dns.message.Message, addresses: List[Address]
+        response: dns.message.Message, addresses: List[Address], ttl: int
     ):
         """Add address records to the DNS response.
 
@@ -189,12 +322,12 @@ class DNSHandler:
 
         clearnet_addrs = [a for a in addresses if a.ipv4 or a.ipv6]
         for address in clearnet_addrs:
-            record = RegularRecords.build_record(address, domain)
+            record = RegularRecords.build_record(address, domain, ttl)
             response.answer.append(record)
 
         darknet_addrs = [a for a in addresses if not (a.ipv4 or a.ipv6)]
         if darknet_addrs:
-            records = AAAACodec.encode(darknet_addrs, domain)
+            records = AAAACodec.encode(darknet_addrs, domain, ttl)
             for record in records:
                 response.answer.append(record)
 
@@ -213,13 +346,57 @@ class DNSServer(threading.Thread):
 
     address: str
     port: int
-    zone: str
-    node_manager: NodeManager
+    zones: tuple[Zone, ...]
+    # exclude from hash: node manager state changes while threads start up
+    node_manager: NodeManager = field(hash=False)
+    udp_batch: int = 64  # datagrams per recvmmsg/sendmmsg call; 0 disables batching
+    udp_threads: int = 1  # threads serving UDP, each with a SO_REUSEPORT socket
+    admission: AdmissionController | None = field(default=None, hash=False)
+    capture: QueryCapture | None = field(default=None, hash=False)
+    dnssec_key_dir: Path | None = None  # enables DNSSEC
+    dnssec_pool_size: int = 32
+    dnssec: PresignedResponder | None = field(default=None, init=False, hash=False)
+    analytics: TrafficAnalytics | None = field(default=None, hash=False)
+    # (label, path) of unix stream sockets to listen on, e.g., for Tor and I2P
+    unix_listeners: tuple[tuple[str, Path], ...] = ()
+    ttl_policy: TTLPolicy = field(default_factory=TTLPolicy, hash=False)
+    # bound sockets to serve on instead of binding, e.g., inherited on restart
+    sockets: ListenerSockets | None = field(default=None, hash=False)
+    _servers: list = field(default_factory=list, init=False, hash=False)
+    _listeners: ListenerSockets = field(
+        default_factory=ListenerSockets, init=False, hash=False
+    )
 
     def __post_init__(self):
         super().__init__(name=self.__class__.__name__)
         DNSHandler.set_node_manager(self.node_manager)
-        DNSHandler.set_zone(self.zone)
+        DNSHandler.set_ttl_policy(self.ttl_policy)
+        # update TTLs before pre-signed responses are rebuilt
+        self.node_manager.subscribe(
+            lambda: self.ttl_policy.update(self.node_manager.get_pool())
+        )
+        # the node manager may have published pools before (always when taking
+        # over sockets); updates are skipped for pools already seen
+        if self.node_manager.get_pool().version:
+            self.ttl_policy.update(self.node_manager.get_pool())
+        routing_table = RoutingTable(self.zones)
+        DNSHandler.set_routing_table(routing_table)
+        if self.dnssec_key_dir:
+            self.dnssec = PresignedResponder(
+                routing_table,
+                {
+                    z.name: ZoneKey.load_or_create(z, self.dnssec_key_dir)
+                    for z in self.zones
+                },
+                DNSHandler.fill_response,
+                pool_size=self.dnssec_pool_size,
+                ttl=self.ttl_policy.default,
+            )
+            self.node_manager.subscribe(self.dnssec.invalidate)
+        DNSHandler.set_dnssec(self.dnssec)
+        DNSHandler.set_analytics(self.analytics)
+        DNSHandler.set_admission_controller(self.admission)
+        DNSHandler.set_capture(self.capture)
 
     @staticmethod
     def get_peer_info(client_address: Tuple[str, int], protocol: str) -> str:
@@ -228,50 +405,208 @@ class DNSServer(threading.Thread):
         ban = ipaddress.ip_network(f"{address}/16", strict=False)
         return f"{address}:{port} (ban={ban}) [{protocol}]"
 
+    @staticmethod
+    def get_unix_peer_info(label: str) -> str:
+        """Get peer string for clients of a unix socket listener."""
+        return f"unix:{label} [UNIX]"
+
+    @staticmethod
+    def get_client_address(peer_info: str) -> str:
+        """Extract client address (or unix:label for unix listeners) from peer string."""
+        peer = peer_info.partition(" ")[0]
+        if peer.startswith("unix:"):
+            return peer
+        return peer.rpartition(":")[0]
+
     def run(self):
         """Start TCP and UDP DNS server threads."""
 
-        def _start_server(address, port, protocol):
-            """Start DNS server."""
+        def _start_server(address, port, protocol, name, sock=None):
+            """Start DNS server, binding a new socket unless given one."""
             if protocol == "TCP":
-                server = socketserver.TCPServer((address, port), TCPRequestHandler)
+                # persistent connections require a thread per connection
+                server = DrainingTCPServer(
+                    (address, port), TCPRequestHandler, bind_and_activate=sock is None
+                )
+                if sock is not None:
+                    server.socket.close()
+                    server.socket = sock
+                # another process sharing the socket may accept connections first
+                server.socket.setblocking(False)
+                self._listeners.tcp = server.socket
             elif protocol == "UDP":
-                server = socketserver.UDPServer((address, port), UDPRequestHandler)
+                server = SharedUDPServer(
+                    (address, port), UDPRequestHandler, bind_and_activate=False
+                )
+                if sock is None:
+                    # the kernel spreads datagrams across the sockets of all threads
+                    server.allow_reuse_port = self.udp_threads > 1
+                    server.server_bind()
+                else:
+                    server.socket.close()
+                    server.socket = sock
+                if server.socket not in self._listeners.udp:
+                    self._listeners.udp.append(server.socket)
+                if self.udp_batch and MMsgSocket.supported():
+                    server = BatchedUDPServer(server.socket, self.udp_batch)
+                    log.info("Using batched UDP syscalls (batch=%d)", self.udp_batch)
             else:
                 raise ValueError(f"Unsupported protocol {protocol}")
-            server_thread = threading.Thread(target=server.serve_forever)
+            self._servers.append(server)
+            server_thread = threading.Thread(target=server.serve_forever, name=name)
             server_thread.start()
-            log.info("Started DNS server on %s:%d [%s]", address, port, protocol)
-
-        for proto in ("TCP", "UDP"):
-            _start_server(self.address, self.port, proto)
+            log.info(
+                "Started DNS server on %s:%d [%s%s]",
+                address,
+                port,
+                name,
+                ", inherited socket" if sock is not None else "",
+            )
 
+        if self.capture:
+            self.capture.open()
+        if self.analytics:
+            self.analytics.start()
+        if self.dnssec:
+            self.dnssec.start()
+            # otherwise, pools are built after the first node pool update
+            if NodeManager.get_pool().version:
+                self.dnssec.invalidate()
+        if self.admission:
+            self.admission.start()
+        inherited = self.sockets or ListenerSockets()
+        # every inherited UDP socket needs a thread; threads may share sockets
+        udp_threads = max(self.udp_threads, len(inherited.udp))
+        log.info(
+            "Serving UDP with %d thread(s) (GIL %s)",
+            udp_threads,
+            (
+                "enabled"
+                if getattr(sys, "_is_gil_enabled", lambda: True)()
+                else "disabled"
+            ),
+        )
+        _start_server(self.address, self.port, "TCP", "DNSServer-TCP", inherited.tcp)
+        for i in range(udp_threads):
+            sock = inherited.udp[i % len(inherited.udp)] if inherited.udp else None
+            _start_server(self.address, self.port, "UDP", f"DNSServer-UDP-{i}", sock)
+        for label, path in self.unix_listeners:
+            self.start_unix_server(label, path)
+
+    def start_unix_server(self, label: str, path: Path):
+        """Start DNS server on unix stream socket, e.g., for Tor or I2P tunnels."""
+        # remove socket left by previous run
+        if path.is_socket():
+            path.unlink()
+        server = DrainingUnixStreamServer(str(path), UnixRequestHandler)
+        server.label = label  # type: ignore[attr-defined]
+        self._servers.append(server)
+        threading.Thread(
+            target=server.serve_forever, name=f"DNSServer-UNIX-{label}"
+        ).start()
+        log.info("Started DNS server on %s [UNIX, label=%s]", path, label)
+
+    def get_listener_sockets(self) -> ListenerSockets:
+        """Get bound TCP and UDP sockets being served, e.g., to hand off."""
+        return self._listeners
+
+    def stop(self, drain_timeout: float):
+        """Stop serving and wait up to drain_timeout seconds for connections to end.
+
+        Open connections are closed after their current request.
+        """
+        for server in self._servers:
+            server.shutdown()
+        deadline = time.monotonic() + drain_timeout
+        remaining = sum(
+            server.drain(max(0.0, deadline - time.monotonic()))
+            for server in self._servers
+            if isinstance(server, ConnectionDrainMixIn)
+        )
+        if remaining:
+            log.warning("Closing %d open connection(s) after draining", remaining)
+        else:
+            log.info("Drained all connections")
+        if self.capture:
+            self.capture.close()
+        if self.analytics:
+            self.analytics.flush()
+
+
+class TCPRequestHandler(socketserver.StreamRequestHandler):
+    """TCP request handler for DNS requests.
+
+    Keeps the connection open to serve multiple length-prefixed queries in
+    sequence (RFC 7766) until the client closes it or stays idle for longer
+    than the timeout.
+    """
 
-class TCPRequestHandler(socketserver.BaseRequestHandler):
-    """TCP request handler for DNS requests."""
+    timeout = DNSConstants.TCP_IDLE_TIMEOUT
 
     def handle(self):
-        """Handle DNS request."""
-        log.debug("Received TCP packet (request=%s)", self.request)
-        data = self.request.recv(DNSConstants.TCP_SIZE_LIMIT)
-        expected_size = int.from_bytes(data[:2], byteorder="big")
-        if len(data) - 2 != expected_size:
+        """Handle DNS requests until connection is closed."""
+        log.debug("Accepted TCP connection (request=%s)", self.request)
+        peer_info = self.get_peer_info()
+        try:
+            # close connection after current request when draining
+            server: ConnectionDrainMixIn = self.server  # type: ignore[assignment]
+            while self.handle_one(peer_info) and not server.draining:
+                pass
+        except TimeoutError:
+            log.debug("Closing idle TCP connection (from=%s)", peer_info)
+
+    def get_peer_info(self) -> str:
+        """Get peer string of connection."""
+        return DNSServer.get_peer_info(self.client_address, protocol="TCP")
+
+    def handle_one(self, peer_info: str) -> bool:
+        """Handle single DNS request; return False if connection should be closed."""
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return False
+        expected_size = int.from_bytes(header, byteorder="big")
+        data = self.rfile.read(expected_size)
+        if len(data) != expected_size:
             log.warning(
                 "Received invalid TCP DNS packet (expected=%d, actual=%d)",
                 expected_size,
                 len(data),
             )
-            return
-        peer_info = DNSServer.get_peer_info(self.client_address, protocol="TCP")
-        response = DNSHandler.process(data[2:], peer_info)
+            return False
+        done = threading.Event()
+        responses = []
+
+        def reply(response: bytes):
+            responses.append(response)
+            done.set()
+
+        DNSHandler.submit(data, peer_info, "TCP", reply)
+        done.wait()
+        response = responses[0]
         # no response means the request should be ignored silently
         if not response:
-            return
+            return False
         size, limit = len(response), DNSConstants.TCP_SIZE_LIMIT
         assert size <= limit, f"Response too large (size={size}, limit={limit})"
-        log.debug("Sending TCP packet (to=%s, data=%s)", self.client_address, response)
+        log.debug("Sending TCP packet (to=%s, data=%s)", peer_info, response)
         size = len(response).to_bytes(2, byteorder="big")
-        self.request.sendall(size + response)
+        self.wfile.write(size + response)
+        return True
+
+
+class UnixRequestHandler(TCPRequestHandler):
+    """Unix stream socket request handler for DNS requests.
+
+    Uses the same length-prefixed framing as TCP, so Tor (HiddenServicePort
+    with a unix: target) and I2P server tunnels can forward DNS over TCP
+    without a loopback port. Clients are identified by the listener's label.
+    Queries are treated as TCP queries otherwise, e.g., for size limits and
+    query capture.
+    """
+
+    def get_peer_info(self) -> str:
+        """Get peer string of listener."""
+        return DNSServer.get_unix_peer_info(self.server.label)  # type: ignore[attr-defined]
 
 
 class UDPRequestHandler(socketserver.BaseRequestHandler):
@@ -279,13 +614,174 @@ class UDPRequestHandler(socketserver.BaseRequestHandler):
 
     def handle(self):
         """Handle DNS request."""
-        data = self.request[0].strip()
-        peer_info = DNSServer.get_peer_info(self.client_address, protocol="UDP")
-        response = DNSHandler.process(data, peer_info)
+        data = self.request[0]
+        sock, client_address = self.request[1], self.client_address
+        peer_info = DNSServer.get_peer_info(client_address, protocol="UDP")
+        DNSHandler.submit(
+            data, peer_info, "UDP", lambda r: self.send(sock, r, client_address)
+        )
+
+    @staticmethod
+    def send(sock: socket.socket, response: bytes, client_address: Tuple[str, int]):
+        """Send response to client."""
         # no response means the request should be ignored silently
         if not response:
             return
-        socket = self.request[1]
-        size, limit = len(response), DNSConstants.UDP_SIZE_LIMIT
+        # responses fit the request's limit (see DNSHandler.size_limit); this
+        # bounds the send buffer for EDNS requests
+        size, limit = len(response), DNSConstants.EDNS_SIZE_LIMIT
         assert size <= limit, f"Response too large (size={size}, limit={limit})"
-        socket.sendto(response, self.client_address)
+        sock.sendto(response, client_address)
+
+
+class ConnectionDrainMixIn(socketserver.ThreadingMixIn):
+    """Mix-in for threading stream servers that waits for connections to end.
+
+    Connections are served by daemon threads, which are counted, so that a
+    stopped server can wait for open connections to finish (see drain).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.draining = False
+        self._connections = 0
+        self._idle = threading.Condition()
+
+    def process_request(self, request, client_address):
+        with self._idle:
+            self._connections += 1
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._idle:
+                self._connections -= 1
+                self._idle.notify_all()
+
+    def drain(self, timeout: float) -> int:
+        """Wait up to timeout seconds for connections to end; return number open."""
+        self.draining = True
+        with self._idle:
+            self._idle.wait_for(lambda: not self._connections, timeout)
+            return self._connections
+
+
+class DrainingTCPServer(ConnectionDrainMixIn, socketserver.TCPServer):
+    """TCP server serving each connection in a thread, see ConnectionDrainMixIn."""
+
+
+class DrainingUnixStreamServer(ConnectionDrainMixIn, socketserver.UnixStreamServer):
+    """Unix stream server serving each connection in a thread."""
+
+
+class SharedUDPServer(socketserver.UDPServer):
+    """UDP server whose socket may be shared with another process.
+
+    Receiving does not block if the other process received the datagram
+    first, e.g., while handing off sockets to a successor (see SocketHandoff).
+    """
+
+    def get_request(self):
+        data, client_addr = self.socket.recvfrom(
+            self.max_packet_size, socket.MSG_DONTWAIT
+        )
+        return (data, self.socket), client_addr
+
+
+class BatchedUDPServer:
+    """UDP server draining and answering datagrams in batches.
+
+    Uses recvmmsg/sendmmsg to receive and send up to batch_size datagrams per
+    syscall, avoiding a syscall pair and a handler object per request.
+    Periodically logs throughput in packets per CPU second of the serving
+    thread, i.e., packets per second per core.
+
+    If admission control is enabled, requests are handed over to its workers
+    instead and replies are sent individually as they complete.
+    """
+
+    STATS_INTERVAL: ClassVar[int] = 60  # seconds
+    POLL_INTERVAL: ClassVar[float] = 0.5  # seconds between checks for shutdown
+
+    def __init__(self, sock: socket.socket, batch_size: int):
+        self.mmsg = MMsgSocket(
+            sock,
+            batch_size,
+            recv_size=DNSConstants.UDP_RECV_SIZE,
+            send_size=DNSConstants.EDNS_SIZE_LIMIT,
+        )
+        self._shutdown_request = threading.Event()
+        self._is_shut_down = threading.Event()
+
+    def shutdown(self):
+        """Stop serve_forever loop and wait until it has stopped."""
+        self._shutdown_request.set()
+        self._is_shut_down.wait()
+
+    @staticmethod
+    def handle(data: bytes, client_address: Tuple[str, int]) -> bytes:
+        """Handle single DNS request; return empty response on failure."""
+        DNSHandler.capture(data, "UDP")
+        try:
+            peer_info = DNSServer.get_peer_info(client_address, protocol="UDP")
+            return DNSHandler.process(data, peer_info, "UDP")
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to process UDP packet from %s", client_address)
+            return bytes()
+
+    def submit(self, requests: list[tuple[bytes, Tuple[str, int]]]):
+        """Submit requests to admission control."""
+        sock = self.mmsg.sock
+        for data, client_address in requests:
+            peer_info = DNSServer.get_peer_info(client_address, protocol="UDP")
+            DNSHandler.submit(
+                data,
+                peer_info,
+                "UDP",
+                partial(UDPRequestHandler.send, sock, client_address=client_address),
+            )
+
+    def serve_forever(self):
+        """Receive, process and answer batches of datagrams."""
+        packets, batches = 0, 0
+        wall_start, cpu_start = time.monotonic(), time.thread_time()
+        selector = selectors.DefaultSelector()
+        selector.register(self.mmsg.sock, selectors.EVENT_READ)
+        while not self._shutdown_request.is_set():
+            if not selector.select(self.POLL_INTERVAL):
+                continue
+            # another process sharing the socket may have received datagrams first
+            requests = self.mmsg.recv(block=False)
+            if not requests:
+                continue
+            if DNSHandler.admission_enabled():
+                self.submit(requests)
+                continue
+            replies = []
+            for i, (data, client_address) in enumerate(requests):
+                response = self.handle(data, client_address)
+                # no response means the request should be ignored silently
+                if response:
+                    replies.append((i, response))
+            if replies:
+                self.mmsg.send(replies)
+            packets += len(requests)
+            batches += 1
+            wall = time.monotonic() - wall_start
+            if wall >= self.STATS_INTERVAL:
+                cpu = time.thread_time() - cpu_start
+                log.info(
+                    "UDP stats: packets=%d, batches=%d, pps=%.0f, pps_per_core=%.0f",
+                    packets,
+                    batches,
+                    packets / wall,
+                    packets / cpu if cpu else 0,
+                )
+                packets, batches = 0, 0
+                wall_start, cpu_start = time.monotonic(), time.thread_time()
+        selector.close()
+        self._is_shut_down.set()
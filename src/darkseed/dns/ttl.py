@@ -0,0 +1,120 @@
+"""Module for choosing TTLs of answers per query class and network."""
+
+import logging as log
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar, Iterable
+
+import dns.rdatatype
+
+from darkseed.address import NetworkType
+from darkseed.node import NodePool
+
+
+@dataclass
+class TTLPolicy:
+    """Class choosing the TTL of answers per query class and network.
+
+    Query classes are named as in traffic analytics, e.g., n4/AAAA, with @
+    for the zone apex. The TTL of an answer is, in order of precedence, the
+    TTL configured for its query class, the TTL configured for its subdomain,
+    or the lowest TTL of the networks it contains. A network's TTL is the one
+    configured for its subdomain (e.g., n4 for onion), else the default.
+
+    In adaptive mode, networks without configured TTL get a TTL derived from
+    the node pool instead. Answers remain valid until the next ingest is
+    expected, and beyond that for as many ingest intervals as cached
+    addresses are expected to remain in the pool with probability FRESHNESS,
+    given the share of addresses removed at the last ingest (churn). Adaptive
+    TTLs are bounded by the default and max_ttl. The ingest interval is the
+    time between the last two ingests, or interval until observed.
+
+    Churn is estimated from a sample of 1 in SAMPLE_RATE addresses, so the
+    policy keeps only a small set of hashes per network across ingests.
+    """
+
+    default: int = 60
+    overrides: dict[str, int] = field(default_factory=dict)
+    adaptive: bool = False
+    max_ttl: int = 3600
+    interval: float = 600.0  # expected seconds between ingests, until observed
+    _churn: dict[NetworkType, float] = field(default_factory=dict)
+    _samples: dict[NetworkType, frozenset[int]] = field(default_factory=dict)
+    _source: str = ""
+    _last_ingest: float = 0.0  # monotonic
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    FRESHNESS: ClassVar[float] = 0.9
+    SAMPLE_RATE: ClassVar[int] = 16
+
+    @staticmethod
+    def query_class(subdomain: str, qtype: int) -> str:
+        """Get name of query class, e.g., n4/AAAA or @/ANY for the zone apex."""
+        return f"{subdomain or '@'}/{dns.rdatatype.to_text(qtype)}"
+
+    def ttl(self, subdomain: str, qtype: int, networks: Iterable[NetworkType]) -> int:
+        """Get TTL of answer for subdomain (relative to zone) and type."""
+        if self.overrides:
+            ttl = self.overrides.get(self.query_class(subdomain, qtype))
+            if ttl is None:
+                ttl = self.overrides.get(subdomain or "@")
+            if ttl is not None:
+                return ttl
+        return min((self.network_ttl(net) for net in networks), default=self.default)
+
+    def network_ttl(self, net: NetworkType) -> int:
+        """Get TTL of addresses of network."""
+        ttl = self.overrides.get(net.domain)
+        if ttl is not None:
+            return ttl
+        if not self.adaptive or not self._last_ingest:
+            return self.default
+        return self.adaptive_ttl(self._churn.get(net, 1.0))
+
+    def adaptive_ttl(self, churn: float) -> int:
+        """Derive TTL from churn and time until the next ingest is expected."""
+        remaining = max(0.0, self._last_ingest + self.interval - time.monotonic())
+        if churn <= 0:
+            return self.max_ttl
+        if churn >= 1:
+            intervals = 0
+        else:
+            intervals = math.floor(math.log(self.FRESHNESS) / math.log(1 - churn))
+        ttl = remaining + intervals * self.interval
+        return int(min(max(ttl, self.default), self.max_ttl))
+
+    def update(self, pool: NodePool):
+        """Update churn estimates after ingest; pools pruned by probing are skipped."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            if pool.source == self._source:
+                return
+            now = time.monotonic()
+            if self._last_ingest:
+                self.interval = now - self._last_ingest
+            self._source, self._last_ingest = pool.source, now
+            for net, nodes in pool.net_to_nodes.items():
+                if not nodes:
+                    self._churn.pop(net, None)
+                    self._samples.pop(net, None)
+                    continue
+                sample = frozenset(
+                    h
+                    for node in nodes
+                    if (h := hash(node.address.address)) % self.SAMPLE_RATE == 0
+                )
+                previous = self._samples.get(net)
+                self._churn[net] = (
+                    1 - len(previous & sample) / len(previous) if previous else 1.0
+                )
+                self._samples[net] = sample
+        log.info(
+            "Updated adaptive TTLs (interval=%.0fs): %s",
+            self.interval,
+            ", ".join(
+                f"{net}=(churn={churn:.3f}, ttl={self.network_ttl(net)}s)"
+                for net, churn in self._churn.items()
+            ),
+        )
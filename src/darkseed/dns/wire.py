@@ -0,0 +1,77 @@
+"""Module for lightweight DNS wire format handling without dnspython."""
+
+import struct
+from dataclasses import dataclass
+from typing import ClassVar
+
+
+@dataclass(frozen=True)
+class WireHeader:
+    """DNS message header parsed directly from wire format.
+
+    Allows inspecting and answering requests cheaply, e.g., to shed load,
+    without parsing the full message using dnspython.
+    """
+
+    id: int
+    flags: int
+    qdcount: int
+    ancount: int
+    nscount: int
+    arcount: int
+
+    SIZE: ClassVar[int] = 12
+    FORMAT: ClassVar[str] = "!6H"
+    QR: ClassVar[int] = 0x8000
+    OPCODE_MASK: ClassVar[int] = 0x7800
+    TC: ClassVar[int] = 0x0200
+    RD: ClassVar[int] = 0x0100
+    SERVFAIL: ClassVar[int] = 2
+
+    @classmethod
+    def from_wire(cls, data: bytes) -> "WireHeader":
+        """Parse header from wire format."""
+        if len(data) < cls.SIZE:
+            raise ValueError(f"Message too short for DNS header: {len(data)} bytes")
+        return cls(*struct.unpack_from(cls.FORMAT, data))
+
+    @property
+    def opcode(self) -> int:
+        """Get opcode."""
+        return (self.flags & self.OPCODE_MASK) >> 11
+
+    @classmethod
+    def question_end(cls, data: bytes) -> int:
+        """Get offset of the end of the first question, which follows the header.
+
+        Questions in queries are not compressed, so the name can be skipped
+        label by label; qtype and qclass take four more bytes.
+        """
+        pos = cls.SIZE
+        while True:
+            if pos >= len(data):
+                raise ValueError("Truncated question name")
+            length = data[pos]
+            if length & 0xC0:
+                raise ValueError("Unexpected compressed or extended label in question")
+            pos += 1 + length
+            if not length:
+                break
+        if pos + 4 > len(data):
+            raise ValueError("Truncated question type or class")
+        return pos + 4
+
+    def empty_response(
+        self, data: bytes, truncated: bool = False, servfail: bool = False
+    ) -> bytes:
+        """Build empty response to request data, echoing its question."""
+        if self.flags & self.QR or self.qdcount != 1:
+            raise ValueError("Not a query with exactly one question")
+        end = self.question_end(data)
+        flags = self.QR | (self.flags & (self.OPCODE_MASK | self.RD))
+        if truncated:
+            flags |= self.TC
+        if servfail:
+            flags |= self.SERVFAIL
+        header = struct.pack(self.FORMAT, self.id, flags, 1, 0, 0, 0)
+        return header + data[self.SIZE : end]
@@ -0,0 +1,143 @@
+"""Module for controlling garbage collection pauses caused by the node pool."""
+
+import gc
+import logging as log
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Iterator
+
+
+@dataclass
+class GCController:
+    """Class keeping the cyclic garbage collector away from the node pool.
+
+    The node pool consists of hundreds of thousands of long-lived objects,
+    which full (generation 2) collections would otherwise traverse again and
+    again while holding the GIL, stalling the serving threads. Therefore:
+
+    1. Before an ingest, the objects frozen after the previous update are
+       unfrozen and one deliberate full collection reclaims cyclic garbage,
+       including cycles left over from pools replaced since. Frozen objects
+       are never collected, so without unfreezing such cycles would leak.
+       This collection traverses the current pool once per update.
+    2. During the ingest, which allocates the new pool in bulk, only young
+       collections run, with a raised generation 0 threshold; the new pool
+       is never traversed by a full collection.
+    3. After the new pool has been published, all surviving objects are
+       moved to the permanent generation using gc.freeze(), which does not
+       traverse them either. Later collections skip them; frozen objects are
+       still freed by reference counting once the pool is replaced, whereas
+       cyclic garbage among them waits for the next ingest (step 1). The
+       number of frozen objects is logged, so unexpected growth across
+       updates shows.
+
+    Every collection is timed using gc.callbacks; pause statistics per
+    generation are logged after each pool update.
+    """
+
+    freeze: bool = True
+    ingest_threshold: int = 100_000  # generation 0 threshold during ingests
+    _start: float = 0.0
+    _settling: bool = False
+    _frozen: int = 0  # objects frozen after the previous update
+    # generation -> [collections, total pause, max pause]
+    _pauses: dict[int, list[float]] = field(init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    GENERATIONS: ClassVar[tuple[int, ...]] = (0, 1, 2)
+    UNLIMITED: ClassVar[int] = 2**31 - 1  # threshold disabling older collections
+
+    def __post_init__(self):
+        self.reset_pauses()
+
+    def install(self):
+        """Start timing garbage collections."""
+        gc.callbacks.append(self.callback)
+        log.info(
+            "Installed GC control (freeze=%s, ingest_threshold=%d, thresholds=%s)",
+            self.freeze,
+            self.ingest_threshold,
+            gc.get_threshold(),
+        )
+
+    def callback(self, phase: str, info: dict[str, Any]):
+        """Time collection; called by the garbage collector."""
+        if phase == "start":
+            self._start = time.perf_counter()
+            return
+        if self._settling:
+            return
+        pause = time.perf_counter() - self._start
+        stats = self._pauses[info["generation"]]
+        stats[0] += 1
+        stats[1] += pause
+        stats[2] = max(stats[2], pause)
+
+    @contextmanager
+    def ingest(self) -> Iterator[None]:
+        """Collect garbage, then only run young collections while building a pool."""
+        with self._lock:
+            if self.freeze:
+                gc.unfreeze()
+            self.collect()
+            thresholds = gc.get_threshold()
+            gc.set_threshold(
+                max(self.ingest_threshold, thresholds[0]),
+                self.UNLIMITED,
+                self.UNLIMITED,
+            )
+            try:
+                yield
+            finally:
+                gc.set_threshold(*thresholds)
+        self.settle()
+
+    def collect(self):
+        """Collect garbage deliberately; lock must be held."""
+        start = time.perf_counter()
+        self._settling = True
+        try:
+            collected = gc.collect()
+        finally:
+            self._settling = False
+        log.debug(
+            "Collected %d object(s) in %.3fs", collected, time.perf_counter() - start
+        )
+
+    def settle(self):
+        """Freeze surviving objects after a pool update and log GC pauses."""
+        with self._lock:
+            if self.freeze:
+                gc.freeze()
+            frozen = gc.get_freeze_count()
+            log.info(
+                "Settled GC after pool update: frozen=%d (%+d), thresholds=%s",
+                frozen,
+                frozen - self._frozen,
+                gc.get_threshold(),
+            )
+            self._frozen = frozen
+            self.log_pauses()
+
+    def log_pauses(self):
+        """Log pause statistics since the previous pool update and reset them."""
+        log.info(
+            "GC pauses since last update: %s",
+            ", ".join(
+                f"gen{gen}=(count={int(n)}, total={total:.3f}s, max={longest:.4f}s)"
+                for gen, (n, total, longest) in self._pauses.items()
+            ),
+        )
+        self.reset_pauses()
+
+    def reset_pauses(self):
+        """Reset pause statistics."""
+        self._pauses = {gen: [0, 0.0, 0.0] for gen in self.GENERATIONS}
+
+    def stats(self) -> dict[int, tuple[int, float, float]]:
+        """Get (collections, total pause, max pause) per generation, in seconds."""
+        return {
+            gen: (int(n), total, longest)
+            for gen, (n, total, longest) in self._pauses.items()
+        }
@@ -1,9 +1,19 @@
 """Module for node-realted classes."""
 
 from .node import Node
+from .pool import NodePool
+from .prober import LivenessProber
+from .quality import QualityScorer
+from .reader import CrawlerDataReader
 from .services import Services
+from .window import SnapshotWindow
 
 __all__ = [
+    "CrawlerDataReader",
+    "LivenessProber",
     "Node",
+    "NodePool",
+    "QualityScorer",
     "Services",
+    "SnapshotWindow",
 ]
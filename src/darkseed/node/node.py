@@ -1,5 +1,6 @@
 """Module for the Node class."""
 
+import copy
 from functools import cached_property
 
 from darkseed.address import Address
@@ -8,16 +9,23 @@ from darkseed.address import Address
 class Node:
     """Class representing a Bitcoin node."""
 
-    def __init__(self, address: str, port: int, services: int):
+    def __init__(self, address: str, port: int, services: int, quality: float = 1.0):
         self.address = Address(address)
         self.port = port
         self.services = services
+        self.quality = quality
 
     @cached_property
     def net_type(self):
         """Get node's network type from address."""
         return self.address.net_type
 
+    def with_quality(self, quality: float) -> "Node":
+        """Get copy of node with the given quality, sharing its parsed address."""
+        node = copy.copy(self)
+        node.quality = quality
+        return node
+
     def has_services(self, services: int) -> bool:
         """Check if the node has the required services enabled."""
         return self.services & services == services
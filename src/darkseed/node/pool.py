@@ -0,0 +1,68 @@
+"""Module for immutable, versioned snapshots of the served node pool."""
+
+import logging as log
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Mapping
+
+from darkseed.address import NetworkType
+from darkseed.selection import Selector
+
+from .node import Node
+
+
+@dataclass(frozen=True, eq=False)
+class NodePool:
+    """Class holding one published version of the node pool.
+
+    A pool is never modified after it has been published: the ingester builds
+    a new pool (nodes and selectors per network) and publishes it by swapping
+    a single reference. Readers pin the current pool once per request, so all
+    networks of a multi-network answer come from the same version even if a
+    new pool is published mid-query.
+
+    Pools do not reference each other, so a replaced pool is freed by
+    reference counting as soon as the last request pinning it completes.
+    """
+
+    version: int
+    source: str  # name of the crawler data file the pool was built from
+    net_to_nodes: Mapping[NetworkType, tuple[Node, ...]]
+    net_to_selector: Mapping[NetworkType, Selector[Node]]
+    ingested: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def __post_init__(self):
+        # read-only views, so a pinned pool cannot be modified by readers
+        object.__setattr__(self, "net_to_nodes", MappingProxyType(self.net_to_nodes))
+        object.__setattr__(
+            self, "net_to_selector", MappingProxyType(self.net_to_selector)
+        )
+        if self.version:
+            weakref.finalize(self, log.debug, "Reclaimed node pool v%d", self.version)
+
+    @classmethod
+    def empty(cls) -> "NodePool":
+        """Create pool served before the first ingest."""
+        return cls(0, "", {}, {})
+
+    def __len__(self) -> int:
+        return sum(len(nodes) for nodes in self.net_to_nodes.values())
+
+    def __str__(self) -> str:
+        return f"v{self.version} (source={self.source or None}, size={len(self)})"
+
+    def nodes(self) -> list[Node]:
+        """Get nodes of all networks."""
+        return [node for nodes in self.net_to_nodes.values() for node in nodes]
+
+    def available(self, net: NetworkType) -> int:
+        """Get number of nodes of network."""
+        selector = self.net_to_selector.get(net)
+        return len(selector) if selector else 0
+
+    def sample(self, net: NetworkType, k: int) -> list[Node]:
+        """Select up to k distinct nodes of network."""
+        selector = self.net_to_selector.get(net)
+        return selector.sample(k) if selector else []
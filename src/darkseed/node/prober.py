@@ -0,0 +1,229 @@
+"""Module for probing the liveness of served nodes between crawls."""
+
+import asyncio
+import hashlib
+import logging as log
+import os
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from darkseed.address import NetworkType
+
+from .node import Node
+
+
+@dataclass
+class LivenessProber:
+    """Class re-checking whether nodes are still reachable.
+
+    Nodes are probed concurrently using asyncio, either by opening a TCP
+    connection (mode=connect) or by additionally sending a Bitcoin version
+    message and waiting for the peer's version message (mode=handshake).
+    Only networks configured as reachable from this host are probed, either
+    directly or via a SOCKS5 proxy configured for the network (e.g., Tor for
+    onion and i2pd for I2P); nodes of other networks are never pruned.
+
+    Probes are started at no more than `rate` per second with at most
+    `concurrency` probes in flight. A node is reported dead once it failed
+    `max_failures` consecutive probes, so a single lost connection does not
+    remove it from the pool. If more than max_failure_ratio of a network's
+    probes fail in a round, e.g., due to a local outage or a broken proxy, the
+    round is disregarded for that network instead of pruning it.
+    """
+
+    mode: str = "connect"
+    interval: int = 300  # seconds between probe rounds
+    # networks probed directly, in addition to those with a proxy
+    networks: frozenset[NetworkType] = frozenset({NetworkType.IPV4})
+    # host:port of SOCKS5 proxy per network
+    proxies: dict[NetworkType, str] = field(default_factory=dict)
+    timeout: float = 10.0  # seconds
+    concurrency: int = 256
+    rate: float = 100.0  # probes started per second
+    max_failures: int = 2
+    max_failure_ratio: float = 0.5
+    _failures: Counter[str] = field(default_factory=Counter)
+    MODES: ClassVar[tuple[str, ...]] = ("connect", "handshake")
+    # networks that cannot be reached without a proxy
+    PROXIED_NETWORKS: ClassVar[tuple[NetworkType, ...]] = (
+        NetworkType.ONION_V3,
+        NetworkType.I2P,
+    )
+    MAINNET_MAGIC: ClassVar[bytes] = bytes.fromhex("f9beb4d9")
+    PROTOCOL_VERSION: ClassVar[int] = 70016
+    USER_AGENT: ClassVar[bytes] = b"/darkseed-prober/"
+
+    def __post_init__(self):
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unsupported probe mode: {self.mode}")
+        unreachable = set(self.networks) & set(self.PROXIED_NETWORKS)
+        if unreachable - set(self.proxies):
+            raise ValueError(
+                "Probing onion and I2P nodes requires a proxy: "
+                + ", ".join(str(n) for n in unreachable - set(self.proxies))
+            )
+
+    @property
+    def probed_networks(self) -> frozenset[NetworkType]:
+        """Get networks whose nodes are probed."""
+        return self.networks | frozenset(self.proxies)
+
+    def probeable(self, node: Node) -> bool:
+        """Check whether node can be probed with the current configuration."""
+        return node.net_type in self.probed_networks
+
+    def run(self, nodes: list[Node]) -> set[str]:
+        """Probe nodes; return addresses of nodes considered dead."""
+        start = time.monotonic()
+        targets = [node for node in nodes if self.probeable(node)]
+        results = asyncio.run(self.probe_all(targets))
+
+        probed: Counter[NetworkType] = Counter(node.net_type for node in targets)
+        failed: Counter[NetworkType] = Counter(
+            node.net_type for node, alive in zip(targets, results) if not alive
+        )
+        skipped = {
+            net
+            for net, count in failed.items()
+            if count > self.max_failure_ratio * probed[net]
+        }
+        for net in skipped:
+            log.warning(
+                "Not pruning %s nodes: %d of %d probes failed (max_failure_ratio=%.2f)",
+                net,
+                failed[net],
+                probed[net],
+                self.max_failure_ratio,
+            )
+
+        dead = set()
+        failures: Counter[str] = Counter()
+        for node, alive in zip(targets, results):
+            address = node.address.address
+            if alive:
+                continue
+            if node.net_type in skipped:
+                # disregard round, keeping failures of previous rounds
+                if address in self._failures:
+                    failures[address] = self._failures[address]
+                continue
+            # forget nodes that are no longer served or answered this time
+            failures[address] = self._failures[address] + 1
+            if failures[address] >= self.max_failures:
+                dead.add(address)
+        self._failures = failures
+        log.info(
+            "Probed nodes: total=%d, probed=%d, alive=%d, failed=%d, dead=%d, time=%.1fs",
+            len(nodes),
+            len(targets),
+            sum(results),
+            len(targets) - sum(results),
+            len(dead),
+            time.monotonic() - start,
+        )
+        return dead
+
+    async def probe_all(self, nodes: list[Node]) -> list[bool]:
+        """Probe nodes concurrently, respecting rate and concurrency limits."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _probe(i: int, node: Node) -> bool:
+            await asyncio.sleep(i / self.rate)
+            async with semaphore:
+                return await self.probe(node)
+
+        return await asyncio.gather(*(_probe(i, n) for i, n in enumerate(nodes)))
+
+    async def probe(self, node: Node) -> bool:
+        """Probe single node; return whether it is alive."""
+        writer = None
+        try:
+            async with asyncio.timeout(self.timeout):
+                reader, writer = await self.connect(node)
+                if self.mode == "handshake":
+                    await self.handshake(reader, writer)
+            return True
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            log.debug("Probe failed (node=%s): %r", node.address.address, e)
+            return False
+        finally:
+            if writer:
+                writer.close()
+
+    async def connect(
+        self, node: Node
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open connection to node, via SOCKS5 proxy if configured for its network."""
+        proxy = self.proxies.get(node.net_type)
+        if proxy is None:
+            return await asyncio.open_connection(node.address.address, node.port)
+        proxy_host, proxy_port = proxy.rsplit(":", 1)
+        reader, writer = await asyncio.open_connection(proxy_host, int(proxy_port))
+        try:
+            await self.socks5_connect(reader, writer, node.address.address, node.port)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def socks5_connect(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int
+    ):
+        """Ask SOCKS5 proxy to connect to host:port (RFC 1928, no auth)."""
+        writer.write(b"\x05\x01\x00")
+        if await reader.readexactly(2) != b"\x05\x00":
+            raise ConnectionError("SOCKS5 proxy rejected authentication method")
+        name = host.encode()
+        writer.write(
+            b"\x05\x01\x00\x03" + bytes([len(name)]) + name + port.to_bytes(2, "big")
+        )
+        _, status, _, address_type = await reader.readexactly(4)
+        if status:
+            raise ConnectionError(f"SOCKS5 proxy failed to connect (status={status})")
+        match address_type:
+            case 1:  # IPv4
+                await reader.readexactly(4 + 2)
+            case 4:  # IPv6
+                await reader.readexactly(16 + 2)
+            case 3:  # domain name
+                (size,) = await reader.readexactly(1)
+                await reader.readexactly(size + 2)
+            case _:
+                raise ConnectionError(f"Unknown SOCKS5 address type: {address_type}")
+
+    async def handshake(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Send version message and wait for the peer's version message."""
+        writer.write(self.version_message())
+        await writer.drain()
+        header = await reader.readexactly(24)
+        magic, command = header[:4], header[4:16].rstrip(b"\x00")
+        if magic != self.MAINNET_MAGIC or command != b"version":
+            raise ValueError(f"Unexpected reply to version message: {header.hex()}")
+
+    @classmethod
+    def version_message(cls) -> bytes:
+        """Build Bitcoin P2P version message with empty addresses."""
+        empty_address = struct.pack("<Q", 0) + bytes(16) + struct.pack(">H", 0)
+        payload = (
+            struct.pack("<iQq", cls.PROTOCOL_VERSION, 0, int(time.time()))
+            + empty_address
+            + empty_address
+            + os.urandom(8)  # nonce
+            + bytes([len(cls.USER_AGENT)])
+            + cls.USER_AGENT
+            + struct.pack("<i?", 0, False)  # start height, relay
+        )
+        checksum = hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+        header = (
+            cls.MAINNET_MAGIC
+            + b"version".ljust(12, b"\x00")
+            + struct.pack("<I", len(payload))
+            + checksum
+        )
+        return header + payload
@@ -0,0 +1,79 @@
+"""Module for scoring node quality based on crawler data."""
+
+import logging as log
+from dataclasses import dataclass
+from typing import Any
+
+from .services import Services
+
+
+@dataclass(frozen=True)
+class QualityScorer:
+    """Class computing a per-node quality score from a crawler data row.
+
+    The score is the product of three factors, each in (0, 1]:
+
+    1. Latency: latency_scale / (latency_scale + latency), so a node answering
+       within latency_scale seconds scores at least 0.5
+    2. Protocol version: 1 if version >= min_version, else old_version_factor
+    3. Services: 1 if the node provides SEEDS_SERVICES, else limited_factor
+
+    Columns that are missing or empty in the crawler data leave the
+    corresponding factor at 1. The score is floored at min_score so that every
+    viable node keeps a non-zero chance of being selected.
+
+    If appearance_exponent is positive, the score can additionally be scaled
+    by (appearances / snapshots) ** appearance_exponent, where appearances is
+    the number of recent crawler snapshots a node appeared in (see
+    SnapshotWindow), so that nodes reachable in every crawl are preferred.
+    """
+
+    latency_column: str = "latency"
+    version_column: str = "version"
+    latency_scale: float = 1.0
+    min_version: int = 70016
+    old_version_factor: float = 0.5
+    limited_factor: float = 0.5
+    min_score: float = 0.01
+    appearance_exponent: float = 0.0
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Get crawler data columns used for scoring."""
+        return (self.latency_column, self.version_column, "services")
+
+    @staticmethod
+    def _get_float(row: dict[str, Any], column: str) -> float | None:
+        """Get float value of column, or None if missing or malformed."""
+        value = row.get(column)
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            log.debug("Ignoring malformed value for column %s: %s", column, value)
+            return None
+
+    def score(self, row: dict[str, Any]) -> float:
+        """Compute quality score for a crawler data row."""
+        score = 1.0
+        latency = self._get_float(row, self.latency_column)
+        if latency is not None and latency >= 0:
+            score *= self.latency_scale / (self.latency_scale + latency)
+        version = self._get_float(row, self.version_column)
+        if version is not None and version < self.min_version:
+            score *= self.old_version_factor
+        services = int(row["services"])
+        if services & Services.SEEDS_SERVICES != Services.SEEDS_SERVICES:
+            score *= self.limited_factor
+        return max(score, self.min_score)
+
+    def scale(self, score: float, appearances: int, snapshots: int) -> float:
+        """Scale score of node that appeared in appearances of snapshots snapshots.
+
+        Nodes not seen in any snapshot, e.g., pushed ones, count as seen once.
+        """
+        if self.appearance_exponent <= 0 or snapshots <= 1:
+            return score
+        ratio = min(max(appearances, 1) / snapshots, 1.0)
+        return max(score * ratio**self.appearance_exponent, self.min_score)
@@ -0,0 +1,130 @@
+"""Module for reading crawler data stored in various file formats."""
+
+import bz2
+import csv
+import gzip
+import importlib.util
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, ClassVar, Iterator, Sequence
+
+
+@dataclass(frozen=True)
+class CrawlerDataReader:
+    """Class reading rows of reachable nodes files in any supported format.
+
+    Supported formats are CSV (uncompressed, or compressed using bzip2, gzip
+    or zstd) as well as the columnar formats Parquet and Arrow IPC. Only the
+    requested columns are extracted: columnar files never read the others
+    from disk, and CSV rows are not turned into dictionaries of all columns.
+
+    zstd requires the zstandard package, and the columnar formats require the
+    pyarrow package; both are imported only when such a file is read. Files
+    whose package is not installed are not available (see available()).
+    """
+
+    # in order of preference if a crawl is available in several formats
+    SUFFIXES: ClassVar[tuple[str, ...]] = (
+        ".parquet",
+        ".arrow",
+        ".csv",
+        ".csv.zst",
+        ".csv.gz",
+        ".csv.bz2",
+    )
+    # optional packages required to read formats
+    REQUIREMENTS: ClassVar[dict[str, str]] = {
+        ".parquet": "pyarrow",
+        ".arrow": "pyarrow",
+        ".csv.zst": "zstandard",
+    }
+    PATTERN: ClassVar[str] = "*_reachable_nodes.*"
+    BATCH_SIZE: ClassVar[int] = 16384  # rows converted at once for columnar files
+
+    @classmethod
+    def get_suffix(cls, path: Path | str) -> str | None:
+        """Get format suffix of reachable nodes file, or None if unsupported."""
+        name = Path(path).name
+        for suffix in cls.SUFFIXES:
+            if name.endswith(f"_reachable_nodes{suffix}"):
+                return suffix
+        return None
+
+    @classmethod
+    def available(cls, path: Path | str) -> bool:
+        """Check whether file is supported and its optional package installed."""
+        suffix = cls.get_suffix(path)
+        if suffix is None:
+            return False
+        package = cls.REQUIREMENTS.get(suffix)
+        return package is None or importlib.util.find_spec(package) is not None
+
+    @classmethod
+    def preference(cls, path: Path | str) -> int:
+        """Get preference of file's format; lower is preferred."""
+        return cls.SUFFIXES.index(cls.get_suffix(path) or "")
+
+    @classmethod
+    def read(cls, path: Path | str, columns: Sequence[str]) -> Iterator[dict[str, Any]]:
+        """Read columns of all rows; columns missing in the file are omitted.
+
+        Values are strings for CSV files and native types for columnar files.
+        """
+        path = Path(path)
+        suffix = cls.get_suffix(path)
+        columns = list(dict.fromkeys(columns))
+        if suffix in (".parquet", ".arrow"):
+            yield from cls.read_columnar(path, suffix, columns)
+            return
+        with cls.open_csv(path, suffix) as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            indices = [(c, header.index(c)) for c in columns if c in header]
+            for row in reader:
+                yield {column: row[index] for column, index in indices}
+
+    @staticmethod
+    def open_csv(path: Path, suffix: str | None) -> IO[str]:
+        """Open (compressed) CSV file for reading text."""
+        match suffix:
+            case ".csv.bz2":
+                return bz2.open(path, "rt", newline="")
+            case ".csv.gz":
+                return gzip.open(path, "rt", newline="")
+            case ".csv":
+                return open(path, "rt", newline="", encoding="utf-8")
+            case ".csv.zst":
+                try:
+                    import zstandard  # pylint: disable=import-outside-toplevel
+                except ImportError as e:
+                    raise ImportError(
+                        f"Reading {path.name} requires the zstandard package"
+                    ) from e
+                # pylint: disable-next=consider-using-with
+                stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+                return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        raise ValueError(f"Unsupported crawler data file: {path}")
+
+    @staticmethod
+    def read_columnar(
+        path: Path, suffix: str, columns: Sequence[str]
+    ) -> Iterator[dict[str, Any]]:
+        """Read columns of Parquet or Arrow IPC file, batch by batch."""
+        # pylint: disable=import-outside-toplevel
+        try:
+            import pyarrow.dataset
+        except ImportError as e:
+            raise ImportError(
+                f"Reading {path.name} requires the pyarrow package"
+            ) from e
+
+        file_format = "parquet" if suffix == ".parquet" else "ipc"
+        dataset = pyarrow.dataset.dataset(path, format=file_format)
+        present = [c for c in columns if c in dataset.schema.names]
+        for batch in dataset.to_batches(
+            columns=present, batch_size=CrawlerDataReader.BATCH_SIZE
+        ):
+            values = [batch.column(c).to_pylist() for c in present]
+            for row in zip(*values):
+                yield dict(zip(present, row))
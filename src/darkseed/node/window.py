@@ -0,0 +1,163 @@
+"""Module for merging node data from a window of recent crawler snapshots."""
+
+import logging as log
+import sys
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from .node import Node
+
+
+@dataclass
+class SnapshotWindow:
+    """Class maintaining a merged node pool over recent crawler snapshots.
+
+    Each node is kept along with the timestamp of the latest snapshot it
+    appeared in (last seen). A node expires once it has not been seen in any
+    of the last max_snapshots snapshots or, if max_age is set, for longer than
+    max_age before the newest snapshot. This prevents a single crawl that
+    missed part of the network from shrinking the served pool.
+
+    Snapshots are merged incrementally: entries are kept ordered by last-seen
+    time, so merging a snapshot costs O(snapshot size) and expiring nodes
+    costs O(expired nodes), independent of the window size. The merged pool
+    never exceeds the union of the snapshots in the window.
+
+    If count_appearances is set, the window also counts in how many of its
+    snapshots each node appeared, e.g., to score nodes by stability. This
+    keeps the addresses of every snapshot in the window, so it is optional.
+    """
+
+    max_snapshots: int = 1
+    max_age: timedelta | None = None
+    count_appearances: bool = False
+    # address -> (node, last seen), ordered by last seen (oldest first)
+    _entries: OrderedDict[str, tuple[Node, datetime]] = field(
+        default_factory=OrderedDict
+    )
+    _timestamps: deque[datetime] = field(default_factory=deque)
+    # addresses of each snapshot in _timestamps, if counting appearances
+    _snapshot_addresses: deque[list[str]] = field(default_factory=deque)
+    _appearances: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.max_snapshots < 1:
+            raise ValueError(f"Invalid snapshot window: {self.max_snapshots}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def latest(self) -> datetime | None:
+        """Timestamp of the newest merged snapshot."""
+        return self._timestamps[-1] if self._timestamps else None
+
+    @property
+    def snapshots(self) -> int:
+        """Number of snapshots in the window."""
+        return len(self._timestamps)
+
+    def appearances(self, address: str) -> int:
+        """Get number of snapshots in the window containing the address.
+
+        Always 0 unless count_appearances is set.
+        """
+        return self._appearances.get(address, 0)
+
+    def last_seen(self, address: str) -> datetime | None:
+        """Get timestamp of the latest snapshot containing the address."""
+        entry = self._entries.get(address)
+        return entry[1] if entry else None
+
+    def nodes(self) -> list[Node]:
+        """Get merged pool."""
+        return [node for node, _ in self._entries.values()]
+
+    def add(self, nodes: list[Node]):
+        """Add nodes, e.g., nodes pushed by the crawler, to the latest snapshot.
+
+        Added nodes expire along with the latest snapshot, i.e., as if they had
+        been part of it. Before the first snapshot, they are considered seen now
+        until the first snapshot is merged (see restamp).
+        """
+        last_seen = self.latest or datetime.now(timezone.utc).replace(tzinfo=None)
+        for node in nodes:
+            address = node.address.address
+            self._entries[address] = (node, last_seen)
+            self._entries.move_to_end(address)
+
+    def discard(self, addresses: set[str]):
+        """Remove nodes, e.g., nodes found to be unreachable, from the window."""
+        for address in addresses:
+            self._entries.pop(address, None)
+
+    def restamp(self, timestamp: datetime):
+        """Consider nodes seen after timestamp as seen at timestamp.
+
+        Only nodes added before the first snapshot, which are considered seen
+        when added, can be newer than a snapshot being merged. They become
+        part of that snapshot, which keeps entries ordered by last seen time.
+        """
+        newer = []
+        for address in reversed(self._entries):
+            if self._entries[address][1] <= timestamp:
+                break
+            newer.append(address)
+        for address in newer:
+            self._entries[address] = (self._entries[address][0], timestamp)
+
+    def merge(self, nodes: list[Node], timestamp: datetime) -> list[Node]:
+        """Merge snapshot taken at timestamp, expire stale nodes, return merged pool."""
+        if self.latest and timestamp <= self.latest:
+            raise ValueError(f"Snapshot {timestamp} is not newer than {self.latest}")
+        start = time.perf_counter()
+        self.restamp(timestamp)
+        for node in nodes:
+            address = node.address.address
+            self._entries[address] = (node, timestamp)
+            self._entries.move_to_end(address)
+        self._timestamps.append(timestamp)
+        if self.count_appearances:
+            self.count(nodes)
+        if len(self._timestamps) > self.max_snapshots:
+            self._timestamps.popleft()
+
+        cutoff = self._timestamps[0]
+        if self.max_age is not None:
+            cutoff = max(cutoff, timestamp - self.max_age)
+        expired = 0
+        while self._entries:
+            address, (_, last_seen) = next(iter(self._entries.items()))
+            if last_seen >= cutoff:
+                break
+            del self._entries[address]
+            expired += 1
+
+        merged = self.nodes()
+        log.info(
+            "Merged snapshot %s: snapshot=%d, merged=%d, expired=%d, snapshots=%d, "
+            "index_size=%.1fKiB, time=%.3fs",
+            timestamp.isoformat(),
+            len(nodes),
+            len(merged),
+            expired,
+            len(self._timestamps),
+            sys.getsizeof(self._entries) / 2**10,
+            time.perf_counter() - start,
+        )
+        return merged
+
+    def count(self, nodes: list[Node]):
+        """Count appearances of latest snapshot's nodes, forget expired snapshot's."""
+        addresses = [node.address.address for node in nodes]
+        for address in addresses:
+            self._appearances[address] = self._appearances.get(address, 0) + 1
+        self._snapshot_addresses.append(addresses)
+        if len(self._snapshot_addresses) > self.max_snapshots:
+            for address in self._snapshot_addresses.popleft():
+                if self._appearances[address] > 1:
+                    self._appearances[address] -= 1
+                else:
+                    del self._appearances[address]
@@ -1,19 +1,34 @@
 """Module for handling reachable nodes data."""
 
-import bz2
-import csv
 import logging as log
-import random
 import threading
 import time
 from collections import defaultdict
-from dataclasses import dataclass
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import ClassVar
+from typing import Callable, ClassVar, Sequence, TypeVar
 
 from darkseed.address import NetworkType
-from darkseed.node import Node
+from darkseed.gc_control import GCController
+from darkseed.node import (
+    CrawlerDataReader,
+    LivenessProber,
+    Node,
+    NodePool,
+    QualityScorer,
+    SnapshotWindow,
+)
+from darkseed.selection import (
+    AliasTable,
+    BucketSelector,
+    Selector,
+    ShuffledCursor,
+    UniformSelector,
+)
+
+T = TypeVar("T")
 
 
 @dataclass(unsafe_hash=True)
@@ -21,21 +36,74 @@ class NodeManager(threading.Thread):
     """Class that manages node data, including:
 
     1. Periodically checking for new node data
-    2. Providing node data to DNS server
+    2. Merging node data over a window of recent snapshots
+    3. Optionally probing served nodes between crawls and pruning dead ones
+    4. Providing node data to DNS server
+
+    Node data is published as an immutable, versioned NodePool, which DNS
+    requests pin once so that each answer is built from a single version.
+    Nodes are selected by a per-network selector that is rebuilt once per
+    ingest, so each query costs O(k). Supported selection modes are:
+
+    - uniform: distinct nodes uniformly at random
+    - weighted: proportionally to node quality scores, using alias tables
+    - cursor: consecutive windows of a shuffled pool, so that every node is
+      served once before any node is served again
+
+    With netgroup diversity, nodes are grouped into netgroups (see
+    Address.netgroup) at ingest and each answer contains at most one node per
+    netgroup: netgroups are selected using the selection mode (weighted by the
+    total quality of their nodes), and a node is selected from each netgroup
+    using the selection mode as well. In cursor mode, exposure is hence even
+    across netgroups rather than nodes.
     """
 
     path: Path
     refresh: int = 600  # refresh frequency in seconds. default: ten minutes
+    selection: str = "uniform"
+    netgroup_diversity: bool = False
+    scorer: QualityScorer = QualityScorer()
+    window: SnapshotWindow = field(
+        default_factory=SnapshotWindow, hash=False, compare=False
+    )
+    prober: LivenessProber | None = field(default=None, hash=False, compare=False)
+    gc_control: GCController | None = field(default=None, hash=False, compare=False)
+    # called after every node pool update
+    _listeners: list[Callable[[], None]] = field(
+        default_factory=list, hash=False, compare=False
+    )
+    # serializes ingests and pruning, which both modify window and pool
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, hash=False, compare=False
+    )
+    # set once the first node pool is published
+    _published: threading.Event = field(
+        default_factory=threading.Event, hash=False, compare=False
+    )
     _previous_data_file: Path = Path()
-    NET_TO_NODES: ClassVar[dict[NetworkType, list[Node]]] = {}
+    POOL: ClassVar[NodePool] = NodePool.empty()
+    SELECTION_MODES: ClassVar[tuple[str, ...]] = ("uniform", "weighted", "cursor")
     MAINNET_PORT: ClassVar[int] = 8333
+    COLUMNS: ClassVar[tuple[str, ...]] = (
+        "network",
+        "port",
+        "handshake_successful",
+        "host",
+        "services",
+    )
 
     def __post_init__(self):
         super().__init__(name=self.__class__.__name__)
+        if self.selection not in self.SELECTION_MODES:
+            raise ValueError(f"Unsupported selection mode: {self.selection}")
 
     def run(self):
         log.info("Started NodeLoader thread.")
         self.get_latest_data()
+        if self.prober:
+            threading.Thread(
+                target=self.probe_forever, name="NodeProber", daemon=True
+            ).start()
 
         while True:
             log.debug("Sleeping for %d seconds", self.refresh)
@@ -43,50 +111,81 @@ class NodeManager(threading.Thread):
             self.get_latest_data()
             log.debug("Waking after %d seconds", self.refresh)
 
-    def get_latest_file(self):
-        """Get latest reachable nodes file."""
-        log.debug("Attempting to fetch reachable node data from %s", self.path)
-        node_files = self.path.glob("*_reachable_nodes.csv.bz2")
+    @staticmethod
+    def get_timestamp(file: Path) -> datetime:
+        """Get crawl timestamp from reachable nodes file name."""
+        timestamp_str = file.name.split("_")[0]
+        return datetime.strptime(timestamp_str, "%Y-%m-%dT%H-%M-%SZ")
 
-        def get_timestamp(file):
-            timestamp_str = file.name.split("_")[0]
-            return datetime.strptime(timestamp_str, "%Y-%m-%dT%H-%M-%SZ")
+    def get_data_files(self) -> list[Path]:
+        """Get reachable nodes files, sorted from oldest to newest.
 
-        latest_file = max(node_files, key=get_timestamp, default=None)
-        if not latest_file:
+        If a crawl is available in several formats, only the preferred one is
+        returned (see CrawlerDataReader). Formats requiring an optional package
+        that is not installed are skipped.
+        """
+        log.debug("Attempting to fetch reachable node data from %s", self.path)
+        timestamp_to_file: dict[datetime, Path] = {}
+        for file in self.path.glob(CrawlerDataReader.PATTERN):
+            if CrawlerDataReader.get_suffix(file) is None:
+                continue
+            if not CrawlerDataReader.available(file):
+                log.debug("Skipping %s: required package not installed", file.name)
+                continue
+            timestamp = self.get_timestamp(file)
+            other = timestamp_to_file.get(timestamp)
+            if other is None or CrawlerDataReader.preference(
+                file
+            ) < CrawlerDataReader.preference(other):
+                timestamp_to_file[timestamp] = file
+        if not timestamp_to_file:
             raise ValueError(f"No crawler data found in {self.path}!")
-        return latest_file
+        return [timestamp_to_file[t] for t in sorted(timestamp_to_file)]
+
+    def get_latest_file(self):
+        """Get latest reachable nodes file."""
+        return self.get_data_files()[-1]
+
+    @staticmethod
+    def has_default_port(net: str, port: int) -> bool:
+        """Check whether node uses the default port of its network (0 for i2p)."""
+        if net == "i2p":
+            return port == 0
+        return port == NodeManager.MAINNET_PORT
 
     @staticmethod
-    def read_data_file(data_file):
-        """Read bz2-compressed crawler data, filter nodes using a non-standard port, output statistics."""
+    def read_data_file(data_file: Path | str, scorer: QualityScorer | None = None):
+        """Read crawler data, filter nodes using a non-standard port, output statistics.
+
+        Only the columns needed are read. If a scorer is given, each node is
+        assigned a quality score computed from its crawler data row.
+        """
         nodes = []
         counter = defaultdict(int)
-        with bz2.open(data_file, "rt") as file:
-            reader = csv.DictReader(file)  # type: ignore
-            rows = list(reader)
-        for row in rows:
+        columns = NodeManager.COLUMNS + (scorer.columns if scorer else ())
+        start = time.perf_counter()
+        for row in CrawlerDataReader.read(data_file, columns):
             counter["total"] += 1
             net, port = row["network"], int(row["port"])
-            if (net != "i2p" and port != NodeManager.MAINNET_PORT) or (
-                net == "i2p" and port != 0
-            ):
-                if row["network"] == "i2p":
-                    print(f"discarding i2p node with port {row['port']}")
+            if not NodeManager.has_default_port(net, port):
+                if net == "i2p":
+                    log.debug("Discarding i2p node with port %s", port)
                 counter["bad_port"] += 1
                 continue
-            handshake = row["handshake_successful"].lower() == "true"
+            handshake = str(row["handshake_successful"]).lower() == "true"
             if not handshake:
                 counter["incomplete_handshake"] += 1
                 continue
             counter["good"] += 1
-            node = Node(row["host"], port, int(row["services"]))
-            assert str(node.net_type) == row["network"], "Error detecting network type!"
+            quality = scorer.score(row) if scorer else 1.0
+            node = Node(row["host"], port, int(row["services"]), quality)
+            assert str(node.net_type) == net, "Error detecting network type!"
             nodes.append(node)
         log.info(
-            "Extracted %d viable nodes from %s (total=%d, bad_port=%d, incomplete_handshake=%d)",
+            "Extracted %d viable nodes from %s in %.3fs (total=%d, bad_port=%d, incomplete_handshake=%d)",
             counter["good"],
             data_file,
+            time.perf_counter() - start,
             counter["total"],
             counter["bad_port"],
             counter["incomplete_handshake"],
@@ -94,34 +193,189 @@ class NodeManager(threading.Thread):
         return nodes
 
     def get_latest_data(self):
-        """Get latest reachable nodes data."""
+        """Get latest reachable nodes data.
+
+        Merge all files newer than the last merged one (limited to the window
+        size) into the snapshot window, then update the node pool.
+        """
 
-        data_file = self.get_latest_file()
-        if data_file == self._previous_data_file:
+        latest = self.window.latest
+        new_files = [
+            f
+            for f in self.get_data_files()
+            if latest is None or self.get_timestamp(f) > latest
+        ][-self.window.max_snapshots :]
+        if not new_files:
             log.info(
                 "No new crawler data found. Continuing to use data from %s",
-                data_file.name,
+                self._previous_data_file.name,
             )
             return
-        self._previous_data_file = data_file
-        nodes = self.read_data_file(data_file)
+        weighted = self.selection == "weighted"
+        with self.ingesting():
+            for data_file in new_files:
+                nodes = self.read_data_file(
+                    data_file, self.scorer if weighted else None
+                )
+                with self._lock:
+                    nodes = self.window.merge(nodes, self.get_timestamp(data_file))
+                self._previous_data_file = data_file
+            with self._lock:
+                self.update_pool(self.scale_quality(nodes), data_file.name)
+
+    def scale_quality(self, nodes: list[Node]) -> list[Node]:
+        """Scale quality scores of merged nodes by their snapshot appearances.
+
+        Only applies to weighted selection with a window counting appearances.
+        Scaled nodes are copies, as the window's nodes may be part of
+        published pools.
+        """
+        if self.selection != "weighted" or not self.window.count_appearances:
+            return nodes
+        snapshots = self.window.snapshots
+        scaled = []
+        for node in nodes:
+            appearances = self.window.appearances(node.address.address)
+            quality = self.scorer.scale(node.quality, appearances, snapshots)
+            scaled.append(
+                node if quality == node.quality else node.with_quality(quality)
+            )
+        return scaled
 
-        # use temporary dict to make switch from old to new data atomic, thus
-        # avoiding race conditions and the need for locks
+    def ingesting(self) -> AbstractContextManager:
+        """Get context for building a new pool, managing GC if configured."""
+        if self.gc_control:
+            return self.gc_control.ingest()
+        return nullcontext()
+
+    def probe_forever(self):
+        """Periodically probe served nodes and prune dead ones from the pool."""
+        assert self.prober
+        while True:
+            time.sleep(self.prober.interval)
+            latest = self.window.latest
+            nodes = self.get_pool().nodes()
+            try:
+                dead = self.prober.run(nodes)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to probe nodes")
+                continue
+            self.prune(dead, latest)
+
+    def prune(self, addresses: set[str], latest: datetime | None):
+        """Remove nodes from window and pool without re-ingesting crawler data.
+
+        Pruning is skipped if a snapshot newer than latest was merged in the
+        meantime, as its crawler data supersedes the probe results.
+        """
+        if not addresses:
+            return
+        with self._lock:
+            if self.window.latest != latest:
+                log.info("Skipped pruning %d node(s): pool was updated", len(addresses))
+                return
+            self.window.discard(addresses)
+            pool = self.get_pool()
+            nodes = [n for n in pool.nodes() if n.address.address not in addresses]
+            log.info("Pruning %d unreachable node(s) from pool", len(addresses))
+            self.update_pool(nodes, pool.source)
+        if self.gc_control:
+            self.gc_control.settle()
+
+    def update_nodes(self, added: list[Node], removed: set[str]):
+        """Add and remove nodes without re-ingesting crawler data, e.g., when pushed.
+
+        Added nodes are merged into the latest snapshot of the window (see
+        SnapshotWindow.add), so they are kept until that snapshot expires. The
+        pool's source remains the latest crawler data file.
+        """
+        with self.ingesting():
+            with self._lock:
+                self.window.discard(removed)
+                self.window.add(added)
+                self.update_pool(
+                    self.scale_quality(self.window.nodes()), self.get_pool().source
+                )
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Register listener to be called after every node pool update."""
+        self._listeners.append(listener)
+
+    def wait_for_pool(self, timeout: float | None = None) -> bool:
+        """Wait until a node pool is published; return False on timeout."""
+        return self._published.wait(timeout)
+
+    @staticmethod
+    def get_pool() -> NodePool:
+        """Get current node pool; callers should pin it once per request."""
+        return NodeManager.POOL
+
+    def publish(self, nodes: list[Node], source: str, version: int | None = None):
+        """Publish node pool obtained elsewhere, e.g., from a replication primary."""
+        with self._lock:
+            self.update_pool(nodes, source, version)
+
+    def update_pool(self, nodes: list[Node], source: str, version: int | None = None):
+        """Publish new version of the node pool built from nodes.
+
+        The new pool is built completely before it is published by a single
+        reference swap, so readers never see a partially built pool and need
+        no locks. Callers must hold the lock, which serializes versions.
+        Unless given, the version is incremented.
+        """
         net_to_nodes = {}
         for net_type in NetworkType:
-            net_to_nodes[net_type] = [n for n in nodes if n.net_type == net_type]
-        NodeManager.NET_TO_NODES = net_to_nodes
-        log_str = f"Updated node pool: total={len(nodes)}, " + ", ".join(
-            f"{net}={len(nodes)}" for net, nodes in net_to_nodes.items()
+            net_to_nodes[net_type] = tuple(n for n in nodes if n.net_type == net_type)
+        pool = NodePool(
+            version or NodeManager.POOL.version + 1,
+            source,
+            net_to_nodes,
+            {net: self.build_selector(nodes_) for net, nodes_ in net_to_nodes.items()},
+        )
+        NodeManager.POOL = pool
+        self._published.set()
+        log_str = (
+            f"Updated node pool to v{pool.version} (source={source}): total={len(nodes)}, "
+            + ", ".join(f"{net}={len(nodes)}" for net, nodes in net_to_nodes.items())
         )
         log.info(log_str)
+        for listener in self._listeners:
+            listener()
+
+    def build_selector(self, nodes: Sequence[Node]) -> Selector[Node]:
+        """Build selector for the configured selection mode and diversity."""
+        if not self.netgroup_diversity:
+            return self.make_selector(nodes, [n.quality for n in nodes])
+        netgroups: defaultdict[str, list[Node]] = defaultdict(list)
+        for node in nodes:
+            netgroups[node.address.netgroup()].append(node)
+        groups = list(netgroups.values())
+        return BucketSelector(
+            self.make_selector(
+                [self.make_selector(g, [n.quality for n in g]) for g in groups],
+                # weighted by total quality, so a single good node does not
+                # lift a netgroup of poor ones
+                [sum(n.quality for n in g) for g in groups],
+            )
+        )
+
+    def make_selector(
+        self, items: Sequence[T], weights: Sequence[float]
+    ) -> Selector[T]:
+        """Build selector over items for the configured selection mode."""
+        if self.selection == "weighted":
+            return AliasTable(items, weights)
+        if self.selection == "cursor":
+            return ShuffledCursor(items)
+        return UniformSelector(items)
 
-    def get_random_addresses(self, net: NetworkType, num_requested: int):
-        """Return random addresses from node data."""
-        nodes = NodeManager.NET_TO_NODES[net]
-        addresses = [n.address for n in nodes]
-        num_available = len(nodes)
+    def get_random_addresses(
+        self, net: NetworkType, num_requested: int, pool: NodePool | None = None
+    ):
+        """Return random addresses from pinned pool (default: current pool)."""
+        if pool is None:
+            pool = self.get_pool()
+        num_available = pool.available(net)
         if num_available < num_requested:
             log.warning(
                 "Insufficient data to provide addresses (requested=%d, available=%d): returning %d address(es).",
@@ -129,4 +383,4 @@ class NodeManager(threading.Thread):
                 num_available,
                 num_available,
             )
-        return random.sample(addresses, min(num_requested, num_available))
+        return [n.address for n in pool.sample(net, num_requested)]
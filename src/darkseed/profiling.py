@@ -0,0 +1,140 @@
+"""Module for on-demand profiling of the running daemon."""
+
+import logging as log
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import ClassVar
+
+
+@dataclass
+class Profiler:
+    """Class providing signal-triggered diagnostics for the live daemon:
+
+    1. SIGUSR1: sample the stacks of all threads (DNS server threads,
+       NodeManager, ...) for a configurable duration and dump them as folded
+       stacks, which can be rendered using flamegraph.pl or speedscope
+    2. SIGUSR2: take a tracemalloc snapshot, dump it to a file, and log the
+       top allocation differences compared to the previous snapshot (e.g., to
+       diagnose pool memory growth across ingests). Tracing starts with the
+       first signal unless it was enabled at startup.
+
+    Sampling uses sys._current_frames() from a dedicated thread, so serving
+    threads need no instrumentation and pay nothing while no capture runs.
+    """
+
+    output_dir: Path
+    duration: float = 30.0  # seconds
+    interval: float = 0.005  # seconds between samples
+    trace_malloc: bool = False
+    _capturing: threading.Event = field(default_factory=threading.Event)
+    _snapshot: tracemalloc.Snapshot | None = None
+    TOP_STATS: ClassVar[int] = 10
+
+    def __post_init__(self):
+        if self.trace_malloc:
+            tracemalloc.start()
+
+    def install_signal_handlers(self):
+        """Install SIGUSR1 (stack sampling) and SIGUSR2 (tracemalloc) handlers."""
+        signal.signal(signal.SIGUSR1, lambda *_: self.start_capture())
+        signal.signal(signal.SIGUSR2, lambda *_: self.start_snapshot())
+        log.info(
+            "Installed profiling signal handlers (SIGUSR1: stack sampling, "
+            "SIGUSR2: tracemalloc snapshot, output=%s)",
+            self.output_dir,
+        )
+
+    def _output_path(self, kind: str, suffix: str) -> Path:
+        """Get timestamped output file path."""
+        timestamp = time.strftime("%Y-%m-%dT%H-%M-%SZ", time.gmtime())
+        return self.output_dir / f"{timestamp}_darkseed_{kind}.{suffix}"
+
+    def start_capture(self) -> bool:
+        """Start stack sampling in a background thread, unless already running."""
+        if self._capturing.is_set():
+            log.warning("Ignoring profiling request: capture already running")
+            return False
+        self._capturing.set()
+        threading.Thread(target=self.capture, name="Profiler", daemon=True).start()
+        return True
+
+    def capture(self):
+        """Sample stacks of all other threads and dump folded stacks to file."""
+        log.info("Started stack sampling for %.0f seconds", self.duration)
+        try:
+            stacks = self.sample()
+            path = self._output_path("profile", "folded")
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            self.log_top_functions(stacks)
+            log.info("Wrote %d stack samples to %s", sum(stacks.values()), path)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Stack sampling failed")
+        finally:
+            self._capturing.clear()
+
+    def sample(self) -> Counter[str]:
+        """Sample stacks of all threads but the current one for the configured duration."""
+        stacks: Counter[str] = Counter()
+        own_id = threading.get_ident()
+        end = time.monotonic() + self.duration
+        while time.monotonic() < end:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(
+                        f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(frames))] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    def log_top_functions(self, stacks: Counter[str]):
+        """Log functions with the most samples at the top of the stack."""
+        leaves: Counter[str] = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values())
+        for leaf, count in leaves.most_common(self.TOP_STATS):
+            log.info("Profile: %5.1f%% %s", 100 * count / total, leaf)
+
+    def start_snapshot(self):
+        """Take tracemalloc snapshot in a background thread."""
+        threading.Thread(target=self.snapshot, name="Profiler", daemon=True).start()
+
+    def snapshot(self):
+        """Take tracemalloc snapshot, dump it, and log top differences."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            log.info("Started tracemalloc; send signal again to take a snapshot")
+            return
+        snapshot = tracemalloc.take_snapshot()
+        path = self._output_path("tracemalloc", "snapshot")
+        snapshot.dump(str(path))
+        current, peak = tracemalloc.get_traced_memory()
+        log.info(
+            "Wrote tracemalloc snapshot to %s (current=%.1fMiB, peak=%.1fMiB)",
+            path,
+            current / 2**20,
+            peak / 2**20,
+        )
+        if self._snapshot:
+            stats = snapshot.compare_to(self._snapshot, "lineno")
+        else:
+            stats = snapshot.statistics("lineno")
+        for stat in stats[: self.TOP_STATS]:
+            log.info("Tracemalloc: %s", stat)
+        self._snapshot = snapshot
@@ -0,0 +1,262 @@
+"""Module for ingesting nodes pushed by a local crawler over a unix socket."""
+
+import logging as log
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, ClassVar
+
+from darkseed.address import Address
+from darkseed.node import Node
+from darkseed.node_manager import NodeManager
+
+
+class PushCodec:
+    """Class encoding node additions and removals as length-prefixed records.
+
+    Each record is prefixed by its size (2 bytes) and consists of an
+    operation (ADD or REMOVE) and the length-prefixed address (as in the
+    crawler data). Additions are followed by port, services, protocol version
+    and latency (in seconds) of the node; version 0 and negative latencies
+    mean unknown. All integers are big-endian.
+    """
+
+    SIZE: ClassVar[struct.Struct] = struct.Struct("!H")
+    HEADER: ClassVar[struct.Struct] = struct.Struct("!BB")  # operation, address size
+    NODE: ClassVar[struct.Struct] = struct.Struct("!HQIf")  # port, services, ...
+    ADD: ClassVar[int] = 1
+    REMOVE: ClassVar[int] = 2
+
+    @classmethod
+    def encode(cls, operation: int, address: str, node: bytes = b"") -> bytes:
+        """Encode record, including size prefix."""
+        data = address.encode()
+        record = cls.HEADER.pack(operation, len(data)) + data + node
+        return cls.SIZE.pack(len(record)) + record
+
+    @classmethod
+    def encode_add(
+        cls,
+        address: str,
+        port: int,
+        services: int,
+        version: int = 0,
+        latency: float = -1.0,
+    ) -> bytes:
+        """Encode addition (or update) of node."""
+        return cls.encode(
+            cls.ADD, address, cls.NODE.pack(port, services, version, latency)
+        )
+
+    @classmethod
+    def encode_remove(cls, address: str) -> bytes:
+        """Encode removal of node."""
+        return cls.encode(cls.REMOVE, address)
+
+    @classmethod
+    def decode(
+        cls, record: bytes
+    ) -> tuple[int, str, tuple[int, int, int, float] | None]:
+        """Decode record (without size prefix) into operation, address, node fields.
+
+        Raises ValueError if the record is malformed.
+        """
+        try:
+            operation, size = cls.HEADER.unpack_from(record)
+            offset = cls.HEADER.size + size
+            address = record[cls.HEADER.size : offset].decode()
+            if operation == cls.REMOVE and offset == len(record):
+                return operation, address, None
+            if operation == cls.ADD and offset + cls.NODE.size == len(record):
+                return operation, address, cls.NODE.unpack_from(record, offset)
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed push record: {e}") from e
+        raise ValueError(f"Malformed push record: {record.hex()}")
+
+
+@dataclass
+class PushClient:
+    """Class pushing node additions and removals to darkseed, e.g., from a crawler.
+
+    Records are buffered and sent on flush or when leaving the context.
+    """
+
+    path: Path
+    _sock: socket.socket | None = None
+    _buffer: bytearray = field(default_factory=bytearray)
+    BUFFER_SIZE: ClassVar[int] = 2**16
+
+    def __enter__(self) -> "PushClient":
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(str(self.path))
+        return self
+
+    def __exit__(self, *_):
+        assert self._sock
+        self.flush()
+        self._sock.close()
+        self._sock = None
+
+    def add(self, address: str, port: int, services: int, **kwargs):
+        """Push node found reachable (see PushCodec.encode_add)."""
+        self.send(PushCodec.encode_add(address, port, services, **kwargs))
+
+    def remove(self, address: str):
+        """Push node found unreachable."""
+        self.send(PushCodec.encode_remove(address))
+
+    def send(self, record: bytes):
+        """Buffer record, flushing the buffer once full."""
+        self._buffer += record
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Send buffered records."""
+        assert self._sock, "Not connected"
+        self._sock.sendall(self._buffer)
+        self._buffer.clear()
+
+
+@dataclass
+class PushIngest:
+    """Class receiving nodes pushed by a local crawler over a unix socket.
+
+    Crawlers connect to the socket and stream PushCodec records as they find
+    nodes reachable or unreachable, so fresh nodes are served without waiting
+    for a crawl to complete or re-reading crawler data. Nodes using a
+    non-default port are ignored, as for crawler data.
+
+    Received changes are batched: a new pool version is published at most
+    every interval seconds, as building a pool costs time linear in its
+    size regardless of the number of changes.
+    """
+
+    node_manager: NodeManager
+    path: Path
+    interval: float = 5.0  # minimum seconds between pool updates
+    _added: dict[str, Node] = field(default_factory=dict)
+    _removed: set[str] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _pending: threading.Event = field(default_factory=threading.Event)
+
+    def start(self):
+        """Listen for crawlers and apply their changes in background threads."""
+        # remove socket left by previous run
+        if self.path.is_socket():
+            self.path.unlink()
+        # pylint: disable-next=consider-using-with
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.path))
+        server.listen()
+        threading.Thread(
+            target=self.accept, args=(server,), name="PushIngest", daemon=True
+        ).start()
+        threading.Thread(target=self.run, name="PushApply", daemon=True).start()
+        log.info(
+            "Accepting pushed nodes on %s (interval=%.1fs)", self.path, self.interval
+        )
+
+    def accept(self, server: socket.socket):
+        """Accept crawlers."""
+        while True:
+            sock, _ = server.accept()
+            threading.Thread(
+                target=self.receive, args=(sock,), name="PushReceiver", daemon=True
+            ).start()
+
+    def receive(self, sock: socket.socket):
+        """Queue records received from crawler until it disconnects."""
+        log.info("Push client connected")
+        records, ignored = 0, 0
+        with sock, sock.makefile("rb") as file:
+            try:
+                while (record := self.read_record(file)) is not None:
+                    records += 1
+                    if not self.queue(*PushCodec.decode(record)):
+                        ignored += 1
+            except (OSError, ValueError) as e:
+                log.warning("Closing push connection: %r", e)
+        log.info("Push client disconnected (records=%d, ignored=%d)", records, ignored)
+
+    @staticmethod
+    def read_record(file: BinaryIO) -> bytes | None:
+        """Read next record; return None at end of stream."""
+        prefix = file.read(PushCodec.SIZE.size)
+        if not prefix:
+            return None
+        if len(prefix) < PushCodec.SIZE.size:
+            raise ValueError("Truncated push record")
+        (size,) = PushCodec.SIZE.unpack(prefix)
+        record = file.read(size)
+        if len(record) < size:
+            raise ValueError("Truncated push record")
+        return record
+
+    def make_node(self, address: str, fields: tuple[int, int, int, float]) -> Node:
+        """Create node from pushed fields, scoring it in weighted mode."""
+        port, services, version, latency = fields
+        quality = 1.0
+        if self.node_manager.selection == "weighted":
+            scorer = self.node_manager.scorer
+            row = {
+                "services": services,
+                scorer.latency_column: latency if latency >= 0 else None,
+                scorer.version_column: version or None,
+            }
+            quality = scorer.score(row)
+        return Node(address, port, services, quality)
+
+    def queue(
+        self,
+        operation: int,
+        address: str,
+        fields: tuple[int, int, int, float] | None,
+    ) -> bool:
+        """Queue change for the next pool update; return False if ignored."""
+        node = None
+        try:
+            if fields is not None:
+                node = self.make_node(address, fields)
+                net = str(node.net_type)
+            else:
+                address = Address(address).address
+        except ValueError as e:
+            log.debug("Ignoring pushed address %s: %r", address, e)
+            return False
+        if node is not None and not NodeManager.has_default_port(net, node.port):
+            log.debug("Ignoring pushed node %s with port %d", address, node.port)
+            return False
+        with self._lock:
+            if node is not None:
+                self._removed.discard(node.address.address)
+                self._added[node.address.address] = node
+            else:
+                self._added.pop(address, None)
+                self._removed.add(address)
+        self._pending.set()
+        return True
+
+    def run(self):
+        """Publish queued changes, at most every interval seconds."""
+        while True:
+            self._pending.wait()
+            start = time.monotonic()
+            with self._lock:
+                added, self._added = self._added, {}
+                removed, self._removed = self._removed, set()
+                self._pending.clear()
+            try:
+                self.node_manager.update_nodes(list(added.values()), removed)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to apply pushed nodes")
+            log.info(
+                "Applied pushed nodes (added=%d, removed=%d, time=%.3fs)",
+                len(added),
+                len(removed),
+                time.monotonic() - start,
+            )
+            time.sleep(max(0.0, start + self.interval - time.monotonic()))
@@ -0,0 +1,354 @@
+"""Module for replicating node pools from a primary to secondary instances."""
+
+import logging as log
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, NamedTuple
+
+from darkseed.node import Node, NodePool
+from darkseed.node_manager import NodeManager
+
+
+def parse_endpoint(spec: str) -> tuple[socket.AddressFamily, Any]:
+    """Parse replication endpoint: host:port (TCP) or path of a unix socket."""
+    if "/" in spec:
+        return socket.AF_UNIX, spec
+    host, _, port = spec.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid replication endpoint: {spec}")
+    host = host.strip("[]")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    return family, (host, int(port))
+
+
+class Frame(NamedTuple):
+    """Replication frame: a full snapshot of the pool or a delta against base."""
+
+    kind: int
+    version: int
+    base: int  # version the delta applies to; 0 for full snapshots
+    payload: bytes  # zlib-compressed
+
+
+@dataclass
+class SnapshotCodec:
+    """Class encoding node pools as compact binary snapshots and deltas.
+
+    A frame consists of a fixed-size header (magic, kind, version, base
+    version, payload size) and a zlib-compressed payload. The payload holds
+    the source file name, the addresses removed since the base version
+    (deltas only) and the nodes added or changed since the base version (all
+    nodes for full snapshots). Strings are UTF-8 encoded and prefixed with
+    their 2-byte length. Each node is encoded as address followed by port,
+    services and quality score.
+    """
+
+    HEADER: ClassVar[struct.Struct] = struct.Struct("!4sBIII")
+    MAGIC: ClassVar[bytes] = b"DSR2"  # DSR1 used 1-byte string lengths
+    FULL: ClassVar[int] = 0
+    DELTA: ClassVar[int] = 1
+    NODE: ClassVar[struct.Struct] = struct.Struct("!HQf")  # port, services, quality
+    COUNT: ClassVar[struct.Struct] = struct.Struct("!I")
+    LENGTH: ClassVar[struct.Struct] = struct.Struct("!H")
+    MAX_PAYLOAD: ClassVar[int] = 2**30
+
+    @classmethod
+    def encode_frame(cls, frame: Frame) -> bytes:
+        """Encode frame, including header."""
+        return (
+            cls.HEADER.pack(
+                cls.MAGIC, frame.kind, frame.version, frame.base, len(frame.payload)
+            )
+            + frame.payload
+        )
+
+    @classmethod
+    def decode_header(cls, header: bytes) -> tuple[int, int, int, int]:
+        """Decode and validate header; return kind, version, base, payload size."""
+        magic, kind, version, base, size = cls.HEADER.unpack(header)
+        if magic != cls.MAGIC or kind not in (cls.FULL, cls.DELTA):
+            raise ValueError(f"Invalid replication frame header: {header.hex()}")
+        if size > cls.MAX_PAYLOAD:
+            raise ValueError(f"Replication frame too large: {size} bytes")
+        return kind, version, base, size
+
+    @classmethod
+    def _encode_str(cls, value: str) -> bytes:
+        data = value.encode()
+        if len(data) > 0xFFFF:
+            raise ValueError(
+                f"String too long for replication frame: {len(data)} bytes: "
+                f"{value[:64]}..."
+            )
+        return cls.LENGTH.pack(len(data)) + data
+
+    @classmethod
+    def _encode_nodes(cls, nodes: list[Node]) -> bytes:
+        return cls.COUNT.pack(len(nodes)) + b"".join(
+            cls._encode_str(n.address.address)
+            + cls.NODE.pack(n.port, n.services, n.quality)
+            for n in nodes
+        )
+
+    @classmethod
+    def encode_full(cls, pool: NodePool) -> Frame:
+        """Encode all nodes of pool."""
+        payload = cls._encode_str(pool.source) + cls._encode_nodes(pool.nodes())
+        return Frame(cls.FULL, pool.version, 0, zlib.compress(payload))
+
+    @classmethod
+    def encode_delta(cls, base: NodePool, pool: NodePool) -> Frame:
+        """Encode nodes removed, added or changed since base."""
+        old = {n.address.address: n for n in base.nodes()}
+        new = {n.address.address: n for n in pool.nodes()}
+        removed = [address for address in old if address not in new]
+        changed = [
+            n
+            for address, n in new.items()
+            if (o := old.get(address)) is None
+            or (o.port, o.services, o.quality) != (n.port, n.services, n.quality)
+        ]
+        payload = (
+            cls._encode_str(pool.source)
+            + cls.COUNT.pack(len(removed))
+            + b"".join(cls._encode_str(address) for address in removed)
+            + cls._encode_nodes(changed)
+        )
+        return Frame(cls.DELTA, pool.version, base.version, zlib.compress(payload))
+
+    @classmethod
+    def apply(cls, frame: Frame, nodes: dict[str, Node]) -> str:
+        """Apply frame to nodes (address -> node) in place; return source.
+
+        Raises ValueError if the payload is malformed.
+        """
+        try:
+            data = memoryview(zlib.decompress(frame.payload))
+        except zlib.error as e:
+            raise ValueError(f"Invalid replication payload: {e}") from e
+        offset = 0
+
+        def read_str() -> str:
+            nonlocal offset
+            (size,) = cls.LENGTH.unpack_from(data, offset)
+            offset += cls.LENGTH.size
+            if offset + size > len(data):
+                raise IndexError("string exceeds payload")
+            value = bytes(data[offset : offset + size]).decode()
+            offset += size
+            return value
+
+        def read_count() -> int:
+            nonlocal offset
+            (count,) = cls.COUNT.unpack_from(data, offset)
+            offset += cls.COUNT.size
+            return count
+
+        try:
+            source = read_str()
+            if frame.kind == cls.FULL:
+                nodes.clear()
+            else:
+                for _ in range(read_count()):
+                    nodes.pop(read_str(), None)
+            for _ in range(read_count()):
+                address = read_str()
+                port, services, quality = cls.NODE.unpack_from(data, offset)
+                offset += cls.NODE.size
+                nodes[address] = Node(address, port, services, quality)
+        except (IndexError, struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Truncated replication payload: {e}") from e
+        if offset != len(data):
+            raise ValueError("Trailing data in replication payload")
+        return source
+
+
+@dataclass
+class ReplicationPrimary:
+    """Class streaming node pools to secondaries connecting to an endpoint.
+
+    A connecting secondary first receives a full snapshot of the current
+    pool; afterwards, every pool update is sent as a delta against the
+    previous version. Each secondary has its own send queue and thread, so a
+    slow secondary never blocks ingests; a secondary that falls too far
+    behind is disconnected and receives a full snapshot after reconnecting.
+    """
+
+    node_manager: NodeManager
+    endpoint: str
+    _previous: NodePool | None = None
+    _queues: list[queue.Queue[bytes | None]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    QUEUE_SIZE: ClassVar[int] = 16
+
+    def start(self):
+        """Listen for secondaries and send updates after each pool update."""
+        family, address = parse_endpoint(self.endpoint)
+        # pylint: disable-next=consider-using-with
+        server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            # remove socket left by previous run
+            if os.path.exists(address):
+                os.unlink(address)
+        else:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(address)
+        server.listen()
+        self.node_manager.subscribe(self.publish)
+        threading.Thread(
+            target=self.accept, args=(server,), name="ReplicationPrimary", daemon=True
+        ).start()
+        log.info("Serving node pool replication on %s", self.endpoint)
+
+    def accept(self, server: socket.socket):
+        """Accept secondaries."""
+        while True:
+            sock, peer = server.accept()
+            log.info("Replication secondary connected: %s", peer or "unix")
+            updates: queue.Queue[bytes | None] = queue.Queue()
+            with self._lock:
+                pool = self.node_manager.get_pool()
+                if pool.version:
+                    updates.put(
+                        SnapshotCodec.encode_frame(SnapshotCodec.encode_full(pool))
+                    )
+                self._queues.append(updates)
+            threading.Thread(
+                target=self.send,
+                args=(sock, updates),
+                name="ReplicationSender",
+                daemon=True,
+            ).start()
+
+    def publish(self):
+        """Queue delta against previous pool for all secondaries."""
+        with self._lock:
+            pool = self.node_manager.get_pool()
+            previous, self._previous = self._previous, pool
+            if not self._queues:
+                return
+            start = time.perf_counter()
+            frame = (
+                SnapshotCodec.encode_delta(previous, pool)
+                if previous
+                else SnapshotCodec.encode_full(pool)
+            )
+            data = SnapshotCodec.encode_frame(frame)
+            for updates in list(self._queues):
+                if updates.qsize() >= self.QUEUE_SIZE:
+                    self._queues.remove(updates)
+                    updates.put(None)
+                else:
+                    updates.put(data)
+        log.info(
+            "Queued pool v%d for %d secondary(ies) (kind=%s, size=%dB, time=%.3fs)",
+            pool.version,
+            len(self._queues),
+            "delta" if frame.kind == SnapshotCodec.DELTA else "full",
+            len(data),
+            time.perf_counter() - start,
+        )
+
+    def send(self, sock: socket.socket, updates: "queue.Queue[bytes | None]"):
+        """Send queued frames to secondary until it disconnects or falls behind."""
+        with sock:
+            while (data := updates.get()) is not None:
+                try:
+                    sock.sendall(data)
+                except OSError as e:
+                    log.warning("Replication secondary disconnected: %r", e)
+                    break
+            else:
+                log.warning("Disconnecting replication secondary: too far behind")
+        with self._lock:
+            if updates in self._queues:
+                self._queues.remove(updates)
+
+
+@dataclass
+class ReplicationSecondary:
+    """Class receiving node pools from a primary instead of reading crawler data.
+
+    Received pools keep the primary's version numbers. If a delta does not
+    apply to the current version (e.g., after a missed update), the
+    connection is re-established, which makes the primary send a full
+    snapshot.
+    """
+
+    node_manager: NodeManager
+    endpoint: str
+    retry: float = 5.0  # seconds between connection attempts
+    _nodes: dict[str, Node] = field(default_factory=dict)
+    _version: int = 0
+
+    def start(self):
+        """Receive pools in a background thread."""
+        threading.Thread(
+            target=self.run, name="ReplicationSecondary", daemon=True
+        ).start()
+
+    def run(self):
+        """Connect to primary and apply frames, reconnecting on errors."""
+        family, address = parse_endpoint(self.endpoint)
+        while True:
+            try:
+                with socket.socket(family, socket.SOCK_STREAM) as sock:
+                    sock.connect(address)
+                    log.info("Connected to replication primary %s", self.endpoint)
+                    self.receive(sock)
+            except (OSError, ValueError) as e:
+                log.warning(
+                    "Replication from %s failed: %r; retrying in %.0fs",
+                    self.endpoint,
+                    e,
+                    self.retry,
+                )
+            time.sleep(self.retry)
+
+    @staticmethod
+    def read_exactly(sock: socket.socket, size: int) -> bytes:
+        """Read size bytes from socket."""
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(min(size - len(data), 2**20))
+            if not chunk:
+                raise ConnectionError("Replication primary closed connection")
+            data += chunk
+        return bytes(data)
+
+    def receive(self, sock: socket.socket):
+        """Apply frames received from primary."""
+        while True:
+            header = self.read_exactly(sock, SnapshotCodec.HEADER.size)
+            kind, version, base, size = SnapshotCodec.decode_header(header)
+            frame = Frame(kind, version, base, self.read_exactly(sock, size))
+            if kind == SnapshotCodec.DELTA and version <= self._version:
+                # already included in full snapshot received after connecting
+                continue
+            if kind == SnapshotCodec.DELTA and base != self._version:
+                raise ValueError(
+                    f"Delta for v{base} does not apply to v{self._version}"
+                )
+            start = time.perf_counter()
+            with self.node_manager.ingesting():
+                try:
+                    source = SnapshotCodec.apply(frame, self._nodes)
+                except ValueError:
+                    # nodes may be partially updated; require a full snapshot
+                    self._version = 0
+                    raise
+                self._version = version
+                self.node_manager.publish(list(self._nodes.values()), source, version)
+            log.info(
+                "Applied replicated pool v%d (kind=%s, size=%dB, time=%.3fs)",
+                version,
+                "delta" if kind == SnapshotCodec.DELTA else "full",
+                size,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,21 @@
+"""Module for per-thread random number generators."""
+
+import random
+import threading
+
+_LOCAL = threading.local()
+
+
+def thread_rng() -> random.Random:
+    """Get random number generator of the calling thread.
+
+    The random module's functions share one generator. On free-threaded
+    builds, its state is guarded by a per-object lock, so serving threads
+    drawing random numbers for every query would contend on it. Each thread
+    gets its own generator instead, seeded from os.urandom on first use.
+    """
+    try:
+        return _LOCAL.rng
+    except AttributeError:
+        rng = _LOCAL.rng = random.Random()
+        return rng
@@ -0,0 +1,15 @@
+"""Module for strategies selecting nodes from the node pool."""
+
+from .alias_table import AliasTable
+from .buckets import BucketSelector
+from .cursor import ShuffledCursor
+from .selector import Selector
+from .uniform import UniformSelector
+
+__all__ = [
+    "AliasTable",
+    "BucketSelector",
+    "Selector",
+    "ShuffledCursor",
+    "UniformSelector",
+]
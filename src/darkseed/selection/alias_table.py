@@ -0,0 +1,92 @@
+"""Module for weighted random sampling using the alias method."""
+
+import heapq
+import math
+from typing import Generic, Sequence, TypeVar
+
+from darkseed.rng import thread_rng
+
+T = TypeVar("T")
+
+
+class AliasTable(Generic[T]):
+    """Class for O(1) weighted random draws using Vose's alias method.
+
+    Building the table takes O(n) time and is meant to happen once per node
+    data ingest. Each draw then needs a single random number, a table lookup
+    and one comparison, regardless of the number of items.
+    """
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError(
+                f"Length mismatch (items={len(items)}, weights={len(weights)})"
+            )
+        if any(w < 0 for w in weights):
+            raise ValueError("Weights must not be negative")
+        self.items = list(items)
+        self.weights = list(weights)
+        num = len(items)
+        total = sum(weights)
+        self.prob = [1.0] * num
+        self.alias = list(range(num))
+        if not num or total <= 0:
+            return
+
+        scaled = [w * num / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # leftovers are 1.0 up to floating point error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def draw_index(self) -> int:
+        """Draw a single weighted random index."""
+        u = thread_rng().random() * len(self.items)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample(self, k: int) -> list[T]:
+        """Draw up to k distinct weighted random items.
+
+        Duplicates are rejected and redrawn. Since this degrades when k
+        approaches the number of items, the number of draws is bounded and any
+        remaining items are drawn without replacement from the items not
+        chosen yet, still proportionally to their weights (see fill).
+        """
+        num = len(self.items)
+        k = min(k, num)
+        chosen: dict[int, None] = {}
+        for _ in range(4 * k + 16):
+            if len(chosen) == k:
+                break
+            chosen[self.draw_index()] = None
+        if len(chosen) < k:
+            chosen.update(dict.fromkeys(self.fill(chosen, k - len(chosen))))
+        return [self.items[i] for i in chosen]
+
+    def fill(self, chosen: dict[int, None], count: int) -> list[int]:
+        """Draw count distinct weighted indices not chosen yet, in O(n log count).
+
+        Uses Efraimidis-Spirakis keys log(u) / w, the largest of which form a
+        weighted sample without replacement. Items of zero weight are only
+        drawn, uniformly at random, if too few items of positive weight remain.
+        """
+        rng = thread_rng()
+        rest = [i for i in range(len(self.items)) if i not in chosen]
+        positive = [i for i in rest if self.weights[i] > 0]
+        keys = ((math.log(1.0 - rng.random()) / self.weights[i], i) for i in positive)
+        drawn = [i for _, i in heapq.nlargest(count, keys)]
+        if len(drawn) < count:
+            zero = [i for i in rest if self.weights[i] <= 0]
+            drawn += rng.sample(zero, count - len(drawn))
+        return drawn
@@ -0,0 +1,28 @@
+"""Module for selecting at most one item per bucket, e.g., per netgroup."""
+
+from typing import Generic, TypeVar
+
+from .selector import Selector
+
+T = TypeVar("T")
+
+
+class BucketSelector(Generic[T]):
+    """Class drawing at most one item from each bucket.
+
+    Items are grouped into buckets once per ingest, with one selector per
+    bucket. An outer selector over the buckets picks k distinct buckets, and
+    each picked bucket contributes a single item, so sampling costs O(k)
+    without scanning the pool or redrawing items from the same bucket. The
+    number of distinct items that can be drawn is the number of buckets.
+    """
+
+    def __init__(self, buckets: Selector[Selector[T]]):
+        self.buckets = buckets
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    def sample(self, k: int) -> list[T]:
+        """Draw up to k items from distinct buckets."""
+        return [bucket.sample(1)[0] for bucket in self.buckets.sample(k)]
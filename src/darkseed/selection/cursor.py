@@ -0,0 +1,62 @@
+"""Module for selecting items by rotating through a shuffled pool."""
+
+import threading
+from typing import Generic, Sequence, TypeVar
+
+from darkseed.rng import thread_rng
+
+T = TypeVar("T")
+
+
+class ShuffledCursor(Generic[T]):
+    """Class handing out consecutive windows of a shuffled pool.
+
+    The pool is shuffled once and a shared cursor walks through it, so every
+    item is handed out exactly once per pass before any item is repeated. On
+    wrap-around, the pool is reshuffled to vary the composition of windows
+    between passes.
+
+    Concurrent queries never receive the same position: each query takes the
+    items at the positions it needs and advances the cursor under a lock,
+    once per query, which is also safe on free-threaded builds. As items are
+    read under the same lock, a query can never read positions of one pass
+    from the order of the next, so exposure stays even; the rare reshuffle
+    happens under the lock as well.
+    """
+
+    def __init__(self, items: Sequence[T]):
+        self._order = list(items)
+        thread_rng().shuffle(self._order)
+        self._position = 0  # next position of the current pass
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _take(self, count: int) -> list[T]:
+        """Take items at the next count positions, reshuffling on wrap-around."""
+        with self._lock:
+            start = self._position
+            window = self._order[start : start + count]
+            if len(window) < count:
+                order = self._order.copy()
+                thread_rng().shuffle(order)
+                self._order = order
+                self._position = count - len(window)
+                window += order[: self._position]
+            else:
+                self._position += count
+        return window
+
+    def sample(self, k: int) -> list[T]:
+        """Take the next window of up to k distinct items."""
+        num = len(self._order)
+        if k >= num:
+            return thread_rng().sample(self._order, num)
+        result: list[T] = []
+        while len(result) < k:
+            for item in self._take(k - len(result)):
+                # windows spanning a reshuffle can run into an item twice
+                if item not in result:
+                    result.append(item)
+        return result
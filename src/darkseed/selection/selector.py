@@ -0,0 +1,14 @@
+"""Module for the interface shared by selection strategies."""
+
+from typing import Protocol, TypeVar
+
+T_co = TypeVar("T_co", covariant=True)
+
+
+class Selector(Protocol[T_co]):
+    """Interface shared by all selection strategies."""
+
+    def __len__(self) -> int: ...
+
+    def sample(self, k: int) -> list[T_co]:
+        """Select up to k distinct items."""
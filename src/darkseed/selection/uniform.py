@@ -0,0 +1,21 @@
+"""Module for uniform random selection."""
+
+from typing import Generic, Sequence, TypeVar
+
+from darkseed.rng import thread_rng
+
+T = TypeVar("T")
+
+
+class UniformSelector(Generic[T]):
+    """Class selecting distinct items uniformly at random."""
+
+    def __init__(self, items: Sequence[T]):
+        self.items = list(items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, k: int) -> list[T]:
+        """Draw up to k distinct items uniformly at random."""
+        return thread_rng().sample(self.items, min(k, len(self.items)))
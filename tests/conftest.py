@@ -0,0 +1,153 @@
+"""Shared fixtures: synthetic crawler data and DNS servers on local ports."""
+
+import csv
+import random
+import socket
+from pathlib import Path
+from typing import Callable
+
+import dns.message
+import pytest
+
+from darkseed.address.bip155like import I2PAddressCodec, OnionAddressCodec
+from darkseed.dns import DNSHandler, DNSServer
+from darkseed.dns.routing import Zone
+from darkseed.node import NodePool
+from darkseed.node_manager import NodeManager
+
+ZONE = "seed.test."
+SUBDOMAINS = ("n1", "n2", "n4", "n5", "n6")
+COLUMNS = (
+    "timestamp",
+    "host",
+    "port",
+    "network",
+    "handshake_successful",
+    "services",
+    "version",
+    "latency",
+)
+
+
+def make_rows(count: int, seed: int = 0) -> list[dict[str, str]]:
+    """Create crawler data rows of reachable nodes of all networks."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        net = ("ipv4", "ipv6", "onion_v3", "i2p", "cjdns")[i % 5]
+        port = 0 if net == "i2p" else 8333
+        match net:
+            case "ipv4":
+                host = ".".join(str(rng.randint(1, 223)) for _ in range(4))
+            case "ipv6":
+                host = "2001:db8:%x:%x::%x" % tuple(rng.getrandbits(16) for _ in "abc")
+            case "onion_v3":
+                host = OnionAddressCodec.pubkey_to_address(rng.randbytes(32))
+            case "i2p":
+                host = I2PAddressCodec.hash_to_address(rng.randbytes(32))
+            case _:
+                host = "fc%02x:%x::%x" % tuple(rng.getrandbits(n) for n in (8, 16, 16))
+        rows.append(
+            {
+                "timestamp": "2024-10-01T00:00:00Z",
+                "host": host,
+                "port": str(port),
+                "network": net,
+                "handshake_successful": "True",
+                "services": str(rng.choice((1033, 1037, 3081))),
+                "version": "70016",
+                "latency": f"{rng.uniform(0.05, 3):.3f}",
+            }
+        )
+    return rows
+
+
+def write_csv(path: Path, rows: list[dict[str, str]]):
+    """Write crawler data rows as uncompressed CSV."""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def burst(port: int, count: int) -> dict[int, dns.message.Message]:
+    """Send count ANY queries for all networks at once, collect responses by ID."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(2)
+        queries = {}
+        for i in range(count):
+            query = dns.message.make_query(f"{SUBDOMAINS[i % 5]}.{ZONE}", "ANY")
+            query.id = i
+            queries[i] = query
+            sock.sendto(query.to_wire(), ("127.0.0.1", port))
+        responses = {}
+        while len(responses) < count:
+            try:
+                data = sock.recv(65535)
+            except TimeoutError:
+                break
+            response = dns.message.from_wire(data)
+            assert queries[response.id].is_response(response)
+            responses[response.id] = response
+    return responses
+
+
+def free_port() -> int:
+    """Get port that is free for both TCP and UDP on localhost."""
+    while True:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.bind(("127.0.0.1", 0))
+            port = udp.getsockname()[1]
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as tcp:
+                try:
+                    tcp.bind(("127.0.0.1", port))
+                except OSError:
+                    continue
+                return port
+
+
+@pytest.fixture
+def crawler_dir(tmp_path: Path) -> Path:
+    """Directory holding a single crawl of 500 nodes."""
+    path = tmp_path / "crawler"
+    path.mkdir()
+    write_csv(path / "2024-10-01T00-00-00Z_reachable_nodes.csv", make_rows(500))
+    return path
+
+
+@pytest.fixture
+def serve(crawler_dir: Path) -> Callable[..., DNSServer]:
+    """Start DNS servers for zones (default: seed.test.) on free local ports.
+
+    Nodes are selected using the given selection mode. Other keyword arguments are passed to DNSServer. Servers are stopped and the
+    class-level state of DNSHandler and NodeManager is reset afterwards.
+    """
+    servers: list[DNSServer] = []
+
+    def start(
+        zones: tuple[str, ...] = (ZONE,), selection: str = "uniform", **kwargs
+    ) -> DNSServer:
+        node_manager = NodeManager(crawler_dir, selection=selection)
+        node_manager.get_latest_data()
+        server = DNSServer(
+            "127.0.0.1",
+            free_port(),
+            tuple(Zone.parse(zone) for zone in zones),
+            node_manager,
+            **kwargs,
+        )
+        server.run()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop(0)
+        sockets = server.get_listener_sockets()
+        for sock in ([sockets.tcp] if sockets.tcp else []) + sockets.udp:
+            sock.close()
+    DNSHandler.set_admission_controller(None)
+    DNSHandler.set_capture(None)
+    DNSHandler.set_dnssec(None)
+    DNSHandler.set_analytics(None)
+    NodeManager.POOL = NodePool.empty()
@@ -0,0 +1,140 @@
+"""Tests for admission control and load shedding under overload."""
+
+import threading
+import time
+
+import dns.flags
+import dns.message
+import dns.rcode
+import pytest
+from conftest import burst
+
+from darkseed.dns import AdmissionController, DNSHandler
+
+QUERY = dns.message.make_query("n1.seed.test.", "A").to_wire()
+
+
+class Client:
+    """Collect replies and their latencies, keyed by request number."""
+
+    def __init__(self):
+        self.replies: dict[int, bytes] = {}
+        self.latencies: dict[int, float] = {}
+        self.done = threading.Condition()
+
+    def submit(self, admission: AdmissionController, i: int, protocol: str = "UDP"):
+        sent = time.monotonic()
+
+        def reply(response: bytes):
+            with self.done:
+                self.replies[i] = response
+                self.latencies[i] = time.monotonic() - sent
+                self.done.notify_all()
+
+        admission.submit(QUERY, f"client-{i}", protocol, reply)
+
+    def wait(self, count: int, timeout: float = 10.0) -> bool:
+        with self.done:
+            return self.done.wait_for(lambda: len(self.replies) >= count, timeout)
+
+
+def slow_process(delay: float):
+    def process(data: bytes, peer_info: str, protocol: str) -> bytes:
+        time.sleep(delay)
+        return b"answer"
+
+    return process
+
+
+@pytest.mark.parametrize("policy", AdmissionController.POLICIES)
+def test_overload_sheds_and_bounds_latency(policy):
+    deadline, delay = 0.05, 0.005
+    admission = AdmissionController(
+        slow_process(delay), workers=2, queue_size=16, deadline=deadline, policy=policy
+    )
+    admission.start()
+    client = Client()
+    # offer about ten times the capacity of the workers
+    requests = 0
+    for _ in range(25):
+        for _ in range(40):
+            client.submit(admission, requests)
+            requests += 1
+        time.sleep(0.01)
+    assert client.wait(requests)
+
+    stats = admission.stats()
+    shed = stats.get("shed_queue_full", 0) + stats.get("shed_deadline", 0)
+    assert stats["completed"] + shed == requests
+    assert stats.get("shed_queue_full", 0) > requests / 2
+    assert stats[f"shed_{policy}"] == shed
+    # admitted requests wait at most the deadline before they are processed
+    assert stats["p99"] <= deadline + delay + 0.05
+    answered = [i for i, r in client.replies.items() if r == b"answer"]
+    assert len(answered) == stats["completed"]
+    assert max(client.latencies[i] for i in answered) <= deadline + delay + 0.1
+
+    shed_replies = [r for r in client.replies.values() if r != b"answer"]
+    if policy == "drop":
+        assert all(r == b"" for r in shed_replies)
+        return
+    for response in map(dns.message.from_wire, shed_replies):
+        assert not response.answer
+        if policy == "truncate":
+            assert response.flags & dns.flags.TC
+        else:
+            assert response.rcode() == dns.rcode.SERVFAIL
+
+
+def test_deadline_sheds_stale_requests():
+    admission = AdmissionController(
+        slow_process(0.2), workers=1, queue_size=8, deadline=0.05, policy="servfail"
+    )
+    admission.start()
+    client = Client()
+    for i in range(3):
+        client.submit(admission, i)
+    assert client.wait(3)
+    stats = admission.stats()
+    assert stats["admitted"] == 3
+    assert stats["completed"] == 1
+    assert stats["shed_deadline"] == 2
+    assert client.replies[0] == b"answer"
+    for i in (1, 2):
+        response = dns.message.from_wire(client.replies[i])
+        assert response.rcode() == dns.rcode.SERVFAIL
+
+
+def test_truncation_falls_back_to_servfail_for_tcp():
+    admission = AdmissionController(
+        slow_process(0.2), workers=1, queue_size=1, deadline=1.0, policy="truncate"
+    )
+    admission.start()
+    client = Client()
+    for i in range(3):
+        client.submit(admission, i, protocol="TCP")
+    assert client.wait(3)
+    assert admission.stats()["shed_servfail"] >= 1
+    shed = [r for r in client.replies.values() if r != b"answer"]
+    assert shed
+    for response in map(dns.message.from_wire, shed):
+        assert response.rcode() == dns.rcode.SERVFAIL
+        assert not response.flags & dns.flags.TC
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AdmissionController(slow_process(0), policy="retry")
+
+
+def test_server_sheds_bursts(serve):
+    admission = AdmissionController(
+        DNSHandler.process, workers=1, queue_size=4, deadline=0.5, policy="truncate"
+    )
+    server = serve(admission=admission)
+    responses = burst(server.port, 200)
+    assert len(responses) == 200
+    truncated = [r for r in responses.values() if r.flags & dns.flags.TC]
+    assert truncated and all(not r.answer for r in truncated)
+    assert len(truncated) == admission.stats()["shed_truncate"]
+    assert all(r.answer for r in responses.values() if not r.flags & dns.flags.TC)
@@ -0,0 +1,58 @@
+"""Tests for weighted sampling using alias tables."""
+
+from collections import Counter
+
+import pytest
+
+from darkseed.selection import AliasTable
+
+
+def test_draws_proportionally_to_weights():
+    table = AliasTable(["a", "b", "c"], [1.0, 2.0, 7.0])
+    counts = Counter(table.sample(1)[0] for _ in range(20000))
+    assert counts["a"] / 20000 == pytest.approx(0.1, abs=0.02)
+    assert counts["b"] / 20000 == pytest.approx(0.2, abs=0.02)
+    assert counts["c"] / 20000 == pytest.approx(0.7, abs=0.02)
+
+
+def test_sample_is_distinct_and_bounded():
+    table = AliasTable(list(range(10)), [1.0] * 10)
+    assert sorted(table.sample(10)) == list(range(10))
+    assert sorted(table.sample(20)) == list(range(10))
+    assert not AliasTable([], []).sample(3)
+
+
+def test_zero_weights_only_fill_up():
+    table = AliasTable(["a", "b", "c"], [1.0, 0.0, 0.0])
+    assert all(table.sample(1) == ["a"] for _ in range(1000))
+    assert sorted(table.sample(3)) == ["a", "b", "c"]
+
+
+def test_remainder_follows_weights():
+    # the heavy items exhaust the bounded draws, so the light items are
+    # filled in, which must still prefer the medium over the light ones
+    items = [f"heavy{i}" for i in range(10)]
+    items += [f"medium{i}" for i in range(5)] + [f"light{i}" for i in range(5)]
+    weights = [1.0] * 10 + [1e-3] * 5 + [1e-5] * 5
+    table = AliasTable(items, weights)
+    medium = 0
+    for _ in range(500):
+        sample = table.sample(15)
+        assert len(set(sample)) == 15
+        medium += sum(item.startswith("medium") for item in sample)
+    # uniform filling would choose 2.5 medium items per sample on average
+    assert medium / 500 > 4.5
+
+
+def test_fill_is_proportional():
+    table = AliasTable(["a", "b", "c", "d"], [1.0, 1.0, 1.0, 3.0])
+    counts = Counter(table.fill({}, 1)[0] for _ in range(20000))
+    assert counts[3] / 20000 == pytest.approx(0.5, abs=0.02)
+    assert sorted(table.fill({3: None}, 3)) == [0, 1, 2]
+
+
+def test_rejects_invalid_weights():
+    with pytest.raises(ValueError):
+        AliasTable(["a"], [1.0, 2.0])
+    with pytest.raises(ValueError):
+        AliasTable(["a"], [-1.0])
@@ -0,0 +1,85 @@
+"""Tests for capturing queries and replaying them."""
+
+import socket
+import time
+
+import dns.edns
+import dns.message
+import dns.query
+import pytest
+from conftest import SUBDOMAINS, ZONE
+
+from darkseed.cli.darkreplay.replay import Replayer
+from darkseed.dns import QueryCapture
+from darkseed.dns.mmsg import MMsgSocket
+
+
+def make_queries() -> list[bytes]:
+    """Create queries, including ones starting and ending with whitespace bytes."""
+    queries = []
+    for i in range(20):
+        query = dns.message.make_query(f"{SUBDOMAINS[i % 5]}.{ZONE}", "ANY")
+        query.id = (b" \n\x00\x01"[i % 4] << 8) | i
+        if i % 2:
+            option = dns.edns.GenericOption(65001, b"pad \n")
+            query.use_edns(0, payload=1232, options=[option])
+        queries.append(query.to_wire())
+    return queries
+
+
+@pytest.mark.parametrize(
+    "udp_batch",
+    [
+        0,
+        pytest.param(
+            16,
+            marks=pytest.mark.skipif(
+                not MMsgSocket.supported(), reason="requires recvmmsg"
+            ),
+        ),
+    ],
+)
+def test_capture_replay_round_trip(serve, tmp_path, udp_batch):
+    capture = QueryCapture(tmp_path / "queries.cap")
+    server = serve(udp_batch=udp_batch, capture=capture)
+    queries = make_queries()
+    protocols = ["TCP" if i % 5 == 4 else "UDP" for i in range(len(queries))]
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(2)
+        for query, protocol in zip(queries, protocols):
+            if protocol == "UDP":
+                sock.sendto(query, ("127.0.0.1", server.port))
+                assert sock.recv(65535)[:2] == query[:2]
+            else:
+                message = dns.message.from_wire(query)
+                dns.query.tcp(message, "127.0.0.1", port=server.port, timeout=2)
+            time.sleep(0.01)
+    capture.close()
+
+    captured = list(QueryCapture.read(capture.path))
+    assert [q.data for q in captured] == queries
+    assert [q.protocol for q in captured] == protocols
+    offsets = [q.offset for q in captured]
+    assert offsets == sorted(offsets)
+    assert offsets[-1] - offsets[0] >= 0.01 * (len(queries) - 1)
+
+    for speed in (0, 2.0):
+        result = Replayer("127.0.0.1", server.port, speed=speed).run(captured)
+        assert result.lost == 0
+        assert len(result.answered) == len(queries)
+    # replaying at recorded speed divided by two takes at least half as long
+    assert result.duration >= (offsets[-1] - offsets[0]) / 2
+
+
+def test_read_ignores_truncated_record(tmp_path):
+    capture = QueryCapture(tmp_path / "queries.cap")
+    capture.open()
+    capture.record(b"first", "UDP")
+    capture.record(b"second", "TCP")
+    capture.close()
+    data = capture.path.read_bytes()
+    capture.path.write_bytes(data[:-1])
+    assert [q.data for q in QueryCapture.read(capture.path)] == [b"first"]
+    capture.path.write_bytes(b"garbage")
+    with pytest.raises(ValueError):
+        list(QueryCapture.read(capture.path))
@@ -0,0 +1,71 @@
+"""Tests for selection by rotating through a shuffled pool."""
+
+import math
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+from darkseed.selection import ShuffledCursor
+
+
+@pytest.mark.parametrize(("num", "k"), [(100, 10), (100, 7), (1000, 23)])
+def test_first_pass_serves_every_item(num, k):
+    cursor = ShuffledCursor(range(num))
+    served = set()
+    for _ in range(math.ceil(num / k)):
+        window = cursor.sample(k)
+        assert len(window) == len(set(window)) == k
+        served.update(window)
+    assert served == set(range(num))
+
+
+def test_aligned_passes_serve_every_item_once():
+    cursor = ShuffledCursor(range(100))
+    for _ in range(50):
+        served = Counter(item for _ in range(10) for item in cursor.sample(10))
+        assert served == Counter(range(100))
+
+
+@pytest.mark.parametrize(("num", "k"), [(100, 7), (1000, 23), (30, 29)])
+def test_exposure_is_even(num, k):
+    cursor = ShuffledCursor(range(num))
+    passes = 100
+    served = Counter(
+        item for _ in range(passes * math.ceil(num / k)) for item in cursor.sample(k)
+    )
+    assert set(served) == set(range(num))
+    # items are only skipped where a window spans a reshuffle
+    assert max(served.values()) / min(served.values()) <= 1.1
+
+
+def test_small_pool_returns_all_items():
+    cursor = ShuffledCursor(range(5))
+    assert sorted(cursor.sample(5)) == list(range(5))
+    assert sorted(cursor.sample(8)) == list(range(5))
+
+
+def test_concurrent_passes_serve_every_item_once():
+    num, k, threads, windows = 100, 10, 8, 500
+    cursor = ShuffledCursor(range(num))
+    results: list[list[int]] = [[] for _ in range(threads)]
+
+    def run(result: list[int]):
+        for _ in range(windows):
+            result.extend(cursor.sample(k))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        workers = [threading.Thread(target=run, args=(r,)) for r in results]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+    served = Counter(item for result in results for item in result)
+    # windows never span a reshuffle, so every pass serves every item once
+    passes = threads * windows * k // num
+    assert served == Counter({item: passes for item in range(num)})
@@ -0,0 +1,61 @@
+"""Tests for keeping the garbage collector away from the node pool."""
+
+import gc
+import logging
+import re
+import weakref
+
+import pytest
+
+from darkseed.gc_control import GCController
+
+
+class Node:
+    """Pool entry referencing itself, so it is freed by the collector only."""
+
+    def __init__(self):
+        self.cycle = self
+
+
+@pytest.fixture
+def controller():
+    controller = GCController()
+    controller.install()
+    yield controller
+    gc.callbacks.remove(controller.callback)
+    gc.unfreeze()
+
+
+def test_replaced_pool_is_reclaimed(controller):
+    with controller.ingest():
+        pool = [Node() for _ in range(1000)]
+    assert gc.get_freeze_count() > 0
+    ref = weakref.ref(pool[0])
+    del pool
+    # frozen cycles survive full collections between updates ...
+    gc.collect()
+    assert ref() is not None
+    # ... and are reclaimed before the next ingest
+    with controller.ingest():
+        pool = [Node() for _ in range(1000)]
+    assert ref() is None
+
+
+def test_thresholds_restored_and_growth_logged(controller, caplog):
+    thresholds = gc.get_threshold()
+    with caplog.at_level(logging.INFO):
+        with controller.ingest():
+            assert gc.get_threshold()[1:] == (GCController.UNLIMITED,) * 2
+            pool = [Node() for _ in range(1000)]
+        with controller.ingest():
+            pool += [Node() for _ in range(1000)]
+    assert gc.get_threshold() == thresholds
+    settled = [
+        tuple(map(int, match))
+        for match in re.findall(r"frozen=(\d+) \(([+-]\d+)\)", caplog.text)
+    ]
+    assert len(settled) == 2
+    (first, first_growth), (second, second_growth) = settled
+    assert first_growth == first
+    assert second_growth == second - first >= 1000
+    del pool
@@ -0,0 +1,64 @@
+"""Import regression checks for the entry points, run in fresh interpreters."""
+
+import json
+import subprocess
+import sys
+
+from conftest import ZONE
+
+# modules only needed for lookups without nameserver, proxies or harvesting
+DARKDIG_LAZY = {
+    "dns.resolver",
+    "dns.query",
+    "socks",
+    "darkseed.cli.darkdig.harvest",
+    "darkseed.dns.server",
+    "darkseed.node_manager",
+}
+# optional dependencies, only imported if the corresponding feature is used
+DARKSEED_LAZY = {"cryptography", "pyarrow", "zstandard", "socks", "dns.resolver"}
+
+
+def run(code: str) -> tuple[set[str], dict[str, int], str]:
+    """Run code in a fresh interpreter with -X importtime.
+
+    Return the modules imported, the cumulative import time (in usec) per
+    module, and the output of the code.
+    """
+    script = f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output, _, modules = result.stdout.rstrip("\n").rpartition("\n")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return set(json.loads(modules)), times, output
+
+
+def test_darkdig_import_is_lean():
+    modules, times, _ = run("import darkseed.cli.darkdig")
+    assert not modules & DARKDIG_LAZY, f"import time: {times['darkseed.cli.darkdig']}us"
+
+
+def test_darkdig_lookup_with_nameserver_skips_resolver(serve):
+    server = serve()
+    argv = ["darkdig", "-n", "127.0.0.1", "-p", str(server.port), f"n1.{ZONE}"]
+    modules, _, output = run(
+        f"import sys\nsys.argv = {argv!r}\n"
+        "from darkseed.cli.darkdig import main\nmain()"
+    )
+    assert "status: NOERROR" in output
+    assert "ANSWER SECTION" in output
+    assert not modules & DARKDIG_LAZY
+
+
+def test_darkseed_import_skips_optional_dependencies():
+    modules, _, _ = run("import darkseed.cli.darkseed")
+    assert not {m.partition(".")[0] for m in modules} & DARKSEED_LAZY
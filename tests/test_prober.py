@@ -0,0 +1,164 @@
+"""Tests for probing node liveness against local stub peers."""
+
+import asyncio
+import logging
+import threading
+
+import pytest
+
+from darkseed.address import NetworkType
+from darkseed.address.bip155like import OnionAddressCodec
+from darkseed.node import LivenessProber, Node, NodePool
+from darkseed.node_manager import NodeManager
+
+ALIVE, SILENT, GARBAGE, REFUSED = "127.0.0.1", "127.0.0.2", "127.0.0.3", "127.0.0.4"
+ONION_ALIVE = OnionAddressCodec.pubkey_to_address(b"a" * 32)
+ONION_DEAD = OnionAddressCodec.pubkey_to_address(b"d" * 32)
+
+
+async def version_peer(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer version message with a version message."""
+    header = await reader.readexactly(24)
+    await reader.readexactly(int.from_bytes(header[16:20], "little"))
+    writer.write(LivenessProber.version_message())
+    await writer.drain()
+    writer.close()
+
+
+async def silent_peer(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Accept connection but never answer."""
+    await reader.read()
+    writer.close()
+
+
+async def garbage_peer(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer with something that is not a version message."""
+    writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+    await writer.drain()
+    writer.close()
+
+
+async def socks_proxy(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """SOCKS5 proxy connecting only to ONION_ALIVE, which runs a version peer."""
+    await reader.readexactly(3)
+    writer.write(b"\x05\x00")
+    request = await reader.readexactly(5)
+    name = await reader.readexactly(request[4])
+    await reader.readexactly(2)
+    if name.decode() != ONION_ALIVE:
+        writer.write(b"\x05\x04\x00\x01" + bytes(6))  # host unreachable
+        writer.close()
+        return
+    writer.write(b"\x05\x00\x00\x01" + bytes(6))
+    await version_peer(reader, writer)
+
+
+@pytest.fixture(scope="module")
+def stubs():
+    """Run stub peers on one port of several loopback addresses and a proxy."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    ports = {}
+
+    async def start():
+        server = await asyncio.start_server(version_peer, ALIVE, 0)
+        port = ports["peer"] = server.sockets[0].getsockname()[1]
+        await asyncio.start_server(silent_peer, SILENT, port)
+        await asyncio.start_server(garbage_peer, GARBAGE, port)
+        proxy = await asyncio.start_server(socks_proxy, "127.0.0.1", 0)
+        ports["proxy"] = proxy.sockets[0].getsockname()[1]
+        ready.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(start(), loop)
+    assert ready.wait(5)
+    yield ports
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def make_prober(stubs, **kwargs) -> LivenessProber:
+    kwargs.setdefault("timeout", 0.5)
+    kwargs.setdefault("rate", 1000.0)
+    kwargs.setdefault("max_failures", 1)
+    kwargs.setdefault("max_failure_ratio", 1.0)
+    return LivenessProber(**kwargs)
+
+
+def peers(stubs, *hosts: str) -> list[Node]:
+    return [Node(host, stubs["peer"], 1) for host in hosts]
+
+
+def test_handshake(stubs):
+    prober = make_prober(stubs, mode="handshake")
+    nodes = peers(stubs, ALIVE, SILENT, GARBAGE, REFUSED)
+    assert prober.run(nodes) == {SILENT, GARBAGE, REFUSED}
+
+
+def test_connect(stubs):
+    prober = make_prober(stubs, mode="connect")
+    nodes = peers(stubs, ALIVE, SILENT, GARBAGE, REFUSED)
+    assert prober.run(nodes) == {REFUSED}
+
+
+def test_consecutive_failures(stubs):
+    prober = make_prober(stubs, mode="handshake", max_failures=2)
+    nodes = peers(stubs, ALIVE, SILENT)
+    assert prober.run(nodes) == set()
+    assert prober.run(nodes) == {SILENT}
+    # a node answering again starts over
+    assert prober.run(peers(stubs, ALIVE)) == set()
+    assert prober.run(nodes) == set()
+
+
+def test_socks_proxy(stubs):
+    prober = make_prober(
+        stubs,
+        mode="handshake",
+        networks=frozenset(),
+        proxies={NetworkType.ONION_V3: f"127.0.0.1:{stubs['proxy']}"},
+    )
+    nodes = [Node(ONION_ALIVE, 8333, 1), Node(ONION_DEAD, 8333, 1)]
+    # IPv4 is not probed, so its nodes are never reported dead
+    assert prober.run(nodes + peers(stubs, REFUSED)) == {ONION_DEAD}
+
+
+def test_failure_ratio_is_per_network(stubs, caplog):
+    prober = make_prober(
+        stubs,
+        mode="handshake",
+        max_failures=2,
+        max_failure_ratio=0.5,
+        proxies={NetworkType.ONION_V3: f"127.0.0.1:{stubs['proxy']}"},
+    )
+    onion = [Node(ONION_ALIVE, 8333, 1), Node(ONION_DEAD, 8333, 1)]
+    # 1 of 2 probes fail for each network, so both are pruned
+    assert prober.run(peers(stubs, ALIVE, SILENT) + onion) == set()
+    # 3 of 4 IPv4 probes fail, so the round is disregarded for IPv4 only
+    ipv4 = peers(stubs, ALIVE, SILENT, GARBAGE, REFUSED)
+    with caplog.at_level(logging.WARNING):
+        assert prober.run(ipv4 + onion) == {ONION_DEAD}
+    assert "Not pruning ipv4 nodes: 3 of 4 probes failed" in caplog.text
+    # failures from before the disregarded round are kept
+    assert prober.run(peers(stubs, ALIVE, SILENT)) == {SILENT}
+
+
+def test_requires_proxy_for_darknets():
+    with pytest.raises(ValueError):
+        LivenessProber(networks=frozenset({NetworkType.ONION_V3}))
+    with pytest.raises(ValueError):
+        LivenessProber(mode="ping")
+
+
+def test_prunes_dead_nodes_from_pool(stubs, tmp_path, monkeypatch):
+    monkeypatch.setattr(NodeManager, "POOL", NodePool.empty())
+    prober = make_prober(stubs, mode="handshake")
+    node_manager = NodeManager(tmp_path, prober=prober)
+    node_manager.publish(peers(stubs, ALIVE, SILENT, REFUSED), "stubs")
+    version = node_manager.get_pool().version
+    nodes = node_manager.get_pool().nodes()
+    node_manager.prune(prober.run(nodes), node_manager.window.latest)
+    pool = node_manager.get_pool()
+    assert pool.version == version + 1
+    assert [n.address.address for n in pool.nodes()] == [ALIVE]
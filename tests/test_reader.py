@@ -0,0 +1,83 @@
+"""Tests for reading crawler data in all supported formats."""
+
+import bz2
+import gzip
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+from conftest import COLUMNS, make_rows, write_csv
+
+from darkseed.node.reader import CrawlerDataReader
+from darkseed.node_manager import NodeManager
+
+CRAWL = "2024-10-01T00-00-00Z_reachable_nodes"
+
+
+def convert(csv_path: Path, suffix: str) -> Path:
+    """Convert CSV file to format given by suffix."""
+    path = csv_path.with_name(f"{CRAWL}{suffix}")
+    match suffix:
+        case ".csv.gz" | ".csv.bz2":
+            opener = gzip.open if suffix == ".csv.gz" else bz2.open
+            with open(csv_path, "rb") as src, opener(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        case ".csv.zst":
+            zstandard = pytest.importorskip("zstandard")
+            path.write_bytes(zstandard.ZstdCompressor().compress(csv_path.read_bytes()))
+        case ".parquet" | ".arrow":
+            pytest.importorskip("pyarrow")
+            import pyarrow.csv  # pylint: disable=import-outside-toplevel
+            import pyarrow.feather  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+            table = pyarrow.csv.read_csv(csv_path)
+            if suffix == ".parquet":
+                pyarrow.parquet.write_table(table, path)
+            else:
+                pyarrow.feather.write_feather(table, path, compression="uncompressed")
+    return path
+
+
+@pytest.fixture
+def crawl_csv(tmp_path: Path) -> Path:
+    path = tmp_path / f"{CRAWL}.csv"
+    write_csv(path, make_rows(200))
+    return path
+
+
+@pytest.mark.parametrize("suffix", CrawlerDataReader.SUFFIXES)
+def test_formats_read_same_rows(crawl_csv, suffix):
+    path = convert(crawl_csv, suffix)
+    columns = ("host", "port", "network", "services")
+    expected = [{c: r[c] for c in columns} for r in make_rows(200)]
+    # str paths are accepted as well as Path objects
+    for arg in (path, str(path)):
+        rows = [
+            {c: str(v) for c, v in row.items()}
+            for row in CrawlerDataReader.read(arg, columns + ("missing",))
+        ]
+        assert rows == expected
+    nodes = NodeManager.read_data_file(str(path))
+    assert len(nodes) == 200
+
+
+def test_missing_optional_package_falls_back_to_csv(crawl_csv, monkeypatch):
+    parquet = convert(crawl_csv, ".parquet")
+    zst = convert(crawl_csv, ".csv.zst")
+    node_manager = NodeManager(crawl_csv.parent)
+    assert node_manager.get_data_files() == [parquet]
+    for package in ("pyarrow", "pyarrow.dataset", "zstandard"):
+        monkeypatch.setitem(sys.modules, package, None)
+    # the crawl is still read from its CSV file instead of raising ImportError
+    assert node_manager.get_data_files() == [crawl_csv]
+    assert not CrawlerDataReader.available(parquet)
+    assert not CrawlerDataReader.available(str(zst))
+    with pytest.raises(ImportError, match="requires the pyarrow package"):
+        list(CrawlerDataReader.read(parquet, COLUMNS))
+    with pytest.raises(ImportError, match="requires the zstandard package"):
+        list(CrawlerDataReader.read(zst, COLUMNS))
+    crawl_csv.unlink()
+    with pytest.raises(ValueError, match="No crawler data found"):
+        node_manager.get_data_files()
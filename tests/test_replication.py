@@ -0,0 +1,121 @@
+"""Tests for replicating node pools from a primary to a secondary process."""
+
+import json
+import logging
+import selectors
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from conftest import free_port, make_rows, write_csv
+
+from darkseed.address import NetworkType
+from darkseed.node import Node, NodePool
+from darkseed.node_manager import NodeManager
+from darkseed.replication import ReplicationPrimary, SnapshotCodec
+
+# secondary printing a digest of every replicated pool as one JSON line
+SECONDARY = """
+import json, logging, sys, time
+from pathlib import Path
+from darkseed.node_manager import NodeManager
+from darkseed.replication import ReplicationSecondary
+
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+node_manager = NodeManager(Path(sys.argv[2]))
+
+def report():
+    pool = node_manager.get_pool()
+    nodes = sorted(
+        (n.address.address, n.port, n.services, round(n.quality, 4))
+        for n in pool.nodes()
+    )
+    print(json.dumps({"version": pool.version, "nodes": nodes}), flush=True)
+
+node_manager.subscribe(report)
+ReplicationSecondary(node_manager, sys.argv[1], retry=0.2).start()
+time.sleep(60)
+"""
+
+
+def digest(pool: NodePool) -> list[list]:
+    """Get sorted nodes of pool in the format reported by the secondary."""
+    return [
+        list(t)
+        for t in sorted(
+            (n.address.address, n.port, n.services, round(n.quality, 4))
+            for n in pool.nodes()
+        )
+    ]
+
+
+def read_update(proc: subprocess.Popen, timeout: float = 10) -> dict:
+    """Read next pool reported by the secondary."""
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ)
+        if not selector.select(timeout):
+            pytest.fail("Secondary did not report a pool in time")
+    return json.loads(proc.stdout.readline())
+
+
+@pytest.fixture
+def primary(crawler_dir: Path):
+    node_manager = NodeManager(crawler_dir)
+    endpoint = f"127.0.0.1:{free_port()}"
+    ReplicationPrimary(node_manager, endpoint).start()
+    yield node_manager, endpoint
+    NodeManager.POOL = NodePool.empty()
+
+
+def test_codec_round_trip_long_strings():
+    source = "crawl/" + "x" * 300 + "_reachable_nodes.csv"
+    nodes = [Node("1.2.3.4", 8333, 1033, 0.5), Node("5.6.7.8", 8333, 1, 1.0)]
+    pool = NodePool(7, source, {NetworkType.IPV4: tuple(nodes)}, {})
+    replicated: dict[str, Node] = {}
+    assert SnapshotCodec.apply(SnapshotCodec.encode_full(pool), replicated) == source
+    assert sorted(replicated) == ["1.2.3.4", "5.6.7.8"]
+    with pytest.raises(ValueError, match="String too long"):
+        SnapshotCodec.encode_full(NodePool(8, "x" * 70000, {}, {}))
+
+
+def test_secondary_converges(primary, tmp_path: Path, caplog):
+    node_manager, endpoint = primary
+    caplog.set_level(logging.INFO)
+    node_manager.get_latest_data()
+    # pylint: disable-next=consider-using-with
+    proc = subprocess.Popen(
+        [sys.executable, "-c", SECONDARY, endpoint, str(tmp_path / "empty")],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # full snapshot after connecting
+        update = read_update(proc)
+        assert update["version"] == node_manager.get_pool().version
+        assert update["nodes"] == digest(node_manager.get_pool())
+
+        # delta removing nodes
+        pool = node_manager.get_pool()
+        dead = {n.address.address for n in pool.nodes()[:50]}
+        node_manager.prune(dead, node_manager.window.latest)
+        update = read_update(proc)
+        assert update["version"] == node_manager.get_pool().version
+        assert update["nodes"] == digest(node_manager.get_pool())
+        assert len(update["nodes"]) == len(pool.nodes()) - 50
+
+        # delta adding and changing nodes from a newer crawl
+        rows = make_rows(600, seed=1)
+        rows[0]["services"] = "1"
+        write_csv(node_manager.path / "2024-10-01T01-00-00Z_reachable_nodes.csv", rows)
+        node_manager.get_latest_data()
+        update = read_update(proc)
+        assert update["version"] == node_manager.get_pool().version
+        assert update["nodes"] == digest(node_manager.get_pool())
+    finally:
+        proc.kill()
+        _, stderr = proc.communicate()
+    # the secondary applied the snapshot and first delta before the last update
+    assert stderr.count("kind=full") == 1 and "kind=delta" in stderr
+    assert caplog.text.count("kind=delta") == 2
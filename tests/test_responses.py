@@ -0,0 +1,102 @@
+"""Tests for response sizes of all routes and truncation (TC) over UDP."""
+
+import ipaddress
+import time
+
+import dns.flags
+import dns.message
+import dns.query
+import dns.rdatatype
+import pytest
+
+from darkseed.dns import DNSHandler
+from darkseed.dns.aaaa_codec import AAAACodec
+from darkseed.dns.constants import DNSConstants
+from darkseed.dns.routing import RoutingTable, Zone
+
+# real-world zone and one with long labels shrinking the answer budget
+ZONES = ("seed.bitcoin.sipa.be.", "x" * 60 + ".y" + "y" * 40 + ".example.org.")
+
+
+def count_addresses(response: dns.message.Message) -> int:
+    """Count clearnet records and addresses encoded in custom AAAA records."""
+    records = [rdata for rrset in response.answer for rdata in rrset]
+    clearnet = [
+        rdata
+        for rdata in records
+        if rdata.rdtype == dns.rdatatype.A
+        or ipaddress.IPv6Address(rdata.address) not in AAAACodec.PREFIX
+    ]
+    encoded = [rdata for rdata in records if rdata not in clearnet]
+    return len(clearnet) + (len(AAAACodec.decode(encoded)) if encoded else 0)
+
+
+def test_size_limit():
+    query = dns.message.make_query("n1.seed.test.", "A")
+    assert DNSHandler.size_limit(query, "UDP") == 512
+    assert DNSHandler.size_limit(query, "TCP") == 65535
+    assert DNSHandler.size_limit(query, "UNIX") == 65535
+    query.use_edns(payload=300)
+    assert DNSHandler.size_limit(query, "UDP") == 512
+    query.use_edns(payload=4096)
+    assert DNSHandler.size_limit(query, "UDP") == 1232
+
+
+def test_all_routes_fit_udp(serve):
+    serve(zones=ZONES)
+    table = RoutingTable(tuple(Zone.parse(zone) for zone in ZONES))
+    for (qname, qtype), route in table.routes.items():
+        wanted = sum(route.netcounts.values())
+        for _ in range(3):
+            query = dns.message.make_query(qname, qtype)
+            data = DNSHandler.process(query.to_wire(), "test", "UDP")
+            assert len(data) <= DNSConstants.UDP_SIZE_LIMIT, (qname, qtype)
+            response = dns.message.from_wire(data)
+            assert not response.flags & dns.flags.TC, (qname, qtype)
+            assert count_addresses(response) == wanted, (qname, qtype)
+
+
+@pytest.mark.parametrize("subdomain", ["n1456", "n12456"])
+def test_composite_answers_fit_udp(serve, subdomain):
+    server = serve(zones=ZONES)
+    for zone in ZONES:
+        query = dns.message.make_query(f"{subdomain}.{zone}", "ANY")
+        response = dns.query.udp(query, "127.0.0.1", port=server.port, timeout=2)
+        assert len(response.to_wire()) <= DNSConstants.UDP_SIZE_LIMIT
+        assert not response.flags & dns.flags.TC
+        rdtypes = {rrset.rdtype for rrset in response.answer}
+        assert dns.rdatatype.A in rdtypes and dns.rdatatype.AAAA in rdtypes
+        assert count_addresses(response) >= len(subdomain) - 1
+
+
+def test_oversized_udp_answer_is_truncated(serve, monkeypatch):
+    server = serve()
+    monkeypatch.setattr(DNSConstants, "UDP_SIZE_LIMIT", 256)
+    query = dns.message.make_query("n12456.seed.test.", "ANY")
+    response = dns.query.udp(query, "127.0.0.1", port=server.port, timeout=2)
+    assert response.flags & dns.flags.TC
+    assert response.id == query.id and not response.answer
+    # clients retry via TCP and get the full answer
+    response = dns.query.tcp(query, "127.0.0.1", port=server.port, timeout=2)
+    assert not response.flags & dns.flags.TC
+    assert len(response.to_wire()) > 256
+    assert count_addresses(response) > 0
+
+
+def test_signed_answer_is_truncated_over_udp(serve, tmp_path):
+    pytest.importorskip("cryptography")
+    server = serve(dnssec_key_dir=tmp_path, dnssec_pool_size=2)
+    query = dns.message.make_query(
+        "n12456.seed.test.", "ANY", use_edns=0, want_dnssec=True, payload=512
+    )
+    # wait for the presigned pool, unsigned answers are served until then
+    for _ in range(100):
+        response = dns.query.tcp(query, "127.0.0.1", port=server.port, timeout=2)
+        if any(rrset.rdtype == dns.rdatatype.RRSIG for rrset in response.answer):
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("No signed answer via TCP")
+    assert len(response.to_wire()) > DNSConstants.UDP_SIZE_LIMIT
+    response = dns.query.udp(query, "127.0.0.1", port=server.port, timeout=2)
+    assert response.flags & dns.flags.TC and not response.answer
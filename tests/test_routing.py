@@ -0,0 +1,54 @@
+"""Tests for routing queries to zones and node selections."""
+
+import logging
+
+import dns.rdatatype
+import pytest
+
+from darkseed.address import NetworkType
+from darkseed.dns.routing import RoutingTable, Zone
+
+
+def test_zone_parse_appends_final_dot(caplog):
+    with caplog.at_level(logging.WARNING):
+        zone = Zone.parse("Seed.Example.org")
+    assert zone.name == "seed.example.org."
+    assert zone.networks == frozenset(Zone.SUPPORTED_NETWORKS)
+    assert "missing final dot" in caplog.text
+
+
+def test_zone_parse_restricts_networks(caplog):
+    with caplog.at_level(logging.WARNING):
+        zone = Zone.parse("seed.example.org.:n4,n5")
+    assert zone.networks == frozenset({NetworkType.ONION_V3, NetworkType.I2P})
+    assert not caplog.text
+    with pytest.raises(ValueError):
+        Zone.parse("seed.example.org.:n9")
+
+
+def test_route_lookup():
+    zones = (Zone.parse("a.example."), Zone.parse("b.example.:n4"))
+    table = RoutingTable(zones)
+    route = table.route("n1.a.example.", dns.rdatatype.A)
+    assert route and route.zone.name == "a.example."
+    assert route.netcounts == {NetworkType.IPV4: 29}
+    # unsupported subdomain of a zone is answered empty, foreign zones ignored
+    route = table.route("n1.b.example.", dns.rdatatype.A)
+    assert route and not route.netcounts
+    assert table.route("n1.c.example.", dns.rdatatype.A) is None
+
+
+def test_routes_are_trimmed_for_long_zones():
+    short = RoutingTable((Zone.parse("seed.bitcoin.sipa.be."),))
+    assert short.route("seed.bitcoin.sipa.be.", dns.rdatatype.ANY).netcounts == {
+        NetworkType.IPV4: 12,
+        NetworkType.IPV6: 10,
+    }
+    name = "x" * 60 + ".example.org."
+    table = RoutingTable((Zone.parse(name),))
+    for qname in (name, f"n1.{name}"):
+        for qtype in (dns.rdatatype.A, dns.rdatatype.ANY):
+            netcounts = table.route(qname, qtype).netcounts
+            assert sum(netcounts.values())
+            budget = RoutingTable.answer_budget(qname)
+            assert RoutingTable.answer_fits(netcounts, budget)
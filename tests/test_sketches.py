@@ -0,0 +1,42 @@
+"""Tests for error bounds of the HyperLogLog and count-min sketches."""
+
+import random
+
+import pytest
+
+from darkseed.analytics.sketches import HeavyHitters, HyperLogLog
+
+
+@pytest.mark.parametrize("precision, error", [(10, 0.033), (12, 0.016)])
+def test_hyperloglog_standard_error(precision, error):
+    assert HyperLogLog(precision).standard_error == pytest.approx(error, abs=1e-3)
+    assert len(HyperLogLog(precision).registers) == 2**precision
+
+
+@pytest.mark.parametrize("precision", [10, 12])
+@pytest.mark.parametrize("count", [100, 5000, 50000])
+def test_hyperloglog_estimate_within_error(precision, count):
+    sketch = HyperLogLog(precision)
+    for i in range(count):
+        sketch.add(f"client-{precision}-{i}")
+        sketch.add(f"client-{precision}-{i}")  # duplicates are not counted
+    # deterministic hashes; 3 standard errors hold for all but 0.3% of inputs
+    assert abs(sketch.estimate() / count - 1) <= 3 * sketch.standard_error
+
+
+def test_count_min_error_bound():
+    rng = random.Random(0)
+    width, depth, total = 256, 4, 20000
+    sketch = HeavyHitters(width, depth, k=5)
+    counts: dict[str, int] = {}
+    for _ in range(total):
+        item = f"resolver-{min(int(rng.paretovariate(1.0)), 5000)}"
+        counts[item] = counts.get(item, 0) + 1
+        sketch.add(item)
+    errors = [sketch.estimate(item) - count for item, count in counts.items()]
+    assert min(errors) >= 0  # never underestimates
+    # overestimation exceeds 2N/width with probability of at most 2^-depth
+    exceeded = sum(error > 2 * total / width for error in errors)
+    assert exceeded <= len(errors) / 2**depth
+    top = sorted(counts, key=counts.__getitem__, reverse=True)[:3]
+    assert [item for item, _ in sketch.most_common()[:3]] == top
@@ -0,0 +1,126 @@
+"""Tests for serving UDP, in particular using batched syscalls."""
+
+import logging
+import socket
+import threading
+
+import dns.edns
+import dns.message
+import dns.rcode
+import pytest
+from conftest import SUBDOMAINS, ZONE, burst
+
+from darkseed.dns.mmsg import MMsgSocket
+from darkseed.dns.server import BatchedUDPServer
+
+mmsg = pytest.mark.skipif(not MMsgSocket.supported(), reason="requires recvmmsg")
+
+
+@pytest.fixture
+def udp_pair():
+    """Get server and client UDP sockets on localhost."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    client.bind(("127.0.0.1", 0))
+    client.settimeout(2)
+    yield server, client
+    server.close()
+    client.close()
+
+
+@mmsg
+def test_mmsg_round_trip(udp_pair):
+    server, client = udp_pair
+    sock = MMsgSocket(server, 8, recv_size=512, send_size=512)
+    assert sock.recv(block=False) == []
+    for i in range(5):
+        client.sendto(bytes([i]) * (i + 1), server.getsockname())
+    received = []
+    while len(received) < 5:
+        received += sock.recv()
+    assert [data for data, _ in received] == [bytes([i]) * (i + 1) for i in range(5)]
+    assert all(peer == client.getsockname() for _, peer in received)
+    assert sock.send([(i, data[::-1] + b"!") for i, (data, _) in enumerate(received)])
+    assert [client.recv(512) for _ in range(5)] == [
+        bytes([i]) * (i + 1) + b"!" for i in range(5)
+    ]
+    with pytest.raises(ValueError):
+        sock.send([(0, bytes(513))])
+
+
+@pytest.mark.parametrize("udp_batch", [pytest.param(16, marks=mmsg), 0])
+def test_answers_burst(serve, udp_batch):
+    server = serve(udp_batch=udp_batch)
+    responses = burst(server.port, 200)
+    assert len(responses) == 200
+    assert all(r.rcode() == dns.rcode.NOERROR and r.answer for r in responses.values())
+
+
+@mmsg
+def test_reports_packets_per_core(serve, monkeypatch, caplog):
+    monkeypatch.setattr(BatchedUDPServer, "STATS_INTERVAL", 0)
+    server = serve(udp_batch=16)
+    with caplog.at_level(logging.INFO):
+        assert len(burst(server.port, 20)) == 20
+    assert "pps_per_core=" in caplog.text
+
+
+def load(port: int, queries: list[bytes], clients: int = 4) -> dict[bytes, bytes]:
+    """Send queries from several clients concurrently; get responses by query.
+
+    Responses are summarized by their header and question, which do not
+    depend on the randomly selected nodes.
+    """
+    summaries: dict[bytes, bytes] = {}
+    lock = threading.Lock()
+
+    def client(share: list[bytes]):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(2)
+            for query in share:
+                sock.sendto(query, ("127.0.0.1", port))
+                try:
+                    data = sock.recv(65535)
+                except TimeoutError:
+                    continue
+                response = dns.message.from_wire(data)
+                summary = (
+                    response.id,
+                    response.flags,
+                    response.rcode(),
+                    response.edns,
+                    str(response.question[0]),
+                    bool(response.answer),
+                )
+                with lock:
+                    summaries[query] = repr(summary).encode()
+
+    threads = [
+        threading.Thread(target=client, args=(queries[i::clients],))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summaries
+
+
+def test_classic_and_batched_paths_agree(serve):
+    # IDs starting with whitespace bytes and EDNS options ending in them must
+    # reach the handler unchanged
+    queries = []
+    for i in range(400):
+        query = dns.message.make_query(f"{SUBDOMAINS[i % 5]}.{ZONE}", "ANY")
+        query.id = (b" \t\n\r\x0b\x0c\x00\x01"[i % 8] << 8) | (i & 0xFF)
+        if i % 3 == 0:
+            option = dns.edns.GenericOption(65001, b"pad \n")
+            query.use_edns(0, payload=1232, options=[option])
+        queries.append(query.to_wire())
+    classic = load(serve(udp_batch=0).port, queries)
+    assert len(classic) == len(queries)
+    if not MMsgSocket.supported():
+        return
+    batched = load(serve(udp_batch=16).port, queries)
+    assert batched == classic
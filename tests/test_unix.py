@@ -0,0 +1,48 @@
+"""Tests for serving DNS on unix stream sockets, e.g., for Tor and I2P tunnels."""
+
+import logging
+import socket
+import struct
+from pathlib import Path
+
+import dns.message
+import dns.rdatatype
+from conftest import ZONE
+
+from darkseed.dns import DNSServer
+
+
+def query_unix(sock: socket.socket, qname: str, qtype: str) -> dns.message.Message:
+    """Send length-prefixed query over connected unix socket, read response."""
+    query = dns.message.make_query(qname, qtype)
+    wire = query.to_wire()
+    sock.sendall(struct.pack("!H", len(wire)) + wire)
+    file = sock.makefile("rb")
+    (size,) = struct.unpack("!H", file.read(2))
+    response = dns.message.from_wire(file.read(size))
+    assert query.is_response(response)
+    return response
+
+
+def test_unix_listener(serve, tmp_path: Path, caplog):
+    path = tmp_path / "dns.sock"
+    path_i2p = tmp_path / "i2p.sock"
+    # stale socket of a previous run is replaced
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(path))
+    serve(unix_listeners=(("tor", path), ("i2p", path_i2p)))
+    with caplog.at_level(logging.INFO):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(str(path))
+            # several queries per connection
+            for qname in (f"n4.{ZONE}", f"n5.{ZONE}"):
+                response = query_unix(sock, qname, "AAAA")
+                assert response.answer[0].rdtype == dns.rdatatype.AAAA
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(str(path_i2p))
+            assert query_unix(sock, f"n1.{ZONE}", "A").answer
+    assert caplog.text.count("from=unix:tor [UNIX]") == 2
+    assert caplog.text.count("from=unix:i2p [UNIX]") == 1
+    assert DNSServer.get_client_address("unix:tor [UNIX]") == "unix:tor"
@@ -0,0 +1,82 @@
+"""Tests for merging a window of recent crawler snapshots."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from darkseed.node import Node, SnapshotWindow
+
+DAY = timedelta(days=1)
+START = datetime(2024, 10, 1)
+
+
+def nodes(*hosts: str) -> list[Node]:
+    return [Node(host, 8333, 1) for host in hosts]
+
+
+def addresses(window: SnapshotWindow) -> set[str]:
+    return {node.address.address for node in window.nodes()}
+
+
+def test_nodes_expire_after_window():
+    window = SnapshotWindow(max_snapshots=2)
+    window.merge(nodes("1.1.1.1", "2.2.2.2"), START)
+    window.merge(nodes("1.1.1.1"), START + DAY)
+    assert addresses(window) == {"1.1.1.1", "2.2.2.2"}
+    window.merge(nodes("3.3.3.3"), START + 2 * DAY)
+    assert addresses(window) == {"1.1.1.1", "3.3.3.3"}
+    assert window.last_seen("1.1.1.1") == START + DAY
+    assert window.latest == START + 2 * DAY
+
+
+def test_max_age():
+    window = SnapshotWindow(max_snapshots=5, max_age=timedelta(hours=36))
+    window.merge(nodes("1.1.1.1"), START)
+    window.merge(nodes("2.2.2.2"), START + DAY)
+    window.merge(nodes("3.3.3.3"), START + 2 * DAY)
+    assert addresses(window) == {"2.2.2.2", "3.3.3.3"}
+
+
+def test_rejects_older_snapshots():
+    window = SnapshotWindow(max_snapshots=2)
+    window.merge(nodes("1.1.1.1"), START + DAY)
+    with pytest.raises(ValueError):
+        window.merge(nodes("2.2.2.2"), START)
+    assert window.latest == START + DAY
+
+
+def test_nodes_added_before_first_snapshot_join_it():
+    # nodes pushed before the first (older) snapshot is merged must not stay
+    # newer than it, or they would block expiry of the nodes behind them
+    window = SnapshotWindow(max_snapshots=2)
+    window.add(nodes("9.9.9.9"))
+    window.merge(nodes("1.1.1.1"), START)
+    assert window.latest == START
+    assert window.last_seen("9.9.9.9") == START
+    window.merge(nodes("2.2.2.2"), START + DAY)
+    window.merge(nodes("3.3.3.3"), START + 2 * DAY)
+    assert addresses(window) == {"2.2.2.2", "3.3.3.3"}
+
+
+def test_nodes_added_later_expire_with_latest_snapshot():
+    window = SnapshotWindow(max_snapshots=2)
+    window.merge(nodes("1.1.1.1"), START)
+    window.add(nodes("9.9.9.9"))
+    assert window.last_seen("9.9.9.9") == START
+    window.discard({"1.1.1.1"})
+    window.merge(nodes("2.2.2.2"), START + DAY)
+    assert addresses(window) == {"9.9.9.9", "2.2.2.2"}
+    window.merge(nodes("3.3.3.3"), START + 2 * DAY)
+    assert addresses(window) == {"2.2.2.2", "3.3.3.3"}
+
+
+def test_counts_appearances():
+    window = SnapshotWindow(max_snapshots=2, count_appearances=True)
+    window.merge(nodes("1.1.1.1", "2.2.2.2"), START)
+    window.merge(nodes("1.1.1.1"), START + DAY)
+    assert window.appearances("1.1.1.1") == 2
+    assert window.appearances("2.2.2.2") == 1
+    window.merge(nodes("3.3.3.3"), START + 2 * DAY)
+    assert window.appearances("1.1.1.1") == 1
+    assert window.appearances("2.2.2.2") == 0
+    assert window.snapshots == 2